@@ -0,0 +1,6 @@
+# Environment variables from the nearest .env (searched upward from this
+# package), loaded once before any module reads its configuration. Variables
+# already set in the environment win.
+from dotenv import load_dotenv
+
+load_dotenv()
@@ -0,0 +1,184 @@
+"""
+Async variants of the crud functions used by the routers.
+
+Reads run the same `crud.select_*` statements on an AsyncSession. Writes
+reuse the sync crud functions through `AsyncSession.run_sync`, which runs
+them on the session's async connection: the rollup bookkeeping, RETURNING
+write path and statement budgets (tests/test_query_counts.py) stay in one
+place. Each write holds `database.async_write_lock()` for its transaction.
+
+The `get_*_rows` variants of list reads select only the columns of the read
+schema, as plain rows for `responses.JSONRowsResponse`.
+
+`get_changes` reads a page of the change feed (app/db/changes.py).
+"""
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import changes, crud, database, models, schemas
+from app.db.responses import schema_columns
+
+T = TypeVar("T")
+
+
+async def _write(db: AsyncSession, fn: Callable[..., T], *args) -> T:
+    async with database.async_write_lock():
+        return await db.run_sync(fn, *args)
+
+# =========================================================
+# Patients
+# =========================================================
+
+async def create_patient(db: AsyncSession, patient: schemas.PatientCreate) -> models.Patient:
+    return await _write(db, crud.create_patient, patient)
+
+async def get_patients(db: AsyncSession, **filters) -> List[models.Patient]:
+    """Run `crud.select_patients(**filters)`."""
+    return list(await db.scalars(crud.select_patients(**filters)))
+
+async def get_patient_rows(db: AsyncSession, **filters) -> List[Row]:
+    """Run `crud.select_patients(**filters)` for the `schemas.Patient` columns only."""
+    query = crud.select_patients(**filters).with_only_columns(*schema_columns(models.Patient, schemas.Patient))
+    return list(await db.execute(query))
+
+async def get_patient(db: AsyncSession, patient_id: int) -> Optional[models.Patient]:
+    return await db.get(models.Patient, patient_id)
+
+async def update_patient(db: AsyncSession, patient_id: int, patient: schemas.PatientUpdate) -> Optional[models.Patient]:
+    return await _write(db, crud.update_patient, patient_id, patient)
+
+async def delete_patient(db: AsyncSession, patient_id: int) -> bool:
+    return await _write(db, crud.delete_patient, patient_id)
+
+# =========================================================
+# Doctors
+# =========================================================
+
+async def create_doctor(db: AsyncSession, doctor: schemas.DoctorCreate) -> models.Doctor:
+    return await _write(db, crud.create_doctor, doctor)
+
+async def get_doctors(db: AsyncSession, **filters) -> List[models.Doctor]:
+    """Run `crud.select_doctors(**filters)`."""
+    return list(await db.scalars(crud.select_doctors(**filters)))
+
+async def get_doctor_rows(db: AsyncSession, **filters) -> List[Row]:
+    """Run `crud.select_doctors(**filters)` for the `schemas.Doctor` columns only."""
+    query = crud.select_doctors(**filters).with_only_columns(*schema_columns(models.Doctor, schemas.Doctor))
+    return list(await db.execute(query))
+
+async def get_doctor(db: AsyncSession, doctor_id: int) -> Optional[models.Doctor]:
+    return await db.get(models.Doctor, doctor_id)
+
+async def update_doctor(db: AsyncSession, doctor_id: int, doctor: schemas.DoctorUpdate) -> Optional[models.Doctor]:
+    return await _write(db, crud.update_doctor, doctor_id, doctor)
+
+async def delete_doctor(db: AsyncSession, doctor_id: int) -> bool:
+    return await _write(db, crud.delete_doctor, doctor_id)
+
+async def get_working_hours(db: AsyncSession, doctor_id: int) -> List[models.DoctorWorkingHours]:
+    """Run `crud.select_working_hours(doctor_id)`."""
+    return list(await db.scalars(crud.select_working_hours(doctor_id)))
+
+async def set_working_hours(
+    db: AsyncSession, doctor_id: int, schedule: schemas.WorkingHoursUpdate
+) -> Optional[List[models.DoctorWorkingHours]]:
+    return await _write(db, crud.set_working_hours, doctor_id, schedule)
+
+# =========================================================
+# Appointments
+# =========================================================
+
+async def create_appointment(db: AsyncSession, appointment: schemas.AppointmentCreate) -> models.Appointment:
+    return await _write(db, crud.create_appointment, appointment)
+
+async def get_appointments(db: AsyncSession, **filters) -> List[models.Appointment]:
+    """Run `crud.select_appointments(**filters)`."""
+    return list(await db.scalars(crud.select_appointments(**filters)))
+
+async def get_appointment_rows(db: AsyncSession, **filters) -> List[Row]:
+    """Run `crud.select_appointments(**filters)` for the `schemas.Appointment` columns only."""
+    query = crud.select_appointments(**filters).with_only_columns(*schema_columns(models.Appointment, schemas.Appointment))
+    return list(await db.execute(query))
+
+async def get_appointment(db: AsyncSession, appointment_id: int) -> Optional[models.Appointment]:
+    return await db.get(models.Appointment, appointment_id)
+
+async def get_patient_timeline(db: AsyncSession, patient_id: int, **window) -> Optional[models.Patient]:
+    """Run `crud.select_patient_timeline(patient_id, **window)`."""
+    return (await db.scalars(crud.select_patient_timeline(patient_id, **window))).first()
+
+async def update_appointment(
+    db: AsyncSession, appointment_id: int, appointment: schemas.AppointmentUpdate
+) -> Optional[models.Appointment]:
+    return await _write(db, crud.update_appointment, appointment_id, appointment)
+
+async def delete_appointment(db: AsyncSession, appointment_id: int) -> bool:
+    return await _write(db, crud.delete_appointment, appointment_id)
+
+# =========================================================
+# NLP results and batch jobs
+# =========================================================
+
+async def get_nlp_results(db: AsyncSession, **filters) -> List[models.NLPResult]:
+    """Run `crud.select_nlp_results(**filters)`."""
+    return list(await db.scalars(crud.select_nlp_results(**filters)))
+
+async def get_appointment_notes(db: AsyncSession, **filters) -> List[Tuple[int, str]]:
+    """Run `crud.select_appointment_notes(**filters)`."""
+    return [tuple(row) for row in await db.execute(crud.select_appointment_notes(**filters))]
+
+async def create_nlp_job(db: AsyncSession, items: List[Dict]) -> models.NLPJob:
+    return await _write(db, crud.create_nlp_job, items)
+
+async def get_nlp_job(db: AsyncSession, job_id: int) -> Optional[models.NLPJob]:
+    return await db.get(models.NLPJob, job_id)
+
+async def get_nlp_job_items(db: AsyncSession, job_id: int, **filters) -> List[models.NLPJobItem]:
+    """Run `crud.select_nlp_job_items(job_id, **filters)`."""
+    return list(await db.scalars(crud.select_nlp_job_items(job_id, **filters)))
+
+# =========================================================
+# Change feed
+# =========================================================
+
+async def get_current_version(db: AsyncSession) -> int:
+    newest, _ = (await db.execute(changes.select_versions())).one()
+    return newest or 0
+
+async def get_changes(
+    db: AsyncSession, since: int, entity: Optional[str] = None, limit: int = 500
+) -> Optional[schemas.ChangePage]:
+    """
+    The latest change per entity among the next `limit` log entries after
+    `since`, with the changed rows' current columns. None when the log no
+    longer reaches back to `since`, so the client has to reload its lists.
+    ValueError when `since` is ahead of the newest version.
+    """
+    newest, oldest = (await db.execute(changes.select_versions())).one()
+    if changes.is_ahead(since, newest):
+        raise ValueError(f"No version {since} yet: the change log is at version {newest or 0}")
+    if not changes.is_available(since, newest, oldest):
+        return None
+    log = list(await db.execute(changes.select_log(since, newest or 0, entity, limit)))
+    latest = changes.latest_changes(log)
+
+    upserted: Dict[str, List[int]] = {}
+    for entry in latest:
+        if entry.op == changes.UPSERT:
+            upserted.setdefault(entry.entity, []).append(entry.entity_id)
+    current: Dict[Tuple[str, int], dict] = {}
+    for name, ids in upserted.items():
+        for i in range(0, len(ids), changes.IN_CHUNK):
+            for row in await db.execute(changes.select_entities(name, ids[i:i + changes.IN_CHUNK])):
+                current[name, row.id] = row._asdict()
+
+    page = []
+    for entry in latest:
+        data = current.get((entry.entity, entry.entity_id))
+        # An upserted row that is gone was deleted after this page; that delete comes later
+        op = entry.op if data is not None else changes.DELETE
+        page.append(schemas.Change(version=entry.version, entity=entry.entity, id=entry.entity_id, op=op, data=data))
+    more = len(log) == limit
+    return schemas.ChangePage(version=log[-1].version if more else newest or 0, changes=page, more=more)
@@ -0,0 +1,207 @@
+"""
+Bulk CSV / NDJSON import and streaming export shared by the patient, doctor
+and appointment routers.
+
+Imports read the request body incrementally, validate each record with the
+entity's `schemas.*Create` model and hand valid rows to a crud bulk function
+in batches of IMPORT_BATCH_SIZE, one transaction per batch. Exports page
+through the table by primary key with Core selects, so memory stays flat
+however large the table is.
+"""
+import codecs
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple, Type
+
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db import database, schemas
+
+IMPORT_BATCH_SIZE = 5000
+EXPORT_BATCH_SIZE = 2000
+MAX_REPORTED_ERRORS = 1000
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+InsertBatch = Callable[[Session, List[Dict]], Dict[int, List[str]]]
+
+
+def body_format(request: Request, format: Optional[str]) -> str:
+    """The explicit `format`, else one inferred from the Content-Type header."""
+    if format:
+        return format
+    content_type = request.headers.get("content-type", "")
+    if "csv" in content_type:
+        return "csv"
+    if "json" in content_type:
+        return "ndjson"
+    raise HTTPException(
+        status_code=415, detail="Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson"
+    )
+
+# ---------------- Parsing ----------------
+async def _lines(request: Request) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in request.stream():
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+async def _records(request: Request, fmt: str) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield `(row number, record, parse error)` for every non-blank input record."""
+    row = 0
+    if fmt == "ndjson":
+        async for line in _lines(request):
+            if not line.strip():
+                continue
+            row += 1
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield row, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield row, None, "Expected a JSON object"
+                continue
+            yield row, record, None
+        return
+
+    header: Optional[List[str]] = None
+    buffered: Optional[str] = None
+    async for line in _lines(request):
+        buffered = line if buffered is None else f"{buffered}\n{line}"
+        if buffered.count('"') % 2:
+            continue  # inside a quoted field that spans lines
+        text, buffered = buffered, None
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        # Empty cells mean "not provided", so optional fields fall back to their defaults
+        yield row, {name: value for name, value in zip(header, values) if value != ""}, None
+    if buffered is not None:
+        yield row + 1, None, "Unterminated quoted field"
+
+def _format_error(error: dict) -> str:
+    location = ".".join(str(part) for part in error["loc"])
+    return f"{location}: {error['msg']}" if location else error["msg"]
+
+# ---------------- Import ----------------
+class ImportReport:
+    def __init__(self):
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[schemas.BulkRowError] = []
+
+    def fail(self, row: int, errors: List[str]) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(schemas.BulkRowError(row=row, errors=errors))
+
+    def result(self) -> schemas.BulkImportResult:
+        return schemas.BulkImportResult(inserted=self.inserted, failed=self.failed, errors=self.errors)
+
+def _flush(insert_batch: InsertBatch, batch: List[Tuple[int, Dict]], report: ImportReport) -> None:
+    rows = [data for _, data in batch]
+    with database.SessionLocal() as db:
+        try:
+            rejected = insert_batch(db, rows)
+        except Exception as e:
+            # e.g. a constraint violation: the whole batch was rolled back
+            db.rollback()
+            rejected = {i: [f"Batch rejected: {getattr(e, 'orig', e)}"] for i in range(len(rows))}
+    for i, (row, _) in enumerate(batch):
+        if i in rejected:
+            report.fail(row, rejected[i])
+        else:
+            report.inserted += 1
+
+async def import_rows(
+    request: Request, fmt: str, schema: Type[BaseModel], insert_batch: InsertBatch
+) -> schemas.BulkImportResult:
+    """
+    Validate and insert every record of the request body. Invalid rows are
+    reported and skipped; valid rows in the same batch are still inserted.
+    """
+    report = ImportReport()
+    batch: List[Tuple[int, Dict]] = []
+    try:
+        async for row, record, error in _records(request, fmt):
+            if error is not None:
+                report.fail(row, [error])
+                continue
+            try:
+                item = schema.model_validate(record)
+            except ValidationError as e:
+                report.fail(row, [_format_error(err) for err in e.errors()])
+                continue
+            batch.append((row, item.model_dump()))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await run_in_threadpool(_flush, insert_batch, batch, report)
+                batch = []
+        if batch:
+            await run_in_threadpool(_flush, insert_batch, batch, report)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Request body is not valid UTF-8")
+    return report.result()
+
+# ---------------- Export ----------------
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _export_chunks(model, columns: List[str], fmt: str) -> Iterator[str]:
+    """
+    Keyset batches over the primary key. Uses its own session because the
+    body is produced after the request dependencies have been torn down.
+    """
+    selected = [getattr(model, name) for name in columns]
+    db = database.SessionLocal()
+    try:
+        if fmt == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow(columns)
+            yield buffer.getvalue()
+        after = 0
+        while True:
+            rows = db.execute(
+                select(*selected).where(model.id > after).order_by(model.id).limit(EXPORT_BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            if fmt == "csv":
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows([_json_value(v) for v in row] for row in rows)
+                yield buffer.getvalue()
+            else:
+                yield "".join(
+                    json.dumps({name: _json_value(v) for name, v in zip(columns, row)}) + "\n" for row in rows
+                )
+            after = rows[-1][0]
+    finally:
+        db.close()
+
+def stream_export(model, schema: Type[BaseModel], fmt: str) -> StreamingResponse:
+    """Stream every row of `model` with `id` plus the fields of its create schema."""
+    columns = ["id", *schema.model_fields]
+    return StreamingResponse(
+        _export_chunks(model, columns, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{model.__tablename__}.{fmt}"'},
+    )
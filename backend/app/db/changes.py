@@ -0,0 +1,163 @@
+"""
+Change feed: a versioned log of patient, doctor and appointment changes.
+
+The crud create/update/delete functions and bulk imports log every change
+in the same transaction as the row change (`record`, `record_inserted`), so
+a version becomes visible exactly when its change does. Versions are the log's
+AUTOINCREMENT key, and they must commit in increasing order: readers ask for
+`version > since`, so a version that became visible after a higher one
+would be skipped for good. SQLite has a single writer, which gives that
+order. On PostgreSQL, writers may commit out of order, so logging a change
+takes a transaction-level advisory lock (`_serialize_versions`). It is held
+from the version's allocation to the commit. Those are the two databases
+the app runs on (database.ASYNC_DRIVERS).
+
+Clients keep their own copy of a list and apply deltas instead of
+refetching it (app/routers/changes.py):
+
+1. GET /changes/ for the current version
+2. load the list as usual
+3. GET /changes/?since=<version> for what changed since, or follow
+   GET /changes/stream, which pushes the same pages as Server-Sent Events
+
+A page holds the latest change per entity, with the entity's current
+columns for upserts, so applying pages in order converges on the table.
+
+Only the newest CHANGE_LOG_MAX_ROWS entries are kept (pruned at startup and
+by the command below); a client that fell further behind gets 410 Gone and
+reloads its lists. A `since` ahead of the newest version (from another
+database, or made up) is a 400:
+
+    python -m app.db.changes prune
+"""
+import argparse
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import DateTime, Row, Select, delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.db import models, schemas
+from app.db.responses import schema_columns
+
+MAX_ROWS = int(os.getenv("CHANGE_LOG_MAX_ROWS", "100000"))
+
+# ---------------- Entities and operations ----------------
+PATIENT = "patient"
+DOCTOR = "doctor"
+APPOINTMENT = "appointment"
+ENTITIES = {
+    PATIENT: (models.Patient, schemas.Patient),
+    DOCTOR: (models.Doctor, schemas.Doctor),
+    APPOINTMENT: (models.Appointment, schemas.Appointment),
+}
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+IN_CHUNK = 500  # ids per IN (...) when loading changed rows
+BULK_CHUNK = 2000  # ids per INSERT ... SELECT of a bulk import, well under SQLite's bound-parameter limit
+
+VERSION_LOCK_KEY = 0x43484C47  # PostgreSQL advisory lock id ("CHLG") ordering change log commits
+
+Log = models.ChangeLogEntry
+
+
+# ---------------- Written by crud ----------------
+def _serialize_versions(db: Session) -> None:
+    """
+    On PostgreSQL, wait for other transactions that logged changes to
+    commit or roll back before allocating versions. The lock is released
+    when this transaction ends, so versions commit in the order they were
+    allocated. SQLite's single writer already does this.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(select(func.pg_advisory_xact_lock(VERSION_LOCK_KEY)))
+
+def record(db: Session, entries: Iterable[Tuple[str, int, str]]) -> None:
+    """Log `(entity, id, op)` changes in the caller's transaction, with one executemany INSERT."""
+    rows = [{"entity": entity, "entity_id": entity_id, "op": op} for entity, entity_id, op in entries]
+    if rows:
+        _serialize_versions(db)
+        db.execute(insert(Log.__table__), rows)
+
+def record_inserted(db: Session, entity: str, ids: Sequence[int]) -> None:
+    """
+    Log the rows a bulk import inserted. INSERT ... SELECT keeps the per-row
+    work in the database; an executemany from Python would cost the import
+    about a third of its throughput.
+    """
+    model, _ = ENTITIES[entity]
+    now = literal(datetime.utcnow(), DateTime)
+    _serialize_versions(db)
+    for i in range(0, len(ids), BULK_CHUNK):
+        db.execute(insert(Log).from_select(
+            ["entity", "entity_id", "op", "changed_at"],
+            select(literal(entity), model.id, literal(UPSERT), now).where(model.id.in_(ids[i:i + BULK_CHUNK])),
+        ))
+
+
+# ---------------- Read by the feed ----------------
+def select_versions() -> Select:
+    """
+    The newest and oldest retained versions (None for an empty log). Two
+    subqueries, because SQLite answers a lone MAX or MIN from the primary
+    key but scans the table for both in one SELECT.
+    """
+    return select(
+        select(Log.version).order_by(Log.version.desc()).limit(1).scalar_subquery(),
+        select(Log.version).order_by(Log.version).limit(1).scalar_subquery(),
+    )
+
+def select_log(since: int, until: int, entity: Optional[str], limit: int) -> Select:
+    """Log entries in `(since, until]`, oldest first."""
+    query = select(Log.version, Log.entity, Log.entity_id, Log.op).where(Log.version > since, Log.version <= until)
+    if entity is not None:
+        query = query.where(Log.entity == entity)
+    return query.order_by(Log.version).limit(limit)
+
+def select_entities(entity: str, ids: Sequence[int]) -> Select:
+    """The read-schema columns of the given rows, as the list endpoints return them."""
+    model, schema = ENTITIES[entity]
+    return select(*schema_columns(model, schema)).where(model.id.in_(ids))
+
+def latest_changes(log: Iterable[Row]) -> List[Row]:
+    """The last entry per entity, in version order."""
+    latest: Dict[Tuple[str, int], Row] = {}
+    for entry in log:
+        latest.pop((entry.entity, entry.entity_id), None)  # re-insert so dict order follows the latest version
+        latest[(entry.entity, entry.entity_id)] = entry
+    return list(latest.values())
+
+def is_ahead(since: int, newest: Optional[int]) -> bool:
+    """Whether `since` is newer than every logged version, so it was never handed out by this database."""
+    return since > (newest or 0)
+
+def is_available(since: int, newest: Optional[int], oldest: Optional[int]) -> bool:
+    """Whether the log still holds every change after `since` (which is not ahead of it)."""
+    return newest is None or since >= oldest - 1
+
+
+# ---------------- Retention ----------------
+def prune(db: Session, keep: int = MAX_ROWS) -> int:
+    """Delete all but the newest `keep` entries; returns how many were deleted."""
+    cutoff = db.execute(select(Log.version).order_by(Log.version.desc()).offset(keep).limit(1)).scalar()
+    if cutoff is None:
+        return 0
+    deleted = db.execute(delete(Log).where(Log.version <= cutoff)).rowcount
+    db.commit()
+    return deleted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the change feed log.")
+    parser.add_argument("command", choices=["prune"])
+    parser.add_argument("--keep", type=int, default=MAX_ROWS)
+    args = parser.parse_args()
+
+    from app.db.database import SessionLocal, init_db
+
+    init_db()
+    with SessionLocal() as session:
+        print(f"pruned change log: {prune(session, args.keep)} entries")
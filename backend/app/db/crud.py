@@ -1,47 +1,147 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional, Dict
+from sqlalchemy import Select, case, delete, insert, literal, select, tuple_, update
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import List, Optional, Dict, Tuple
 from fastapi import HTTPException
 from datetime import datetime
-from app.db import models, schemas
+import json
+import os
+from app.db import changes, models, rollups, scheduling, schemas
+from app.services.change_feed import change_notifier
+from app.services.dashboard_cache import dashboard_cache
+
+# =========================================================
+# Write helpers
+# =========================================================
+# Writes go straight to SQL: INSERT/UPDATE ... RETURNING hand back the row
+# without a follow-up SELECT, and UPDATE/DELETE target the primary key
+# without loading the object first. tests/test_query_counts.py keeps the
+# per-endpoint statement counts in check.
+
+def _returning(db: Session, stmt, model):
+    """
+    Run an INSERT/UPDATE ... RETURNING `model` and detach the instance, so
+    the commit that follows does not expire it (which would cost a reload).
+    """
+    obj = db.scalars(stmt.returning(model)).first()
+    if obj is not None:
+        db.expunge(obj)
+    return obj
+
+def _update_by_id(model, id: int, values: Dict):
+    return update(model).where(model.id == id).values(**values).execution_options(synchronize_session=False)
+
+def _insert_many(db: Session, model, rows: List[Dict]) -> List[int]:
+    """
+    Insert many rows as multi-row INSERT statements (~1000 rows each; RETURNING
+    makes SQLAlchemy batch an executemany this way) and return the new ids.
+    The full-text search triggers (app/db/search.py) flush the FTS5 index once
+    per statement, so one statement per row would be several times slower.
+    """
+    # The Core table, not the ORM entity: ORM bulk inserts split the rows
+    # into a separate statement whenever the set of NULL columns changes
+    table = model.__table__
+    return list(db.execute(insert(table).returning(table.c.id), rows).scalars())
+
+def _delete_where(model, *criteria):
+    return delete(model).where(*criteria).execution_options(synchronize_session=False)
+
+def _commit(db: Session) -> None:
+    """
+    Commit a patient, doctor or appointment change (logged with
+    `changes.record`), then drop cached dashboards and wake change feed
+    subscribers.
+    """
+    db.commit()
+    dashboard_cache.invalidate()
+    change_notifier.notify()
+
+def _exists(model, id: Optional[int]):
+    """EXISTS for one id; None (field not being changed) always passes, 0 is checked like any id."""
+    if id is None:
+        return literal(True)
+    return select(model.id).where(model.id == id).exists()
 
 # =========================================================
 # CRUD operations for Patients
 # =========================================================
+# List queries are built by `select_*` functions so the async variants in
+# app/db/async_crud.py run exactly the same SQL.
 
 def create_patient(db: Session, patient: schemas.PatientCreate) -> models.Patient:
-    db_patient = models.Patient(
-        name=patient.name,
-        age=patient.age,
-        gender=patient.gender,
-        allergies=patient.allergies,
-    )
-    db.add(db_patient)
-    db.commit()
-    db.refresh(db_patient)
+    db_patient = _returning(db, insert(models.Patient).values(**patient.dict()), models.Patient)
+    rollups.apply_patient(db, db_patient.gender, 1)
+    changes.record(db, [(changes.PATIENT, db_patient.id, changes.UPSERT)])
+    _commit(db)
     return db_patient
 
-def get_patients(db: Session, skip: int = 0, limit: int = 100) -> List[models.Patient]:
-    return db.query(models.Patient).offset(skip).limit(limit).all()
+def select_patients(
+    skip: int = 0,
+    limit: int = 100,
+    name: Optional[str] = None,
+    age: Optional[int] = None,
+    after: Optional[int] = None,
+    keyset: bool = False,
+) -> Select:
+    """
+    List patients. In keyset mode rows are ordered by `id` and, when
+    `after` is given, seek past that id instead of using OFFSET.
+    """
+    query = select(models.Patient)
+    if name:
+        query = query.where(models.Patient.name.icontains(name, autoescape=True))
+    if age is not None:
+        query = query.where(models.Patient.age == age)
+    if keyset or after is not None:
+        if after is not None:
+            query = query.where(models.Patient.id > after)
+        return query.order_by(models.Patient.id).limit(limit)
+    return query.offset(skip).limit(limit)
+
+def get_patients(db: Session, **filters) -> List[models.Patient]:
+    """Run `select_patients(**filters)`."""
+    return list(db.scalars(select_patients(**filters)))
 
 def get_patient(db: Session, patient_id: int) -> Optional[models.Patient]:
     return db.query(models.Patient).filter(models.Patient.id == patient_id).first()
 
 def update_patient(db: Session, patient_id: int, patient: schemas.PatientUpdate) -> Optional[models.Patient]:
-    db_patient = db.query(models.Patient).filter(models.Patient.id == patient_id).first()
+    values = patient.dict(exclude_unset=True)
+    if not values:
+        return get_patient(db, patient_id)
+    # Gender has a dashboard counter, so only a gender change reads the old value
+    old_gender = None
+    if "gender" in values:
+        old_gender = db.execute(select(models.Patient.gender).where(models.Patient.id == patient_id)).scalar()
+        if old_gender is None:
+            return None
+    db_patient = _returning(db, _update_by_id(models.Patient, patient_id, values), models.Patient)
     if not db_patient:
         return None
-    for field, value in patient.dict(exclude_unset=True).items():
-        setattr(db_patient, field, value)
-    db.commit()
-    db.refresh(db_patient)
+    if old_gender is not None:
+        rollups.rename_key(db, rollups.PATIENTS_BY_GENDER, old_gender, db_patient.gender)
+    changes.record(db, [(changes.PATIENT, patient_id, changes.UPSERT)])
+    _commit(db)
     return db_patient
 
 def delete_patient(db: Session, patient_id: int) -> bool:
-    db_patient = db.query(models.Patient).filter(models.Patient.id == patient_id).first()
-    if not db_patient:
+    # The patient's appointments go too; they are deleted first so foreign
+    # keys never see an orphan, and their counters are removed in one batch
+    Appointment = models.Appointment
+    removed = db.execute(
+        _delete_where(Appointment, Appointment.patient_id == patient_id)
+        .returning(Appointment.id, Appointment.patient_id, Appointment.doctor_id, Appointment.date)
+    ).all()
+    gender = db.execute(
+        _delete_where(models.Patient, models.Patient.id == patient_id).returning(models.Patient.gender)
+    ).scalar()
+    if gender is None:
+        db.rollback()
         return False
-    db.delete(db_patient)
-    db.commit()
+    rollups.apply_appointments(db, (row[1:] for row in removed), -1)
+    rollups.apply_patient(db, gender, -1)
+    changes.record(db, [(changes.APPOINTMENT, row.id, changes.DELETE) for row in removed]
+                   + [(changes.PATIENT, patient_id, changes.DELETE)])
+    _commit(db)
     return True
 
 # =========================================================
@@ -49,135 +149,513 @@ def delete_patient(db: Session, patient_id: int) -> bool:
 # =========================================================
 
 def create_doctor(db: Session, doctor: schemas.DoctorCreate) -> models.Doctor:
-    db_doctor = models.Doctor(
-        name=doctor.name,
-        specialty=doctor.specialty,
-        contact=doctor.contact,
-    )
-    db.add(db_doctor)
-    db.commit()
-    db.refresh(db_doctor)
+    db_doctor = _returning(db, insert(models.Doctor).values(**doctor.dict()), models.Doctor)
+    rollups.apply_doctor(db, db_doctor.specialty, 1)
+    changes.record(db, [(changes.DOCTOR, db_doctor.id, changes.UPSERT)])
+    _commit(db)
     return db_doctor
 
-def get_doctors(db: Session, skip: int = 0, limit: int = 100) -> List[models.Doctor]:
-    return db.query(models.Doctor).offset(skip).limit(limit).all()
+def select_doctors(
+    skip: int = 0,
+    limit: int = 100,
+    name: Optional[str] = None,
+    specialty: Optional[str] = None,
+    after: Optional[int] = None,
+    keyset: bool = False,
+) -> Select:
+    """
+    List doctors. In keyset mode rows are ordered by `id` and, when
+    `after` is given, seek past that id instead of using OFFSET.
+    """
+    query = select(models.Doctor)
+    if name:
+        query = query.where(models.Doctor.name.icontains(name, autoescape=True))
+    if specialty:
+        query = query.where(models.Doctor.specialty.icontains(specialty, autoescape=True))
+    if keyset or after is not None:
+        if after is not None:
+            query = query.where(models.Doctor.id > after)
+        return query.order_by(models.Doctor.id).limit(limit)
+    return query.offset(skip).limit(limit)
+
+def get_doctors(db: Session, **filters) -> List[models.Doctor]:
+    """Run `select_doctors(**filters)`."""
+    return list(db.scalars(select_doctors(**filters)))
 
 def get_doctor(db: Session, doctor_id: int) -> Optional[models.Doctor]:
     return db.query(models.Doctor).filter(models.Doctor.id == doctor_id).first()
 
 def update_doctor(db: Session, doctor_id: int, doctor: schemas.DoctorUpdate) -> Optional[models.Doctor]:
-    db_doctor = db.query(models.Doctor).filter(models.Doctor.id == doctor_id).first()
+    values = doctor.dict(exclude_unset=True)
+    if not values:
+        return get_doctor(db, doctor_id)
+    # Specialty has a dashboard counter, so only a specialty change reads the old value
+    old_specialty = None
+    if "specialty" in values:
+        old_specialty = db.execute(select(models.Doctor.specialty).where(models.Doctor.id == doctor_id)).scalar()
+        if old_specialty is None:
+            return None
+    db_doctor = _returning(db, _update_by_id(models.Doctor, doctor_id, values), models.Doctor)
     if not db_doctor:
         return None
-    for field, value in doctor.dict(exclude_unset=True).items():
-        setattr(db_doctor, field, value)
-    db.commit()
-    db.refresh(db_doctor)
+    if old_specialty is not None:
+        rollups.rename_key(db, rollups.DOCTORS_BY_SPECIALTY, old_specialty, db_doctor.specialty)
+    changes.record(db, [(changes.DOCTOR, doctor_id, changes.UPSERT)])
+    _commit(db)
     return db_doctor
 
 def delete_doctor(db: Session, doctor_id: int) -> bool:
-    db_doctor = db.query(models.Doctor).filter(models.Doctor.id == doctor_id).first()
-    if not db_doctor:
+    Appointment = models.Appointment
+    removed = db.execute(
+        _delete_where(Appointment, Appointment.doctor_id == doctor_id)
+        .returning(Appointment.id, Appointment.patient_id, Appointment.doctor_id, Appointment.date)
+    ).all()
+    Hours = models.DoctorWorkingHours
+    db.execute(_delete_where(Hours, Hours.doctor_id == doctor_id))
+    specialty = db.execute(
+        _delete_where(models.Doctor, models.Doctor.id == doctor_id).returning(models.Doctor.specialty)
+    ).scalar()
+    if specialty is None:
+        db.rollback()
         return False
-    db.delete(db_doctor)
-    db.commit()
+    rollups.apply_appointments(db, (row[1:] for row in removed), -1)
+    rollups.apply_doctor(db, specialty, -1)
+    changes.record(db, [(changes.APPOINTMENT, row.id, changes.DELETE) for row in removed]
+                   + [(changes.DOCTOR, doctor_id, changes.DELETE)])
+    _commit(db)
     return True
 
+def select_working_hours(doctor_id: int) -> Select:
+    Hours = models.DoctorWorkingHours
+    return select(Hours).where(Hours.doctor_id == doctor_id).order_by(Hours.weekday, Hours.start_time)
+
+def set_working_hours(
+    db: Session, doctor_id: int, schedule: schemas.WorkingHoursUpdate
+) -> Optional[List[models.DoctorWorkingHours]]:
+    """Replace a doctor's weekly working hours; None if the doctor does not exist."""
+    if not db.execute(select(_exists(models.Doctor, doctor_id))).scalar():
+        return None
+    Hours = models.DoctorWorkingHours
+    db.execute(_delete_where(Hours, Hours.doctor_id == doctor_id))
+    if schedule.hours:
+        db.execute(insert(Hours), [dict(hours.dict(), doctor_id=doctor_id) for hours in schedule.hours])
+    db.commit()
+    return list(db.scalars(select_working_hours(doctor_id)))
+
 # =========================================================
 # CRUD operations for Appointments
 # =========================================================
 
-def create_appointment(db: Session, appointment: schemas.AppointmentCreate) -> models.Appointment:
-    if not db.query(models.Patient).filter(models.Patient.id == appointment.patient_id).first():
+def _check_references(patient_exists: bool, doctor_exists: bool) -> None:
+    if not patient_exists:
         raise HTTPException(status_code=404, detail="Patient not found")
-    if not db.query(models.Doctor).filter(models.Doctor.id == appointment.doctor_id).first():
+    if not doctor_exists:
         raise HTTPException(status_code=404, detail="Doctor not found")
 
-    db_appointment = models.Appointment(
-        patient_id=appointment.patient_id,
-        doctor_id=appointment.doctor_id,
-        date=appointment.date,
-        notes=appointment.notes,
-    )
-    db.add(db_appointment)
-    db.commit()
-    db.refresh(db_appointment)
+def _check_schedule(
+    db: Session, doctor_id: int, start: datetime, minutes: int, appointment_id: Optional[int] = None
+) -> None:
+    scheduling.lock_schedule(db, doctor_id)
+    conflict = scheduling.find_conflict(db, doctor_id, start, minutes, exclude_id=appointment_id)
+    if conflict is not None:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Doctor already booked: appointment {conflict.id} at {conflict.date.isoformat()} "
+                   f"for {conflict.duration_minutes} minutes",
+        )
+
+def create_appointment(db: Session, appointment: schemas.AppointmentCreate) -> models.Appointment:
+    # Both references are checked in one round trip
+    _check_references(*db.execute(select(
+        _exists(models.Patient, appointment.patient_id), _exists(models.Doctor, appointment.doctor_id)
+    )).one())
+    _check_schedule(db, appointment.doctor_id, appointment.date, appointment.duration_minutes)
+
+    db_appointment = _returning(db, insert(models.Appointment).values(**appointment.dict()), models.Appointment)
+    rollups.apply_appointment(db, db_appointment.patient_id, db_appointment.doctor_id, db_appointment.date, 1)
+    changes.record(db, [(changes.APPOINTMENT, db_appointment.id, changes.UPSERT)])
+    _commit(db)
     return db_appointment
 
-def get_appointments(db: Session, skip: int = 0, limit: int = 100) -> List[models.Appointment]:
-    return db.query(models.Appointment).offset(skip).limit(limit).all()
+def select_appointments(
+    skip: int = 0,
+    limit: int = 100,
+    patient_id: Optional[int] = None,
+    doctor_id: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    keyset: bool = False,
+) -> Select:
+    """
+    List appointments. In keyset mode rows are ordered by `(date, id)` and,
+    when `after` is given, seek past that key instead of using OFFSET.
+    """
+    query = select(models.Appointment)
+    if patient_id is not None:
+        query = query.where(models.Appointment.patient_id == patient_id)
+    if doctor_id is not None:
+        query = query.where(models.Appointment.doctor_id == doctor_id)
+    if keyset or after is not None:
+        if after is not None:
+            query = query.where(tuple_(models.Appointment.date, models.Appointment.id) > tuple_(*after))
+        return query.order_by(models.Appointment.date, models.Appointment.id).limit(limit)
+    return query.offset(skip).limit(limit)
+
+def get_appointments(db: Session, **filters) -> List[models.Appointment]:
+    """Run `select_appointments(**filters)`."""
+    return list(db.scalars(select_appointments(**filters)))
+
+def select_patient_timeline(
+    patient_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Select:
+    """
+    One patient with their appointments (optionally within a `[start, end)`
+    date window) in date order, each with its doctor and completed NLP
+    results. Eager loading keeps it at three statements however many
+    appointments there are: the patient, the appointments joined to their
+    doctors, and the NLP results of all of them.
+    """
+    Appointment = models.Appointment
+    window = []
+    if start is not None:
+        window.append(Appointment.date >= start)
+    if end is not None:
+        window.append(Appointment.date < end)
+    appointments = models.Patient.appointments.and_(*window) if window else models.Patient.appointments
+    return select(models.Patient).where(models.Patient.id == patient_id).options(
+        selectinload(appointments).options(
+            joinedload(Appointment.doctor, innerjoin=True),
+            selectinload(Appointment.nlp_results),
+        )
+    )
+
+def get_patient_timeline(db: Session, patient_id: int, **window) -> Optional[models.Patient]:
+    """Run `select_patient_timeline(patient_id, **window)`."""
+    return db.scalars(select_patient_timeline(patient_id, **window)).first()
 
 def get_appointment(db: Session, appointment_id: int) -> Optional[models.Appointment]:
     return db.query(models.Appointment).filter(models.Appointment.id == appointment_id).first()
 
 def update_appointment(db: Session, appointment_id: int, appointment: schemas.AppointmentUpdate) -> Optional[models.Appointment]:
-    db_appointment = db.query(models.Appointment).filter(models.Appointment.id == appointment_id).first()
-    if not db_appointment:
-        return None
+    values = appointment.dict(exclude_unset=True)
+    if not values:
+        return get_appointment(db, appointment_id)
 
-    if appointment.patient_id and not db.query(models.Patient).filter(models.Patient.id == appointment.patient_id).first():
-        raise HTTPException(status_code=404, detail="Patient not found")
-    if appointment.doctor_id and not db.query(models.Doctor).filter(models.Doctor.id == appointment.doctor_id).first():
-        raise HTTPException(status_code=404, detail="Doctor not found")
+    # Changing a counted or scheduled field needs the old values; they are read
+    # together with the existence checks for any new patient/doctor in one query
+    Appointment = models.Appointment
+    old = None
+    if values.keys() & {"patient_id", "doctor_id", "date", "duration_minutes"}:
+        row = db.execute(
+            select(
+                Appointment.patient_id, Appointment.doctor_id, Appointment.date, Appointment.duration_minutes,
+                _exists(models.Patient, appointment.patient_id), _exists(models.Doctor, appointment.doctor_id),
+            ).where(Appointment.id == appointment_id)
+        ).first()
+        if row is None:
+            return None
+        _check_references(row[4], row[5])
+        old = tuple(row[:3])
+        if values.keys() & {"doctor_id", "date", "duration_minutes"}:
+            _check_schedule(
+                db,
+                values.get("doctor_id", row.doctor_id),
+                values.get("date", row.date),
+                values.get("duration_minutes", row.duration_minutes),
+                appointment_id,
+            )
 
-    for field, value in appointment.dict(exclude_unset=True).items():
-        setattr(db_appointment, field, value)
+    db_appointment = _returning(db, _update_by_id(Appointment, appointment_id, values), Appointment)
+    if not db_appointment:
+        return None
+    if old is not None:
+        rollups.move_appointment(db, old, (db_appointment.patient_id, db_appointment.doctor_id, db_appointment.date))
+    changes.record(db, [(changes.APPOINTMENT, appointment_id, changes.UPSERT)])
 
-    db.commit()
-    db.refresh(db_appointment)
+    _commit(db)
     return db_appointment
 
 def delete_appointment(db: Session, appointment_id: int) -> bool:
-    db_appointment = db.query(models.Appointment).filter(models.Appointment.id == appointment_id).first()
-    if not db_appointment:
+    Appointment = models.Appointment
+    removed = db.execute(
+        _delete_where(Appointment, Appointment.id == appointment_id)
+        .returning(Appointment.patient_id, Appointment.doctor_id, Appointment.date)
+    ).first()
+    if removed is None:
         return False
-    db.delete(db_appointment)
-    db.commit()
+    rollups.apply_appointment(db, *removed, -1)
+    changes.record(db, [(changes.APPOINTMENT, appointment_id, changes.DELETE)])
+    _commit(db)
     return True
 
+# =========================================================
+# Bulk operations (CSV / NDJSON import)
+# =========================================================
+# Each call is one transaction: rows are inserted with multi-row INSERTs
+# and the dashboard counters and change log are updated once for the whole batch. The
+# return value maps rejected row positions to their error messages.
+
+def bulk_create_patients(db: Session, rows: List[Dict]) -> Dict[int, List[str]]:
+    ids = _insert_many(db, models.Patient, rows)
+    rollups.add_counts(db, rollups.patient_counts(rows))
+    changes.record_inserted(db, changes.PATIENT, ids)
+    _commit(db)
+    return {}
+
+def bulk_create_doctors(db: Session, rows: List[Dict]) -> Dict[int, List[str]]:
+    ids = _insert_many(db, models.Doctor, rows)
+    rollups.add_counts(db, rollups.doctor_counts(rows))
+    changes.record_inserted(db, changes.DOCTOR, ids)
+    _commit(db)
+    return {}
+
+def _existing_ids(db: Session, model, ids: set) -> set:
+    ids = list(ids)
+    found = set()
+    for i in range(0, len(ids), 500):
+        found.update(db.execute(select(model.id).where(model.id.in_(ids[i:i + 500]))).scalars())
+    return found
+
+def bulk_create_appointments(db: Session, rows: List[Dict]) -> Dict[int, List[str]]:
+    """
+    Referenced patients and doctors are checked with one IN query per 500 ids, not per row.
+    Double bookings are not checked: imports load existing schedules as they are.
+    """
+    patients = _existing_ids(db, models.Patient, {row["patient_id"] for row in rows})
+    doctors = _existing_ids(db, models.Doctor, {row["doctor_id"] for row in rows})
+
+    rejected: Dict[int, List[str]] = {}
+    valid = []
+    for i, row in enumerate(rows):
+        errors = []
+        if row["patient_id"] not in patients:
+            errors.append(f"Patient {row['patient_id']} not found")
+        if row["doctor_id"] not in doctors:
+            errors.append(f"Doctor {row['doctor_id']} not found")
+        if errors:
+            rejected[i] = errors
+        else:
+            valid.append(row)
+
+    if valid:
+        ids = _insert_many(db, models.Appointment, valid)
+        rollups.apply_appointments(db, ((row["patient_id"], row["doctor_id"], row["date"]) for row in valid), 1)
+        changes.record_inserted(db, changes.APPOINTMENT, ids)
+        _commit(db)
+    return rejected
+
+# =========================================================
+# CRUD operations for NLP Results
+# =========================================================
+
+def create_nlp_result(db: Session, task: str, input_text: str, result: str) -> models.NLPResult:
+    db_result = models.NLPResult(task=task, input_text=input_text, result=result)
+    db.add(db_result)
+    db.commit()
+    return db_result
+
+def select_nlp_results(
+    task: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    after: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> Select:
+    """
+    List NLP results oldest first, optionally filtered by task and a
+    `[start, end)` creation window. `after` seeks past a result id.
+    """
+    query = select(models.NLPResult)
+    if task:
+        query = query.where(models.NLPResult.task == task)
+    if start is not None:
+        query = query.where(models.NLPResult.created_at >= start)
+    if end is not None:
+        query = query.where(models.NLPResult.created_at < end)
+    if after is not None:
+        query = query.where(models.NLPResult.id > after)
+    query = query.order_by(models.NLPResult.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+def get_nlp_results(db: Session, **filters) -> List[models.NLPResult]:
+    """Run `select_nlp_results(**filters)`."""
+    return list(db.scalars(select_nlp_results(**filters)))
+
+def import_legacy_nlp_results(db: Session, path: str) -> int:
+    """
+    One-time import of the old `nlp_results.json` file into the results table.
+    Skipped when the file is missing or the table already has rows.
+    """
+    if not os.path.exists(path) or db.query(models.NLPResult.id).first():
+        return 0
+    with open(path, "r", encoding="utf-8") as f:
+        items = json.load(f)
+    if items:
+        _insert_many(db, models.NLPResult, [
+            {"task": item["task"], "input_text": item["input_text"], "result": item["result"]} for item in items
+        ])
+    db.commit()
+    return len(items)
+
+# =========================================================
+# NLP Batch Jobs (persistent work queue)
+# =========================================================
+
+def create_nlp_job(db: Session, items: List[Dict]) -> models.NLPJob:
+    """Create a job and enqueue its items (`task`, `text`, optional `appointment_id`)."""
+    now = datetime.utcnow()
+    db_job = models.NLPJob(status="queued", total=len(items), created_at=now, updated_at=now)
+    db.add(db_job)
+    db.flush()
+    if items:
+        db.execute(insert(models.NLPJobItem), [
+            {
+                "job_id": db_job.id,
+                "task": item["task"],
+                "text": item["text"],
+                "appointment_id": item.get("appointment_id"),
+                "status": models.ITEM_PENDING,
+                "available_at": now,
+                "updated_at": now,
+            }
+            for item in items
+        ])
+    else:
+        db_job.status = "completed"
+    db.commit()
+    return db_job
+
+def select_appointment_notes(
+    patient_id: Optional[int] = None,
+    doctor_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Select:
+    """`(id, notes)` of appointments with non-empty notes matching the filters."""
+    query = select(models.Appointment.id, models.Appointment.notes).where(
+        models.Appointment.notes.isnot(None), models.Appointment.notes != ""
+    )
+    if patient_id is not None:
+        query = query.where(models.Appointment.patient_id == patient_id)
+    if doctor_id is not None:
+        query = query.where(models.Appointment.doctor_id == doctor_id)
+    if start is not None:
+        query = query.where(models.Appointment.date >= start)
+    if end is not None:
+        query = query.where(models.Appointment.date < end)
+    return query.order_by(models.Appointment.id)
+
+def get_appointment_notes(db: Session, **filters) -> List[Tuple[int, str]]:
+    """Run `select_appointment_notes(**filters)`."""
+    return [tuple(row) for row in db.execute(select_appointment_notes(**filters))]
+
+def get_nlp_job(db: Session, job_id: int) -> Optional[models.NLPJob]:
+    return db.get(models.NLPJob, job_id)
+
+def select_nlp_job_items(job_id: int, after: Optional[int] = None, limit: int = 100) -> Select:
+    query = select(models.NLPJobItem).where(models.NLPJobItem.job_id == job_id)
+    if after is not None:
+        query = query.where(models.NLPJobItem.id > after)
+    return query.order_by(models.NLPJobItem.id).limit(limit)
+
+def get_nlp_job_items(db: Session, job_id: int, **filters) -> List[models.NLPJobItem]:
+    """Run `select_nlp_job_items(job_id, **filters)`."""
+    return list(db.scalars(select_nlp_job_items(job_id, **filters)))
+
+def claim_nlp_job_item(db: Session) -> Optional[models.NLPJobItem]:
+    """
+    Atomically move the oldest available pending item to `running`. The outer
+    status check makes a lost race update nothing instead of double-claiming.
+    """
+    now = datetime.utcnow()
+    item = models.NLPJobItem
+    next_id = (
+        select(item.id)
+        .where(item.status == models.ITEM_PENDING, item.available_at <= now)
+        .order_by(item.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    row = db.execute(
+        update(item)
+        .where(item.id == next_id, item.status == models.ITEM_PENDING)
+        .values(status=models.ITEM_RUNNING, attempts=item.attempts + 1, updated_at=now)
+        .returning(item.id, item.job_id, item.task, item.text, item.attempts)
+    ).first()
+    if row is not None:
+        db.query(models.NLPJob).filter(
+            models.NLPJob.id == row.job_id, models.NLPJob.status == "queued"
+        ).update({"status": "running", "updated_at": now}, synchronize_session=False)
+    db.commit()
+    return row
+
+def _finish_nlp_job_item(db: Session, item_id: int, job_id: int, counter: str, **values) -> None:
+    now = datetime.utcnow()
+    db.query(models.NLPJobItem).filter(models.NLPJobItem.id == item_id).update(
+        dict(values, updated_at=now), synchronize_session=False
+    )
+    job = models.NLPJob
+    db.query(job).filter(job.id == job_id).update(
+        {counter: getattr(job, counter) + 1, "updated_at": now}, synchronize_session=False
+    )
+    # Last item out closes the job
+    db.query(job).filter(job.id == job_id, job.completed + job.failed >= job.total).update(
+        {"status": case((job.failed == 0, "completed"), else_="completed_with_errors")},
+        synchronize_session=False,
+    )
+    db.commit()
+
+def complete_nlp_job_item(db: Session, item_id: int, job_id: int, result: str) -> None:
+    _finish_nlp_job_item(db, item_id, job_id, "completed", status=models.ITEM_DONE, result=result, error=None)
+
+def fail_nlp_job_item(db: Session, item_id: int, job_id: int, error: str) -> None:
+    _finish_nlp_job_item(db, item_id, job_id, "failed", status=models.ITEM_FAILED, error=error)
+
+def retry_nlp_job_item(db: Session, item_id: int, error: str, available_at: datetime) -> None:
+    db.query(models.NLPJobItem).filter(models.NLPJobItem.id == item_id).update(
+        {"status": models.ITEM_PENDING, "error": error, "available_at": available_at, "updated_at": datetime.utcnow()},
+        synchronize_session=False,
+    )
+    db.commit()
+
+def requeue_running_nlp_job_items(db: Session) -> int:
+    """Return items left `running` by a previous process to the queue."""
+    count = db.query(models.NLPJobItem).filter(models.NLPJobItem.status == models.ITEM_RUNNING).update(
+        {"status": models.ITEM_PENDING, "updated_at": datetime.utcnow()}, synchronize_session=False
+    )
+    db.commit()
+    return count
+
 # =========================================================
 # Dashboard / Statistics Feature
 # =========================================================
 
 def get_dashboard_stats(db: Session) -> schemas.DashboardStats:
-    patients = db.query(models.Patient).all()
-    doctors = db.query(models.Doctor).all()
-    appointments = db.query(models.Appointment).all()
-
-    # Patients by gender
-    patients_by_gender: Dict[str, int] = {}
-    for p in patients:
-        patients_by_gender[p.gender] = patients_by_gender.get(p.gender, 0) + 1
-
-    # Doctors by specialty
-    doctors_by_specialty: Dict[str, int] = {}
-    for d in doctors:
-        doctors_by_specialty[d.specialty] = doctors_by_specialty.get(d.specialty, 0) + 1
-
-    # Appointments by doctor and patient
-    appointments_by_doctor: Dict[int, int] = {}
-    appointments_by_patient: Dict[int, int] = {}
-
-    now = datetime.now()
-    upcoming_appointments = 0
-    past_appointments = 0
-
-    for a in appointments:
-        appointments_by_doctor[a.doctor_id] = appointments_by_doctor.get(a.doctor_id, 0) + 1
-        appointments_by_patient[a.patient_id] = appointments_by_patient.get(a.patient_id, 0) + 1
-        if a.date > now:
-            upcoming_appointments += 1
-        else:
-            past_appointments += 1
+    """Read the dashboard from the rollup counters (app/db/rollups.py), not the base tables."""
+    stats = rollups.read(
+        db,
+        rollups.TOTALS,
+        rollups.PATIENTS_BY_GENDER,
+        rollups.DOCTORS_BY_SPECIALTY,
+        rollups.APPOINTMENTS_BY_DOCTOR,
+        rollups.APPOINTMENTS_BY_PATIENT,
+        rollups.APPOINTMENTS_BY_DAY,
+    )
+    totals = stats[rollups.TOTALS]
+    total_appointments = totals.get("appointments", 0)
+    upcoming_appointments = rollups.upcoming_appointments(db, stats[rollups.APPOINTMENTS_BY_DAY])
 
     return schemas.DashboardStats(
-        total_patients=len(patients),
-        patients_by_gender=patients_by_gender,
-        total_doctors=len(doctors),
-        doctors_by_specialty=doctors_by_specialty,
-        total_appointments=len(appointments),
-        appointments_by_doctor=appointments_by_doctor,
-        appointments_by_patient=appointments_by_patient,
+        total_patients=totals.get("patients", 0),
+        patients_by_gender=stats[rollups.PATIENTS_BY_GENDER],
+        total_doctors=totals.get("doctors", 0),
+        doctors_by_specialty=stats[rollups.DOCTORS_BY_SPECIALTY],
+        total_appointments=total_appointments,
+        appointments_by_doctor={int(k): v for k, v in stats[rollups.APPOINTMENTS_BY_DOCTOR].items()},
+        appointments_by_patient={int(k): v for k, v in stats[rollups.APPOINTMENTS_BY_PATIENT].items()},
         upcoming_appointments=upcoming_appointments,
-        past_appointments=past_appointments
+        past_appointments=total_appointments - upcoming_appointments
     )
@@ -1,12 +1,242 @@
-from sqlalchemy import create_engine
+import asyncio
+import contextlib
+import os
+import threading
+import weakref
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateColumn
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./emr.db"
+# =========================================================
+# Engine configuration (environment)
+# =========================================================
+# DATABASE_URL            any SQLAlchemy URL, e.g. postgresql+psycopg2://user:pw@host/emr;
+#                         defaults to emr.db next to the app, independent of the CWD.
+#                         The async engine swaps in the asyncio driver (ASYNC_DRIVERS).
+# DB_POOL_SIZE            persistent connections kept in the pool (default 10)
+# DB_MAX_OVERFLOW         extra connections allowed under burst (default 20)
+# DB_POOL_TIMEOUT         seconds to wait for a free connection (default 30)
+# DB_POOL_RECYCLE         reconnect connections older than this many seconds (default -1, never)
+#
+# SQLite only, applied as PRAGMAs on every new connection (empty value = leave the default):
+# SQLITE_JOURNAL_MODE     default WAL: readers no longer block the writer and vice versa
+# SQLITE_SYNCHRONOUS      default NORMAL: durable in WAL mode, without an fsync per commit
+# SQLITE_BUSY_TIMEOUT_MS  default 5000: wait for the write lock instead of "database is locked"
+# SQLITE_MMAP_SIZE        default 268435456 (256 MiB) of memory-mapped reads
+# SQLITE_CACHE_SIZE       default -65536 (64 MiB page cache; negative values are KiB)
+# SQLITE_FOREIGN_KEYS     default ON: enforce the models' foreign keys
+# SQLITE_WRITE_LOCK       default 1: queue this process's writers on a lock (see _serialize_writes)
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+SQLALCHEMY_DATABASE_URL = os.getenv(
+    "DATABASE_URL", "sqlite:///" + os.path.join(BACKEND_DIR, "emr.db")
 )
+
+
+def sqlite_pragmas_from_env() -> Dict[str, str]:
+    return {
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"),
+        "mmap_size": os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+        "cache_size": os.getenv("SQLITE_CACHE_SIZE", "-65536"),
+        "foreign_keys": os.getenv("SQLITE_FOREIGN_KEYS", "ON"),
+    }
+
+
+def _pool_options(url: str, kwargs: dict) -> dict:
+    """Pool settings from the environment, overridden by `kwargs`."""
+    options = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "-1")),
+    }
+    options.update(kwargs)
+    if _in_memory(url):
+        # In-memory databases live in a single connection, so no pool sizing
+        return {}
+    if not url.startswith("sqlite"):
+        options["pool_pre_ping"] = True
+    return options
+
+
+def _in_memory(url: str) -> bool:
+    return url.split("://", 1)[1] in ("", "/:memory:")
+
+
+def _sqlite_setup(sync_engine, url: str, pragmas: Dict[str, str], write_lock: Optional[bool]) -> None:
+    @event.listens_for(sync_engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    if write_lock is None:
+        write_lock = os.getenv("SQLITE_WRITE_LOCK", "1") == "1"
+    if write_lock and not _in_memory(url):
+        _serialize_writes(sync_engine, int(pragmas.get("busy_timeout", 5000)) / 1000)
+
+
+def _sqlite_options(pragmas: Optional[Dict[str, str]]) -> Tuple[Dict[str, str], dict]:
+    """Non-empty PRAGMAs (default: from the environment) and the matching connect args."""
+    pragmas = {name: value for name, value in (sqlite_pragmas_from_env() if pragmas is None else pragmas).items() if value}
+    connect_args = {
+        "check_same_thread": False,
+        # The driver's own lock wait, kept in step with busy_timeout
+        "timeout": int(pragmas.get("busy_timeout", 5000)) / 1000,
+    }
+    return pragmas, connect_args
+
+
+def make_engine(
+    url: str = SQLALCHEMY_DATABASE_URL,
+    pragmas: Optional[Dict[str, str]] = None,
+    write_lock: Optional[bool] = None,
+    **kwargs,
+):
+    """
+    Create an engine for `url` with the pool settings above (`kwargs`
+    override them). SQLite connections get `pragmas` and `write_lock`
+    (default: both from the environment).
+    """
+    options = _pool_options(url, kwargs)
+    if not url.startswith("sqlite"):
+        return create_engine(url, **options)
+
+    pragmas, connect_args = _sqlite_options(pragmas)
+    engine = create_engine(url, connect_args=connect_args, **options)
+    _sqlite_setup(engine, url, pragmas, write_lock)
+    return engine
+
+
+def _serialize_writes(engine, timeout: float) -> None:
+    """
+    SQLite allows one writer at a time. Writers that find the database locked
+    poll from the busy handler with growing sleeps, so under many threads the
+    unlucky ones keep losing to newcomers until they time out. Queuing this
+    process's write transactions on a lock instead hands the database over
+    without polling; the busy handler still arbitrates between processes.
+
+    The lock is taken before the first INSERT/UPDATE/DELETE of a transaction
+    (where the driver opens its write transaction) and released when it ends.
+    """
+    lock = threading.Lock()
+
+    def release(info) -> None:
+        if info.pop("write_lock", False):
+            lock.release()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def acquire(conn, cursor, statement, parameters, context, executemany):
+        if "write_lock" in conn.info or statement.lstrip()[:6].upper() not in ("INSERT", "UPDATE", "DELETE"):
+            return
+        # On timeout, carry on and leave the wait to SQLite's busy handler
+        conn.info["write_lock"] = lock.acquire(timeout=timeout)
+
+    @event.listens_for(engine, "commit")
+    def on_commit(conn):
+        release(conn.info)
+
+    @event.listens_for(engine, "rollback")
+    def on_rollback(conn):
+        release(conn.info)
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        release(connection_record.info)
+
+
+engine = make_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# =========================================================
+# Async engine (request handlers)
+# =========================================================
+# The routers run on the event loop with AsyncSession; the sync engine above
+# stays for startup, bulk import/export and the NLP workers.
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def async_url(url: str) -> str:
+    """`url` with its driver replaced by the asyncio one for its dialect."""
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme.split('+', 1)[0], scheme)}://{rest}"
+
+
+def make_async_engine(
+    url: str = SQLALCHEMY_DATABASE_URL, pragmas: Optional[Dict[str, str]] = None, **kwargs
+) -> AsyncEngine:
+    """Async counterpart of `make_engine`, with the same pool settings and PRAGMAs."""
+    url = async_url(url)
+    options = _pool_options(url, kwargs)
+    if not url.startswith("sqlite"):
+        return create_async_engine(url, **options)
+
+    pragmas, connect_args = _sqlite_options(pragmas)
+    engine = create_async_engine(url, connect_args=connect_args, **options)
+    # A threading lock would block the event loop; async writers use async_write_lock()
+    _sqlite_setup(engine.sync_engine, url, pragmas, write_lock=False)
+    return engine
+
+
+async_engine = make_async_engine()
+# Not expiring on commit: an expired attribute would need a lazy load, which
+# AsyncSession cannot do implicitly
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+_async_write_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+
+def async_write_lock():
+    """
+    The event-loop version of the SQLite writer queue (see _serialize_writes):
+    hold it around a whole write transaction. One lock per loop, because an
+    asyncio.Lock is bound to the loop it is first used on; a no-op for other
+    databases or with SQLITE_WRITE_LOCK=0.
+    """
+    if async_engine.dialect.name != "sqlite" or os.getenv("SQLITE_WRITE_LOCK", "1") != "1":
+        return contextlib.nullcontext()
+    loop = asyncio.get_running_loop()
+    lock = _async_write_locks.get(loop)
+    if lock is None:
+        lock = _async_write_locks[loop] = asyncio.Lock()
+    return lock
+
+
+async def get_db() -> AsyncIterator[AsyncSession]:
+    """Request-scoped database session, the dependency shared by all routers."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
 Base = declarative_base()
+
+
+def init_db(bind=engine) -> None:
+    """
+    Create missing tables and indexes, and the full-text search indexes
+    (app/db/search.py).
+
+    `create_all` skips tables that already exist, including their columns
+    and indexes, so columns (which need a server default or to be nullable)
+    and indexes added to the models later are created one by one here.
+    """
+    from app.db import models, search  # noqa: F401  (registers models on Base)
+
+    Base.metadata.create_all(bind=bind)
+    existing = inspect(bind)
+    for table in Base.metadata.sorted_tables:
+        columns = {column["name"] for column in existing.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in columns:
+                ddl = CreateColumn(column).compile(dialect=bind.dialect)
+                with bind.begin() as conn:
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+    search.ensure_indexes(bind)
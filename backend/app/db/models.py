@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index, Time, and_
+from sqlalchemy.orm import foreign, relationship
 from app.db.database import Base
 
 # ============================================================
@@ -12,16 +13,18 @@ class Patient(Base):
     __tablename__ = "patients"
 
     id: int = Column(Integer, primary_key=True, index=True)
-    name: str = Column(String, nullable=False)
+    name: str = Column(String, nullable=False, index=True)
     age: int = Column(Integer, nullable=False)
     gender: str = Column(String, nullable=False)
     allergies: str = Column(String, nullable=True)
 
-    # Relationship to appointments (cascade deletes appointments if patient is deleted)
+    # Relationship to appointments (cascade deletes appointments if patient is deleted),
+    # loaded in date order for the timeline
     appointments = relationship(
         "Appointment", 
         back_populates="patient", 
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        order_by=lambda: (Appointment.date, Appointment.id),
     )
 
 
@@ -36,7 +39,7 @@ class Doctor(Base):
 
     id: int = Column(Integer, primary_key=True, index=True)
     name: str = Column(String, nullable=False)
-    specialty: str = Column(String, nullable=False)
+    specialty: str = Column(String, nullable=False, index=True)
     contact: str = Column(String, nullable=False)
 
     # Relationship to appointments (cascade deletes appointments if doctor is deleted)
@@ -57,11 +60,183 @@ class Appointment(Base):
     __tablename__ = "appointments"
 
     id: int = Column(Integer, primary_key=True, index=True)
-    patient_id: int = Column(Integer, ForeignKey("patients.id"), nullable=False)
-    doctor_id: int = Column(Integer, ForeignKey("doctors.id"), nullable=False)
-    date: DateTime = Column(DateTime, nullable=False)
+    patient_id: int = Column(Integer, ForeignKey("patients.id"), nullable=False, index=True)
+    doctor_id: int = Column(Integer, ForeignKey("doctors.id"), nullable=False, index=True)
+    date: DateTime = Column(DateTime, nullable=False, index=True)
+    # Length of the booking; the doctor is busy for [date, date + duration)
+    duration_minutes: int = Column(Integer, nullable=False, default=30, server_default="30")
     notes: str = Column(String, nullable=True)
 
     # Relationships
     patient = relationship("Patient", back_populates="appointments")
     doctor = relationship("Doctor", back_populates="appointments")
+
+    # Completed batch NLP items run on this appointment's notes (read-only;
+    # job items are written by the job queue)
+    nlp_results = relationship(
+        "NLPJobItem",
+        primaryjoin=lambda: and_(
+            Appointment.id == foreign(NLPJobItem.appointment_id), NLPJobItem.status == ITEM_DONE
+        ),
+        order_by="NLPJobItem.id",
+        viewonly=True,
+    )
+
+    __table_args__ = (
+        # Overlap checks and free-slot search seek a doctor's date range (app/db/scheduling.py)
+        Index("ix_appointments_doctor_id_date", "doctor_id", "date"),
+    )
+
+
+# ============================================================
+# Doctor Working Hours Model
+# ============================================================
+class DoctorWorkingHours(Base):
+    """
+    One weekly working interval of a doctor, e.g. Monday 09:00-13:00. A day
+    may have several (split shifts); see app/db/scheduling.py.
+    """
+    __tablename__ = "doctor_working_hours"
+
+    id: int = Column(Integer, primary_key=True, index=True)
+    doctor_id: int = Column(Integer, ForeignKey("doctors.id"), nullable=False, index=True)
+    weekday: int = Column(Integer, nullable=False)  # Monday = 0
+    start_time: Time = Column(Time, nullable=False)
+    end_time: Time = Column(Time, nullable=False)
+
+
+# ============================================================
+# Change Log Model
+# ============================================================
+class ChangeLogEntry(Base):
+    """
+    One committed change to a patient, doctor or appointment. Written by the
+    crud mutations in the same transaction as the change; `version` orders
+    the change feed (app/db/changes.py).
+    """
+    __tablename__ = "change_log"
+
+    # AUTOINCREMENT, so versions are never reused after old entries are pruned
+    version: int = Column(Integer, primary_key=True)
+    entity: str = Column(String, nullable=False)  # "patient", "doctor" or "appointment"
+    entity_id: int = Column(Integer, nullable=False)
+    op: str = Column(String, nullable=False)  # "upsert" or "delete"
+    changed_at: DateTime = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Feeds filtered to one entity seek its versions
+        Index("ix_change_log_entity_version", "entity", "version"),
+        {"sqlite_autoincrement": True},
+    )
+
+
+# ============================================================
+# NLP Result Model
+# ============================================================
+class NLPResult(Base):
+    """
+    Database model for storing executed NLP task results.
+
+    Rows are only ever appended; lookups go through the task and time indexes.
+    """
+    __tablename__ = "nlp_results"
+
+    id: int = Column(Integer, primary_key=True, index=True)
+    task: str = Column(String, nullable=False)
+    input_text: str = Column(Text, nullable=False)
+    result: str = Column(Text, nullable=False)
+    created_at: DateTime = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        Index("ix_nlp_results_task_created_at", "task", "created_at"),
+    )
+
+
+# ============================================================
+# NLP Cache Model
+# ============================================================
+class NLPCacheEntry(Base):
+    """
+    Persistent tier of the NLP response cache, keyed by a content hash of
+    (task, prompt version, model, normalized text).
+    """
+    __tablename__ = "nlp_cache"
+
+    key: str = Column(String(64), primary_key=True)
+    task: str = Column(String, nullable=False)
+    model: str = Column(String, nullable=False)
+    result: str = Column(Text, nullable=False)
+    created_at: DateTime = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at: DateTime = Column(DateTime, nullable=False, index=True)
+
+
+# ============================================================
+# NLP Batch Job Models
+# ============================================================
+class NLPJob(Base):
+    """
+    A batch of NLP work items submitted together. Progress counters are
+    updated as items finish, so polling a job never scans its items.
+    """
+    __tablename__ = "nlp_jobs"
+
+    id: int = Column(Integer, primary_key=True, index=True)
+    status: str = Column(String, nullable=False, default="queued")
+    total: int = Column(Integer, nullable=False, default=0)
+    completed: int = Column(Integer, nullable=False, default=0)
+    failed: int = Column(Integer, nullable=False, default=0)
+    created_at: DateTime = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at: DateTime = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    items = relationship("NLPJobItem", back_populates="job", cascade="all, delete-orphan")
+
+
+# NLPJobItem.status values, shared by the job queue (app/db/crud.py) and
+# Appointment.nlp_results
+ITEM_PENDING = "pending"
+ITEM_RUNNING = "running"
+ITEM_DONE = "done"
+ITEM_FAILED = "failed"
+
+
+class NLPJobItem(Base):
+    """
+    One (text, task) unit of a batch job. Workers claim `pending` items whose
+    `available_at` has passed; failures are re-queued with a later
+    `available_at` until the attempt limit is reached.
+    """
+    __tablename__ = "nlp_job_items"
+
+    id: int = Column(Integer, primary_key=True, index=True)
+    job_id: int = Column(Integer, ForeignKey("nlp_jobs.id"), nullable=False, index=True)
+    task: str = Column(String, nullable=False)
+    text: str = Column(Text, nullable=False)
+    appointment_id: int = Column(Integer, nullable=True, index=True)
+    status: str = Column(String, nullable=False, default=ITEM_PENDING)
+    attempts: int = Column(Integer, nullable=False, default=0)
+    result: str = Column(Text, nullable=True)
+    error: str = Column(Text, nullable=True)
+    available_at: DateTime = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at: DateTime = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    job = relationship("NLPJob", back_populates="items")
+
+    __table_args__ = (
+        Index("ix_nlp_job_items_status_available_at", "status", "available_at"),
+    )
+
+
+# ============================================================
+# Dashboard Rollup Model
+# ============================================================
+class DashboardCounter(Base):
+    """
+    One incrementally maintained dashboard aggregate, e.g.
+    ("appointments_by_doctor", "7") -> 42. Kept in step with the base tables
+    by the crud mutations; see app/db/rollups.py.
+    """
+    __tablename__ = "dashboard_counters"
+
+    metric: str = Column(String, primary_key=True)
+    key: str = Column(String, primary_key=True)
+    value: int = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,63 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException, Response
+
+# Response header carrying the cursor for the next page in keyset mode.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort key of the last row of a page into an opaque token."""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Decode a cursor produced by `encode_cursor`; raises 400 when malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or not values:
+            raise ValueError
+        return values
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def decode_id_cursor(cursor: Optional[str]) -> Optional[int]:
+    """Seek key for entities paged by `(id)`. An empty cursor means the first page."""
+    if not cursor:
+        return None
+    values = decode_cursor(cursor)
+    if len(values) != 1 or not isinstance(values[0], int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values[0]
+
+
+def decode_date_id_cursor(cursor: Optional[str]) -> Optional[tuple]:
+    """Seek key for entities paged by `(date, id)`. An empty cursor means the first page."""
+    if not cursor:
+        return None
+    values = decode_cursor(cursor)
+    try:
+        date, row_id = values
+        if not isinstance(row_id, int):
+            raise ValueError
+        return datetime.fromisoformat(date), row_id
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def set_next_cursor(response: Response, rows: Sequence[Any], limit: int, *key_attrs: str) -> None:
+    """
+    Attach the next-page cursor to the response when the page is full.
+
+    A short page means the end of the result set, so no header is sent.
+    """
+    if rows and len(rows) == limit:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(last, a) for a in key_attrs])
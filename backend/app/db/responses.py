@@ -0,0 +1,57 @@
+"""
+Fast path for large list responses.
+
+A route returning ORM entities pays twice per row: SQLAlchemy hydrates an
+identity-mapped object, then FastAPI validates it against `response_model`
+attribute by attribute before dumping it. List routes instead select only
+the schema's columns as plain rows (`schema_columns`) and return them in a
+`JSONRowsResponse`, which FastAPI sends as is. The `response_model` stays on
+the route for the OpenAPI docs; the rows come from the typed columns the
+schema was built on, so the JSON is the same bytes.
+
+orjson serializes the rows when installed, the stdlib `json` otherwise.
+"""
+import json
+from datetime import date, datetime, time
+from functools import lru_cache
+from typing import Any, Sequence, Tuple, Type
+
+from fastapi import Response
+from pydantic import BaseModel
+from sqlalchemy import Column, Row
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+
+@lru_cache(maxsize=None)
+def schema_columns(model, schema: Type[BaseModel]) -> Tuple[Column, ...]:
+    """The model's table columns behind each field of `schema`, in field order."""
+    return tuple(model.__table__.c[name] for name in schema.model_fields)
+
+
+def _default(value: Any) -> str:
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON, formatted like FastAPI's own responses."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class JSONRowsResponse(Response):
+    """A JSON array of objects, one per row, keyed by the row's column labels."""
+
+    media_type = "application/json"
+
+    def render(self, content: Sequence[Row]) -> bytes:
+        if not content:
+            return b"[]"
+        keys = content[0]._fields
+        return dumps([dict(zip(keys, row)) for row in content])
@@ -0,0 +1,226 @@
+"""
+Incrementally maintained dashboard aggregates.
+
+Every aggregate is a row of `dashboard_counters` (metric, key, value). The
+crud create/update/delete functions apply +1/-1 deltas in the same
+transaction as the row change, so dashboard reads touch a handful of small
+rows instead of scanning appointments. `rebuild` recomputes everything from
+the base tables and is the repair path:
+
+    python -m app.db.rollups rebuild
+"""
+import argparse
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.db import models
+
+# ---------------- Metrics ----------------
+TOTALS = "totals"  # keys: patients, doctors, appointments
+PATIENTS_BY_GENDER = "patients_by_gender"
+DOCTORS_BY_SPECIALTY = "doctors_by_specialty"
+APPOINTMENTS_BY_DOCTOR = "appointments_by_doctor"
+APPOINTMENTS_BY_PATIENT = "appointments_by_patient"
+PATIENTS_BY_DOCTOR = "patients_by_doctor"  # distinct patients seen
+DOCTOR_PATIENT_PAIRS = "doctor_patient"  # key "doctor_id:patient_id"; backs PATIENTS_BY_DOCTOR
+APPOINTMENTS_BY_DAY = "appointments_by_day"  # key YYYY-MM-DD
+APPOINTMENTS_BY_MONTH = "appointments_by_month"  # key YYYY-MM
+
+BATCH_SIZE = 10_000
+
+Counter = models.DashboardCounter
+
+
+def _upsert(db: Session):
+    """Dialect-specific INSERT supporting ON CONFLICT (SQLite and PostgreSQL)."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert
+
+
+# ---------------- Deltas applied by crud ----------------
+ZERO_DELETE_CHUNK = 2000  # keys per IN (...) delete, well under SQLite's bound-parameter limit
+
+def add_counts(db: Session, counts: Dict[Tuple[str, object], int]) -> Dict[Tuple[str, str], int]:
+    """
+    Apply many deltas with one executemany upsert (batched into multi-row
+    statements by SQLAlchemy) and return the new values. Keyed counters
+    that reached zero are removed.
+    """
+    counts = {(m, str(k)): v for (m, k), v in counts.items() if v}
+    values: Dict[Tuple[str, str], int] = {}
+    items = list(counts.items())
+    table = Counter.__table__
+    if items:
+        stmt = _upsert(db)(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.metric, table.c.key],
+            set_={"value": table.c.value + stmt.excluded.value},
+        ).returning(table.c.metric, table.c.key, table.c.value)
+        # executemany with RETURNING is sent as batched multi-row statements ("insertmanyvalues")
+        params = [{"metric": m, "key": k, "value": v} for (m, k), v in items]
+        values.update(((m, k), v) for m, k, v in db.execute(stmt, params))
+    zeros = [key for key, value in values.items() if value == 0 and key[0] != TOTALS]
+    for i in range(0, len(zeros), ZERO_DELETE_CHUNK):
+        db.execute(delete(table).where(tuple_(table.c.metric, table.c.key).in_(zeros[i:i + ZERO_DELETE_CHUNK])))
+    return values
+
+def apply_patient(db: Session, gender: str, sign: int) -> None:
+    add_counts(db, {(TOTALS, "patients"): sign, (PATIENTS_BY_GENDER, gender): sign})
+
+def apply_doctor(db: Session, specialty: str, sign: int) -> None:
+    add_counts(db, {(TOTALS, "doctors"): sign, (DOCTORS_BY_SPECIALTY, specialty): sign})
+
+def rename_key(db: Session, metric: str, old, new) -> None:
+    """Move one unit from `old` to `new`, e.g. a patient's gender changing."""
+    if str(old) != str(new):
+        add_counts(db, {(metric, old): -1, (metric, new): 1})
+
+def _apply_appointment_deltas(db: Session, rows: Iterable[Tuple[int, int, datetime, int]]) -> None:
+    counts: Dict[Tuple[str, object], int] = defaultdict(int)
+    pairs: Dict[Tuple[int, int], int] = defaultdict(int)
+    for patient_id, doctor_id, date, sign in rows:
+        counts[TOTALS, "appointments"] += sign
+        counts[APPOINTMENTS_BY_DOCTOR, doctor_id] += sign
+        counts[APPOINTMENTS_BY_PATIENT, patient_id] += sign
+        counts[APPOINTMENTS_BY_DAY, date.strftime("%Y-%m-%d")] += sign
+        counts[APPOINTMENTS_BY_MONTH, date.strftime("%Y-%m")] += sign
+        pairs[doctor_id, patient_id] += sign
+    for (doctor_id, patient_id), delta in pairs.items():
+        counts[DOCTOR_PATIENT_PAIRS, f"{doctor_id}:{patient_id}"] += delta
+    values = add_counts(db, counts)
+
+    # The distinct-patient count only moves when a pair's first appointment
+    # is added or its last one removed
+    seen: Dict[Tuple[str, object], int] = defaultdict(int)
+    for (doctor_id, patient_id), delta in pairs.items():
+        value = values.get((DOCTOR_PATIENT_PAIRS, f"{doctor_id}:{patient_id}"))
+        if delta > 0 and value == delta:
+            seen[PATIENTS_BY_DOCTOR, doctor_id] += 1
+        elif delta < 0 and value == 0:
+            seen[PATIENTS_BY_DOCTOR, doctor_id] -= 1
+    add_counts(db, seen)
+
+def apply_appointment(db: Session, patient_id: int, doctor_id: int, date: datetime, sign: int) -> None:
+    _apply_appointment_deltas(db, [(patient_id, doctor_id, date, sign)])
+
+def apply_appointments(db: Session, rows: Iterable[Tuple[int, int, datetime]], sign: int) -> None:
+    """Add (sign=1) or remove (sign=-1) many appointments, e.g. a bulk import or a cascade delete."""
+    _apply_appointment_deltas(db, ((patient_id, doctor_id, date, sign) for patient_id, doctor_id, date in rows))
+
+def move_appointment(db: Session, old: Tuple[int, int, datetime], new: Tuple[int, int, datetime]) -> None:
+    """An appointment's patient, doctor or date changed: one set of net deltas."""
+    if tuple(old) != tuple(new):
+        _apply_appointment_deltas(db, [(*old, -1), (*new, 1)])
+
+# ---------------- Bulk deltas (imports) ----------------
+def patient_counts(rows: Iterable[dict]) -> Dict[Tuple[str, object], int]:
+    counts: Dict[Tuple[str, object], int] = defaultdict(int)
+    for row in rows:
+        counts[TOTALS, "patients"] += 1
+        counts[PATIENTS_BY_GENDER, row["gender"]] += 1
+    return counts
+
+def doctor_counts(rows: Iterable[dict]) -> Dict[Tuple[str, object], int]:
+    counts: Dict[Tuple[str, object], int] = defaultdict(int)
+    for row in rows:
+        counts[TOTALS, "doctors"] += 1
+        counts[DOCTORS_BY_SPECIALTY, row["specialty"]] += 1
+    return counts
+
+# ---------------- Reads ----------------
+def read(db: Session, *metrics: str) -> Dict[str, Dict[str, int]]:
+    """Counters of the given metrics as {metric: {key: value}}, via the primary key."""
+    values: Dict[str, Dict[str, int]] = {metric: {} for metric in metrics}
+    rows = db.execute(select(Counter.metric, Counter.key, Counter.value).where(Counter.metric.in_(metrics)))
+    for metric, key, value in rows:
+        values[metric][key] = value
+    return values
+
+def upcoming_appointments(db: Session, days: Dict[str, int], now: Optional[datetime] = None) -> int:
+    """
+    Appointments after `now`: whole future days come from the day buckets;
+    only the rest of today is counted from the (indexed) appointments table.
+    """
+    now = now or datetime.now()
+    today = now.strftime("%Y-%m-%d")
+    later_today = db.execute(
+        select(func.count(models.Appointment.id)).where(
+            models.Appointment.date > now,
+            models.Appointment.date < datetime(now.year, now.month, now.day) + timedelta(days=1),
+        )
+    ).scalar()
+    return later_today + sum(count for day, count in days.items() if day > today)
+
+# ---------------- Rebuild ----------------
+def _rows(metric: str, counts: Iterable) -> Iterable[dict]:
+    return ({"metric": metric, "key": str(key), "value": value} for key, value in counts if value)
+
+def rebuild(db: Session) -> int:
+    """Recompute every counter from the base tables; returns the number of rows written."""
+    Patient, Doctor, Appointment = models.Patient, models.Doctor, models.Appointment
+    db.execute(delete(Counter))
+
+    def grouped(*columns):
+        return db.execute(select(*columns, func.count()).group_by(*columns)).all()
+
+    totals = [
+        ("patients", db.execute(select(func.count(Patient.id))).scalar()),
+        ("doctors", db.execute(select(func.count(Doctor.id))).scalar()),
+        ("appointments", db.execute(select(func.count(Appointment.id))).scalar()),
+    ]
+    pairs = grouped(Appointment.doctor_id, Appointment.patient_id)
+    patients_by_doctor: Dict[int, int] = defaultdict(int)
+    for doctor_id, _, _ in pairs:
+        patients_by_doctor[doctor_id] += 1
+    days = [(str(day), count) for day, count in grouped(func.date(Appointment.date))]
+    months: Dict[str, int] = defaultdict(int)
+    for day, count in days:
+        months[day[:7]] += count
+
+    written = 0
+    batch = [{"metric": TOTALS, "key": key, "value": value} for key, value in totals]
+    for rows in (
+        _rows(PATIENTS_BY_GENDER, grouped(Patient.gender)),
+        _rows(DOCTORS_BY_SPECIALTY, grouped(Doctor.specialty)),
+        _rows(APPOINTMENTS_BY_DOCTOR, grouped(Appointment.doctor_id)),
+        _rows(APPOINTMENTS_BY_PATIENT, grouped(Appointment.patient_id)),
+        _rows(PATIENTS_BY_DOCTOR, patients_by_doctor.items()),
+        _rows(DOCTOR_PATIENT_PAIRS, ((f"{d}:{p}", n) for d, p, n in pairs)),
+        _rows(APPOINTMENTS_BY_DAY, days),
+        _rows(APPOINTMENTS_BY_MONTH, months.items()),
+    ):
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                db.execute(insert(Counter), batch)
+                written += len(batch)
+                batch = []
+    if batch:
+        db.execute(insert(Counter), batch)
+        written += len(batch)
+    db.commit()
+    return written
+
+def ensure_built(db: Session) -> None:
+    """Build the counters once for databases created before they existed."""
+    if db.execute(select(Counter.value).where(Counter.metric == TOTALS).limit(1)).first() is None:
+        rebuild(db)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the dashboard rollup counters.")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+
+    from app.db.database import SessionLocal, init_db
+
+    init_db()
+    with SessionLocal() as session:
+        print(f"rebuilt dashboard counters: {rebuild(session)} rows")
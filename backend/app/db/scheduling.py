@@ -0,0 +1,221 @@
+"""
+Doctor schedules: double-booking checks and free-slot search.
+
+An appointment keeps its doctor busy for `[date, date + duration_minutes)`.
+Durations are capped at MAX_APPOINTMENT_MINUTES, so every appointment that
+can overlap a new one starts within `(start - MAX, end)`: one range seek on
+the `(doctor_id, date)` index, however many appointments the doctor has.
+The check and the write that follows must not interleave with another
+booking of the same doctor: SQLite's single writer already ensures that,
+on PostgreSQL `lock_schedule` takes a per-doctor advisory lock.
+
+Working hours are weekly intervals per doctor (`doctor_working_hours`);
+doctors without any work DEFAULT_HOURS on DEFAULT_DAYS. Hours only shape
+free-slot search. Bookings outside them are allowed (overtime, emergencies),
+double bookings are not. Times are naive clinic-local datetimes, like
+appointment dates.
+"""
+import bisect
+import itertools
+import os
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.schemas import MAX_APPOINTMENT_MINUTES
+
+# Free slots start on this grid (minutes) from the opening of each working interval
+SLOT_MINUTES = int(os.getenv("SCHEDULE_SLOT_MINUTES", "30"))
+# Hours of doctors without their own; empty SCHEDULE_DEFAULT_HOURS means none
+DEFAULT_HOURS = os.getenv("SCHEDULE_DEFAULT_HOURS", "09:00-17:00")
+DEFAULT_DAYS = os.getenv("SCHEDULE_DEFAULT_DAYS", "0,1,2,3,4")  # Monday = 0
+# How far ahead free-slot search looks before giving up
+HORIZON_DAYS = int(os.getenv("SCHEDULE_HORIZON_DAYS", "90"))
+
+MAX_DURATION = timedelta(minutes=MAX_APPOINTMENT_MINUTES)
+
+SCHEDULE_LOCK_KEY = 0x53434844  # PostgreSQL advisory lock namespace ("SCHD"), paired with a doctor id
+
+Interval = Tuple[datetime, datetime]
+WeeklyHours = Dict[int, List[Tuple[time, time]]]
+
+
+def _default_hours() -> WeeklyHours:
+    if not DEFAULT_HOURS:
+        return {}
+    start, end = (time.fromisoformat(part.strip()) for part in DEFAULT_HOURS.split("-"))
+    return {int(day): [(start, end)] for day in DEFAULT_DAYS.split(",") if day.strip()}
+
+# ---------------- Double-booking checks ----------------
+def select_overlap_candidates(
+    doctor_id: int, start: datetime, minutes: int, exclude_id: Optional[int] = None
+) -> Select:
+    """The doctor's appointments starting in `(start - MAX, start + minutes)`."""
+    Appointment = models.Appointment
+    query = select(Appointment.id, Appointment.date, Appointment.duration_minutes).where(
+        Appointment.doctor_id == doctor_id,
+        Appointment.date > start - MAX_DURATION,
+        Appointment.date < start + timedelta(minutes=minutes),
+    )
+    if exclude_id is not None:
+        query = query.where(Appointment.id != exclude_id)
+    return query.order_by(Appointment.date)
+
+def lock_schedule(db: Session, doctor_id: int) -> None:
+    """
+    On PostgreSQL, wait for other transactions booking the doctor to commit
+    or roll back, so a conflict check sees their appointments. The lock is
+    released when this transaction ends. SQLite's single writer already does this.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(select(func.pg_advisory_xact_lock(SCHEDULE_LOCK_KEY, doctor_id)))
+
+def find_conflict(
+    db: Session, doctor_id: int, start: datetime, minutes: int, exclude_id: Optional[int] = None
+):
+    """The first of the doctor's appointments overlapping the interval, or None."""
+    for row in db.execute(select_overlap_candidates(doctor_id, start, minutes, exclude_id)):
+        if row.date + timedelta(minutes=row.duration_minutes) > start:
+            return row
+    return None
+
+# ---------------- Free-slot search ----------------
+# Rows fetched per round trip while scanning bookings in date order
+SCAN_BATCH = 500
+
+def _doctor_slots(
+    doctor_id: int, hours: WeeklyHours, busy: List[Interval], starts_from: datetime, starts_before: datetime,
+    minutes: int,
+) -> Iterator[Tuple[datetime, int]]:
+    """A doctor's free `(start, doctor_id)` slots starting in `[starts_from, starts_before)`, in time order."""
+    length, step = timedelta(minutes=minutes), timedelta(minutes=SLOT_MINUTES)
+    i = 0  # busy intervals before i end before the current slot
+    day = starts_from.date()
+    while day <= starts_before.date():
+        for open_at, close_at in hours.get(day.weekday(), ()):
+            opens, closes = datetime.combine(day, open_at), datetime.combine(day, close_at)
+            slot = opens
+            if slot < starts_from:
+                slot += -((opens - starts_from) // step) * step  # first grid point >= starts_from
+            while slot < starts_before and slot + length <= closes:
+                while i < len(busy) and busy[i][1] <= slot:
+                    i += 1
+                if i < len(busy) and busy[i][0] < slot + length:
+                    # Jump to the first grid point at or after the end of the busy interval
+                    slot += -((slot - busy[i][1]) // step) * step
+                    continue
+                yield slot, doctor_id
+                slot += step
+        day += timedelta(days=1)
+
+def select_doctors(doctor_id: Optional[int] = None, specialty: Optional[str] = None) -> Select:
+    query = select(models.Doctor.id, models.Doctor.name, models.Doctor.specialty)
+    if doctor_id is not None:
+        query = query.where(models.Doctor.id == doctor_id)
+    if specialty:
+        query = query.where(models.Doctor.specialty == specialty)
+    return query.order_by(models.Doctor.id)
+
+async def find_free_slots(
+    db: AsyncSession,
+    count: int,
+    minutes: int,
+    not_before: datetime,
+    doctor_id: Optional[int] = None,
+    specialty: Optional[str] = None,
+) -> List[Dict]:
+    """
+    The `count` earliest free slots of `minutes` starting at or after
+    `not_before`, across the doctors matching the filters (earliest first,
+    then by doctor id), within HORIZON_DAYS.
+
+    One query reads the doctors' bookings up to the horizon in date order
+    and a single pass walks the gaps between each doctor's consecutive
+    bookings. The scan stops as soon as the `count` slots found
+    end before the next booking read, since nothing later can displace them,
+    so a busy schedule costs the bookings up to the answer, not the horizon.
+    """
+    # Plain column reads: the session's connection skips the ORM result layer
+    conn = await db.connection()
+    doctors = {row.id: row for row in await conn.execute(select_doctors(doctor_id, specialty))}
+    if not doctors:
+        return []
+    doctor_ids = select_doctors(doctor_id, specialty).with_only_columns(models.Doctor.id).order_by(None)
+
+    Hours = models.DoctorWorkingHours
+    hours: Dict[int, WeeklyHours] = defaultdict(lambda: defaultdict(list))
+    for row in await conn.execute(
+        select(Hours.doctor_id, Hours.weekday, Hours.start_time, Hours.end_time)
+        .where(Hours.doctor_id.in_(doctor_ids))
+        .order_by(Hours.doctor_id, Hours.weekday, Hours.start_time)
+    ):
+        hours[row.doctor_id][row.weekday].append((row.start_time, row.end_time))
+    default_hours = _default_hours()
+
+    Appointment = models.Appointment
+    length = timedelta(minutes=minutes)
+    horizon = not_before + timedelta(days=HORIZON_DAYS)
+    # A slot starting before the horizon can overlap bookings starting up to its end
+    read_to = horizon + length
+    # Each doctor is free from free_from[doctor] up to the booking being read
+    free_from = dict.fromkeys(doctors, not_before)
+    found: List[Tuple[datetime, int]] = []  # the `count` earliest so far, sorted
+    # Once `count` are found, the end of the last: a booking starting there or later cannot displace any
+    stop_at = read_to
+
+    def add_gap(doctor: int, until: datetime) -> None:
+        """Add the slots of the doctor's free time `[free_from, until)` that end by `until`."""
+        nonlocal stop_at
+        gap = _doctor_slots(
+            doctor, hours[doctor] if doctor in hours else default_hours,
+            [(until, until)], free_from[doctor], min(until, horizon), minutes,
+        )
+        for slot in itertools.islice(gap, count):
+            bisect.insort(found, slot)
+        del found[count:]
+        if len(found) == count:
+            stop_at = found[-1][0] + length
+
+    # Unfiltered, the scan needs no doctor condition and streams straight off the `date` index
+    filters = [] if doctor_id is None and not specialty else [Appointment.doctor_id.in_(doctor_ids)]
+    async with conn.stream(
+        select(Appointment.doctor_id, Appointment.date, Appointment.duration_minutes)
+        .where(Appointment.date > not_before - MAX_DURATION, Appointment.date < read_to)
+        .where(*filters)
+        .order_by(Appointment.date)
+        .execution_options(yield_per=SCAN_BATCH)
+    ) as bookings:
+        async for batch in bookings.partitions():
+            for doctor, start, duration in batch:
+                if start >= stop_at:
+                    break
+                free = free_from.get(doctor)
+                if free is None:  # a doctor added since `doctors` was read
+                    continue
+                if free + length <= start:
+                    add_gap(doctor, start)
+                end = start + timedelta(minutes=duration)
+                if end > free:
+                    free_from[doctor] = end
+            if start >= stop_at:
+                break
+
+    # Every doctor is also free from its last booking read up to where the scan stopped
+    for doctor in doctors:
+        if free_from[doctor] + length <= stop_at:
+            add_gap(doctor, stop_at)
+    return [
+        {
+            "doctor_id": doctor,
+            "doctor_name": doctors[doctor].name,
+            "specialty": doctors[doctor].specialty,
+            "start": start,
+            "end": start + length,
+        }
+        for start, doctor in found
+    ]
@@ -1,6 +1,6 @@
-from typing import Optional, Dict
-from datetime import datetime
-from pydantic import BaseModel
+from typing import Annotated, Any, Optional, Dict, List, Literal
+from datetime import datetime, time
+from pydantic import AfterValidator, BaseModel, Field, model_validator
 
 # =========================================================
 # Patient Schemas
@@ -59,11 +59,27 @@ class Doctor(DoctorBase):
 # =========================================================
 # Appointment Schemas
 # =========================================================
+def to_local_naive(value: datetime) -> datetime:
+    """An aware datetime converted to the server's local time, without tzinfo; naive ones as given."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+# Appointment dates are stored naive, in the clinic's (server's) local time:
+# the clock of the working hours and of the free-slot search's default start.
+# A `...Z` or `+05:30` input is converted to it, so it compares with stored dates.
+LocalDateTime = Annotated[datetime, AfterValidator(to_local_naive)]
+
+# Bounding durations keeps overlap checks to a short index range (app/db/scheduling.py)
+DEFAULT_APPOINTMENT_MINUTES = 30
+MAX_APPOINTMENT_MINUTES = 8 * 60
+
 class AppointmentBase(BaseModel):
     """Base schema for appointments."""
     patient_id: int
     doctor_id: int
-    date: datetime
+    date: LocalDateTime
+    duration_minutes: int = Field(DEFAULT_APPOINTMENT_MINUTES, ge=5, le=MAX_APPOINTMENT_MINUTES)
     notes: Optional[str] = None
 
 class AppointmentCreate(AppointmentBase):
@@ -74,7 +90,8 @@ class AppointmentUpdate(BaseModel):
     """Schema for updating an appointment (all fields optional)."""
     patient_id: Optional[int] = None
     doctor_id: Optional[int] = None
-    date: Optional[datetime] = None
+    date: Optional[LocalDateTime] = None
+    duration_minutes: Optional[int] = Field(None, ge=5, le=MAX_APPOINTMENT_MINUTES)
     notes: Optional[str] = None
 
 class Appointment(AppointmentBase):
@@ -84,6 +101,97 @@ class Appointment(AppointmentBase):
     class Config:
         from_attributes = True
 
+# =========================================================
+# Scheduling Schemas
+# =========================================================
+class WorkingHours(BaseModel):
+    """One weekly working interval of a doctor."""
+    weekday: int = Field(..., ge=0, le=6, description="Monday = 0")
+    start_time: time
+    end_time: time
+
+    class Config:
+        from_attributes = True
+
+class WorkingHoursUpdate(BaseModel):
+    """A doctor's full weekly schedule; replaces the previous one."""
+    hours: List[WorkingHours]
+
+    @model_validator(mode="after")
+    def check_intervals(self):
+        by_day = sorted(self.hours, key=lambda h: (h.weekday, h.start_time))
+        for i, h in enumerate(by_day):
+            if h.start_time >= h.end_time:
+                raise ValueError(f"Weekday {h.weekday}: start_time must be before end_time")
+            if i and by_day[i - 1].weekday == h.weekday and by_day[i - 1].end_time > h.start_time:
+                raise ValueError(f"Weekday {h.weekday}: working intervals overlap")
+        return self
+
+class FreeSlot(BaseModel):
+    """A bookable start time with a doctor."""
+    doctor_id: int
+    doctor_name: str
+    specialty: str
+    start: datetime
+    end: datetime
+
+# =========================================================
+# Patient Timeline Schemas
+# =========================================================
+class TimelineNLPResult(BaseModel):
+    """A completed batch NLP item run on an appointment's notes."""
+    id: int
+    job_id: int
+    task: str
+    result: str
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class TimelineAppointment(Appointment):
+    """An appointment with its doctor and NLP results embedded."""
+    doctor: Doctor
+    nlp_results: List[TimelineNLPResult]
+
+class PatientTimeline(Patient):
+    """A patient with their appointments in date order."""
+    appointments: List[TimelineAppointment]
+
+# =========================================================
+# Bulk Import Schemas
+# =========================================================
+class BulkRowError(BaseModel):
+    """Why one input row was rejected (`row` is 1-based, header excluded)."""
+    row: int
+    errors: List[str]
+
+class BulkImportResult(BaseModel):
+    """Outcome of a CSV / NDJSON import; `errors` is capped, `failed` is not."""
+    inserted: int
+    failed: int
+    errors: List[BulkRowError]
+
+# =========================================================
+# Change Feed Schemas
+# =========================================================
+class Change(BaseModel):
+    """
+    The latest change to one entity within a page of the change feed. `data`
+    is the entity as its list endpoint returns it; deletes have none.
+    """
+    version: int
+    entity: Literal["patient", "doctor", "appointment"]
+    id: int
+    op: Literal["upsert", "delete"]
+    data: Optional[Dict[str, Any]] = None
+
+class ChangePage(BaseModel):
+    """Changes after `since`, oldest first; send `version` as the next `since`."""
+    version: int
+    changes: List[Change]
+    more: bool  # the page was cut at `limit`; ask again right away
+
 # =========================================================
 # Dashboard / Statistics Schema
 # =========================================================
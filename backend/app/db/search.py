@@ -0,0 +1,205 @@
+"""
+Full-text search over appointment notes, patient allergies and NLP results.
+
+Each searchable table has an external-content SQLite FTS5 index: the index
+stores only the inverted lists and reads the text back from the base table
+(for snippets) by rowid. Triggers keep the index in step with every write
+path, including the multi-row inserts of bulk import and the
+DELETE ... RETURNING of crud, so no caller has to remember to update it.
+
+Results are ranked by bm25 (or newest first) and paged with a keyset
+cursor on `(rank, rowid)`. bm25 has to score every match, so ranking a word
+found in a large share of the notes costs time in proportion to its match
+count; newest-first reads the index in rowid order and stops after a page.
+
+`rebuild` re-indexes from the base tables and `optimize` merges index
+segments after a large import:
+
+    python -m app.db.search rebuild|optimize
+
+FTS5 is SQLite-only; on other databases the indexes are not created and
+searches raise `SearchUnavailable`.
+"""
+import argparse
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Select, column, func, literal_column, or_, select, table, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import models
+
+# Porter stemming over unicode61, so "pains" finds "pain"; prefix indexes
+# keep "card*" style queries off the full term list
+TOKENIZE = "porter unicode61 remove_diacritics 2"
+PREFIX = "2 3"
+
+# Snippet highlighting and size (in tokens)
+MARK_START, MARK_END, ELLIPSIS = "<mark>", "</mark>", "…"
+SNIPPET_TOKENS = 16
+
+
+class SearchUnavailable(RuntimeError):
+    """The database has no FTS5 indexes (not SQLite)."""
+
+
+class FtsIndex(NamedTuple):
+    name: str
+    model: type
+    columns: Tuple[str, ...]  # indexed text columns
+    fields: Tuple[str, ...]  # base-table columns returned with each hit (and filterable)
+
+    @property
+    def table(self) -> str:
+        return self.model.__tablename__
+
+
+INDEXES: Dict[str, FtsIndex] = {
+    "appointments": FtsIndex(
+        "appointments_fts", models.Appointment, ("notes",), ("id", "patient_id", "doctor_id", "date")
+    ),
+    "patients": FtsIndex("patients_fts", models.Patient, ("allergies",), ("id", "name")),
+    "nlp_results": FtsIndex(
+        "nlp_results_fts", models.NLPResult, ("input_text", "result"), ("id", "task", "created_at")
+    ),
+}
+
+# ---------------- Schema ----------------
+def _ddl(index: FtsIndex) -> List[str]:
+    name, content = index.name, index.table
+    columns = ", ".join(index.columns)
+    new = ", ".join(f"new.{c}" for c in index.columns)
+    old = ", ".join(f"old.{c}" for c in index.columns)
+    # An external-content index is told what to remove: 'delete' with the old values
+    remove = f"INSERT INTO {name}({name}, rowid, {columns}) VALUES ('delete', old.id, {old});"
+    add = f"INSERT INTO {name}(rowid, {columns}) VALUES (new.id, {new});"
+    return [
+        f"CREATE VIRTUAL TABLE {name} USING fts5({columns}, content='{content}', content_rowid='id', "
+        f"tokenize='{TOKENIZE}', prefix='{PREFIX}')",
+        f"CREATE TRIGGER {name}_ai AFTER INSERT ON {content} BEGIN {add} END",
+        f"CREATE TRIGGER {name}_ad AFTER DELETE ON {content} BEGIN {remove} END",
+        f"CREATE TRIGGER {name}_au AFTER UPDATE OF {columns} ON {content} BEGIN {remove} {add} END",
+    ]
+
+def ensure_indexes(bind: Engine) -> None:
+    """Create missing FTS indexes and their triggers, and fill new ones from the base table."""
+    if bind.dialect.name != "sqlite":
+        return
+    with bind.begin() as conn:
+        existing = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'")).scalars())
+        for index in INDEXES.values():
+            if index.name in existing:
+                continue
+            for statement in _ddl(index):
+                conn.execute(text(statement))
+            _command(conn, index, "rebuild")
+
+def _command(conn: Connection, index: FtsIndex, command: str) -> None:
+    conn.execute(text(f"INSERT INTO {index.name}({index.name}) VALUES ('{command}')"))
+
+def maintain(bind: Engine, command: str) -> None:
+    """Run an FTS5 maintenance command ('rebuild' or 'optimize') on every index."""
+    with bind.begin() as conn:
+        for index in INDEXES.values():
+            _command(conn, index, command)
+
+# ---------------- Queries ----------------
+_TERM = re.compile(r'"([^"]*)"|(\S+)')
+_WORD = re.compile(r"\w+")
+
+def match_expression(q: str) -> str:
+    """
+    Turn free text into an FTS5 query in which every word must match:
+    `chest pain` -> `"chest" "pain"`. A double-quoted part stays a phrase
+    and a trailing `*` keeps a prefix search (`card*`). Punctuation is
+    dropped, so user input can never be an FTS5 syntax error.
+    """
+    parts = []
+    for phrase, word in _TERM.findall(q):
+        words = _WORD.findall(phrase or word)
+        if not words:
+            continue
+        part = '"' + " ".join(words) + '"'
+        if word and word.endswith("*"):
+            part += "*"
+        parts.append(part)
+    return " ".join(parts)
+
+def _select_hits(
+    index: FtsIndex,
+    match: str,
+    limit: int,
+    sort: str = "rank",
+    after: Optional[List[Any]] = None,
+    filters: Optional[Dict[str, Any]] = None,
+) -> Select:
+    fts = table(index.name, column("rowid"), column("rank"))
+    model = index.model
+    query = (
+        select(
+            *(getattr(model, name) for name in index.fields),
+            func.snippet(literal_column(index.name), -1, MARK_START, MARK_END, ELLIPSIS, SNIPPET_TOKENS)
+            .label("snippet"),
+            fts.c.rank,
+        )
+        .select_from(fts)
+        .join(model, model.id == fts.c.rowid)
+        .where(text(f"{index.name} MATCH :match").bindparams(match=match))
+    )
+    for name, value in (filters or {}).items():
+        query = query.where(getattr(model, name) == value)
+    if sort == "recent":
+        if after is not None:
+            query = query.where(fts.c.rowid < after[0])
+        return query.order_by(fts.c.rowid.desc()).limit(limit)
+    if after is not None:
+        rank, rowid = after
+        query = query.where(or_(fts.c.rank > rank, (fts.c.rank == rank) & (fts.c.rowid > rowid)))
+    return query.order_by(fts.c.rank, fts.c.rowid).limit(limit)
+
+async def search(
+    db: AsyncSession,
+    scope: str,
+    q: str,
+    limit: int = 20,
+    sort: str = "rank",
+    after: Optional[List[Any]] = None,
+    **filters,
+) -> Tuple[List[Dict[str, Any]], Optional[List[Any]]]:
+    """
+    One page of hits for `q` in `scope` (a key of INDEXES), best first by
+    bm25 or, with `sort="recent"`, newest first. Each hit carries the index's
+    `fields`, a highlighted `snippet` and a `score` (higher is better).
+
+    Returns the hits and the seek key of the next page (`after`), or None
+    when this was the last page.
+    """
+    if db.get_bind().dialect.name != "sqlite":
+        raise SearchUnavailable("Full-text search requires SQLite FTS5")
+    match = match_expression(q)
+    if not match:
+        return [], None
+    index = INDEXES[scope]
+    rows = (await db.execute(_select_hits(index, match, limit, sort, after, filters))).all()
+    hits = []
+    for row in rows:
+        hit = dict(row._mapping)
+        hit["score"] = float(f"{-hit.pop('rank'):.6g}")  # bm25 is lower-is-better
+        hits.append(hit)
+    if len(rows) < limit:
+        return hits, None
+    last = rows[-1]
+    return hits, [last.id] if sort == "recent" else [last.rank, last.id]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the full-text search indexes.")
+    parser.add_argument("command", choices=["rebuild", "optimize"])
+    args = parser.parse_args()
+
+    from app.db.database import engine, init_db
+
+    init_db()
+    maintain(engine, args.command)
+    print(f"{args.command}: {', '.join(index.name for index in INDEXES.values())}")
@@ -1,15 +1,59 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from dotenv import load_dotenv
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse
 import os
 
-# ------------------ Load environment variables ------------------
-load_dotenv()
-
 # ------------------ Import API Routers ------------------
-from app.routers import patients, doctors, appointments, dashboard, nlp
+# (the `app` package has loaded .env by now, see app/__init__.py)
+from app.routers import patients, doctors, appointments, changes, dashboard, nlp, nlp_jobs, schedule, search
+from app.db import changes as change_log, rollups
+from app.db.database import SessionLocal, async_engine, engine, init_db
+from app.db.pagination import NEXT_CURSOR_HEADER
+from app.services import metrics
+from app.services.nlp_cache import nlp_cache
+from app.services.nlp_jobs import pool_from_env
+from app.services.static_assets import StaticAssets
+
+# ------------------ Time every SQL statement (before startup queries run) ------------------
+metrics.instrument_engine(engine)
+metrics.instrument_engine(async_engine.sync_engine)
+
+# =========================================================
+# Startup: configuration checks, schema and data migrations
+# =========================================================
+# Importing this module does no I/O; everything below runs once per process,
+# before the first request is accepted.
+def prepare_database() -> None:
+    """
+    Create tables, indexes, search indexes and dashboard counters, import
+    legacy results and trim the change log.
+    """
+    init_db()
+    nlp.import_legacy_results()
+    with SessionLocal() as session:
+        rollups.ensure_built(session)
+        change_log.prune(session)
+
+# =========================================================
+# Lifespan: startup, batch workers, pooled upstream and database connections
+# =========================================================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Fail fast on a missing API key, before accepting traffic
+    nlp.check_llm()
+    prepare_database()
+    # Fingerprinted, precompressed frontend (a backend-only deployment has none)
+    app.state.static_assets = StaticAssets.build(frontend_path) if os.path.isdir(frontend_path) else None
+    app.state.nlp_job_pool = pool_from_env(nlp.process_job_item)
+    if app.state.nlp_job_pool is not None:
+        await app.state.nlp_job_pool.start()
+    yield
+    if app.state.nlp_job_pool is not None:
+        await app.state.nlp_job_pool.stop()
+    await nlp.llm.aclose()
+    await async_engine.dispose()
 
 # =========================================================
 # Initialize FastAPI App
@@ -17,7 +61,32 @@ from app.routers import patients, doctors, appointments, dashboard, nlp
 app = FastAPI(
     title="Smart EMR API",
     description="Backend API for managing patients, doctors, appointments, dashboard stats, and AI NLP tasks",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+)
+
+# =========================================================
+# Middleware: gzip for API responses
+# =========================================================
+# Innermost, so CORS and metrics headers are not compressed twice. Bodies
+# smaller than GZIP_MIN_SIZE bytes are not worth it; static assets arrive
+# already compressed and pass through.
+# Server-Sent Events are never compressed: the compressor would hold events
+# back until its buffer fills. Only recent Starlette versions skip
+# text/event-stream themselves, so the streaming endpoints are listed here.
+SSE_PATHS = {"/changes/stream", "/nlp/stream"}
+
+class GZipExceptEventStreams(GZipMiddleware):
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in SSE_PATHS:
+            await self.app(scope, receive, send)
+        else:
+            await super().__call__(scope, receive, send)
+
+app.add_middleware(
+    GZipExceptEventStreams,
+    minimum_size=int(os.getenv("GZIP_MIN_SIZE", "1024")),
+    compresslevel=int(os.getenv("GZIP_LEVEL", "6")),
 )
 
 # =========================================================
@@ -28,37 +97,56 @@ app.add_middleware(
     allow_origins=["*"],  # Use specific origins in production
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "Server-Timing"],
 )
 
+# =========================================================
+# Middleware: per-route latency, queries per request and Server-Timing
+# =========================================================
+# Added last, so it is outermost and times the CORS handling too
+app.add_middleware(metrics.MetricsMiddleware)
+
 # =========================================================
 # Include API Routers
 # =========================================================
 app.include_router(patients.router, tags=["Patients"])
 app.include_router(doctors.router, tags=["Doctors"])
 app.include_router(appointments.router, tags=["Appointments"])
+app.include_router(schedule.router, tags=["Schedule"])
 app.include_router(dashboard.router, tags=["Dashboard"])
+app.include_router(nlp_jobs.router, tags=["NLP Jobs"])
 app.include_router(nlp.router, tags=["NLP"])
+app.include_router(search.router, tags=["Search"])
+app.include_router(changes.router, tags=["Changes"])
 
 # =========================================================
 # Frontend Integration
 # =========================================================
-# Absolute path to the frontend folder (outside backend)
+# Absolute path to the frontend folder (outside backend), independent of the CWD
 frontend_path = os.path.join(
-    os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
     "frontend"
 )
 
-# Mount static files for frontend
-app.mount("/static", StaticFiles(directory=frontend_path), name="static")
+# Frontend files, built at startup (app/services/static_assets.py): hashed
+# names are cached for a year, pages and plain names are revalidated
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def serve_static(path: str, request: Request):
+    assets = getattr(request.app.state, "static_assets", None)
+    response = assets.response(path, request.headers) if assets is not None else None
+    if response is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return response
 
 # Serve the main dashboard page
 @app.get("/", summary="Frontend Dashboard", include_in_schema=False)
-def serve_dashboard():
-    index_file = os.path.join(frontend_path, "index.html")
-    if os.path.exists(index_file):
-        return FileResponse(index_file)
-    return {"error": "Frontend index.html not found"}
+async def serve_dashboard(request: Request):
+    assets = getattr(request.app.state, "static_assets", None)
+    response = assets.response("index.html", request.headers) if assets is not None else None
+    if response is None:
+        return {"error": "Frontend index.html not found"}
+    return response
 
 # =========================================================
 # Health Check Endpoint
@@ -69,3 +157,14 @@ def health():
     Endpoint to verify that the API is running.
     """
     return {"status": "ok", "message": "EMR Backend is running!"}
+
+# =========================================================
+# Metrics Endpoint (Prometheus)
+# =========================================================
+@app.get("/metrics", summary="Performance metrics in Prometheus text format")
+def get_metrics():
+    """
+    Per-route request latency and query counts, SQL latency and slow
+    queries, LLM call latency, failures and tokens, and NLP cache counters.
+    """
+    return PlainTextResponse(metrics.render(llm=nlp.llm, cache=nlp_cache), media_type=metrics.CONTENT_TYPE)
@@ -1,68 +1,91 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
 
-from app.db import crud, schemas, database
+from app.db import async_crud, bulk, crud, models, schemas
+from app.db.database import get_db
+from app.db.pagination import decode_date_id_cursor, set_next_cursor
+from app.db.responses import JSONRowsResponse
 
 router = APIRouter(
     prefix="/appointments",
     tags=["Appointments"],
 )
 
-# Dependency
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # ------------------ CREATE ------------------
 @router.post("/", response_model=schemas.Appointment, summary="Create Appointment")
-def create_appointment(appointment: schemas.AppointmentCreate, db: Session = Depends(get_db)):
-    # Check if patient & doctor exist
-    if not crud.get_patient(db, appointment.patient_id):
-        raise HTTPException(status_code=404, detail="Patient not found")
-    if not crud.get_doctor(db, appointment.doctor_id):
-        raise HTTPException(status_code=404, detail="Doctor not found")
-    return crud.create_appointment(db=db, appointment=appointment)
+async def create_appointment(appointment: schemas.AppointmentCreate, db: AsyncSession = Depends(get_db)):
+    # crud checks that the patient & doctor exist (404 otherwise) and that the
+    # doctor is free for the appointment's duration (409 otherwise)
+    return await async_crud.create_appointment(db=db, appointment=appointment)
 
 # ------------------ READ ALL ------------------
 @router.get("/", response_model=List[schemas.Appointment], summary="Get All Appointments")
-def read_appointments(
+async def read_appointments(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, le=500),
     patient_id: Optional[int] = None,
     doctor_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    after: Optional[str] = Query(None, description="Keyset cursor; pass empty to start, then the X-Next-Cursor header value"),
+    db: AsyncSession = Depends(get_db)
+):
+    # Keyset mode orders by (date, id); skip/limit mode keeps insertion order
+    keyset = after is not None
+    appointments = await async_crud.get_appointment_rows(
+        db=db, skip=skip, limit=limit, patient_id=patient_id, doctor_id=doctor_id,
+        after=decode_date_id_cursor(after), keyset=keyset,
+    )
+    # Plain rows, sent without re-validation (app/db/responses.py)
+    response = JSONRowsResponse(appointments)
+    if keyset:
+        set_next_cursor(response, appointments, limit, "date", "id")
+    return response
+
+# ------------------ BULK IMPORT / EXPORT ------------------
+@router.post("/import", response_model=schemas.BulkImportResult, summary="Bulk import appointments from CSV or NDJSON")
+async def import_appointments(
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = Query(None, description="Body format; inferred from Content-Type when omitted"),
 ):
-    appointments = crud.get_appointments(db=db, skip=skip, limit=limit)
-    if patient_id is not None:
-        appointments = [a for a in appointments if a.patient_id == patient_id]
-    if doctor_id is not None:
-        appointments = [a for a in appointments if a.doctor_id == doctor_id]
-    return appointments
+    """
+    Stream appointments in as CSV (with a header row) or NDJSON. Each record is
+    validated like `POST /appointments/`; invalid rows are reported by row number
+    and skipped while the rest are inserted in batches.
+    Referenced patients and doctors are checked per batch; rows pointing at
+    missing ones are rejected individually.
+    """
+    return await bulk.import_rows(
+        request, bulk.body_format(request, format), schemas.AppointmentCreate, crud.bulk_create_appointments
+    )
+
+@router.get("/export", summary="Export all appointments as CSV or NDJSON")
+def export_appointments(format: Literal["csv", "ndjson"] = Query("csv", description="Output format")):
+    """
+    Stream every appointment ordered by id. The output can be imported again
+    (ids are ignored on import).
+    """
+    return bulk.stream_export(models.Appointment, schemas.AppointmentCreate, format)
 
 # ------------------ READ ONE ------------------
 @router.get("/{appointment_id}", response_model=schemas.Appointment, summary="Get Appointment by ID")
-def read_appointment(appointment_id: int, db: Session = Depends(get_db)):
-    appointment = crud.get_appointment(db=db, appointment_id=appointment_id)
+async def read_appointment(appointment_id: int, db: AsyncSession = Depends(get_db)):
+    appointment = await async_crud.get_appointment(db=db, appointment_id=appointment_id)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
     return appointment
 
 # ------------------ UPDATE ------------------
 @router.put("/{appointment_id}", response_model=schemas.Appointment, summary="Update Appointment")
-def update_appointment(appointment_id: int, appointment: schemas.AppointmentUpdate, db: Session = Depends(get_db)):
-    updated = crud.update_appointment(db=db, appointment_id=appointment_id, appointment=appointment)
+async def update_appointment(appointment_id: int, appointment: schemas.AppointmentUpdate, db: AsyncSession = Depends(get_db)):
+    updated = await async_crud.update_appointment(db=db, appointment_id=appointment_id, appointment=appointment)
     if not updated:
         raise HTTPException(status_code=404, detail="Appointment not found")
     return updated
 
 # ------------------ DELETE ------------------
 @router.delete("/{appointment_id}", summary="Delete Appointment")
-def delete_appointment(appointment_id: int, db: Session = Depends(get_db)):
-    success = crud.delete_appointment(db=db, appointment_id=appointment_id)
+async def delete_appointment(appointment_id: int, db: AsyncSession = Depends(get_db)):
+    success = await async_crud.delete_appointment(db=db, appointment_id=appointment_id)
     if not success:
         raise HTTPException(status_code=404, detail="Appointment not found")
     return {"detail": "Appointment deleted successfully"}
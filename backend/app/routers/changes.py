@@ -0,0 +1,123 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, Literal, Optional
+import json
+
+from app.db import async_crud, database, schemas
+from app.db.database import get_db
+from app.services.change_feed import change_notifier
+
+# =========================================================
+# Router configuration
+# =========================================================
+router = APIRouter(
+    prefix="/changes",
+    tags=["Changes"],
+)
+
+Entity = Literal["patient", "doctor", "appointment"]
+
+SINCE_DESCRIPTION = "Version the client is up to date with; omit to get the current version"
+ENTITY_DESCRIPTION = "Only changes to this entity"
+LIMIT_DESCRIPTION = "Maximum number of log entries per page"
+GONE_DETAIL = "The change log no longer reaches back to this version: reload the lists and start over"
+
+# =========================================================
+# Deltas since a version
+# =========================================================
+@router.get("/", response_model=schemas.ChangePage, summary="Patient, doctor and appointment changes since a version")
+async def get_changes(
+    since: Optional[int] = Query(None, ge=0, description=SINCE_DESCRIPTION),
+    entity: Optional[Entity] = Query(None, description=ENTITY_DESCRIPTION),
+    limit: int = Query(500, ge=1, le=1000, description=LIMIT_DESCRIPTION),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Keep a list up to date without refetching it: take `version` from this
+    endpoint, load the list, then ask for `?since=<version>` and apply the
+    changes in order (`upsert` carries the row as the list returns it,
+    `delete` just the id). Send back the returned `version` next time, at
+    once while `more` is true.
+
+    410 Gone when the log has been pruned past `since`: reload the lists.
+    400 when `since` is ahead of the newest version.
+    """
+    if since is None:
+        return schemas.ChangePage(version=await async_crud.get_current_version(db), changes=[], more=False)
+    try:
+        page = await async_crud.get_changes(db, since, entity, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page is None:
+        raise HTTPException(status_code=410, detail=GONE_DETAIL)
+    return page
+
+# =========================================================
+# Server-push channel (Server-Sent Events)
+# =========================================================
+def sse_event(event: str, data: str, version: Optional[int] = None) -> str:
+    # The id is the version, so a reconnecting EventSource resumes from it (Last-Event-ID)
+    event_id = f"id: {version}\n" if version is not None else ""
+    return f"{event_id}event: {event}\ndata: {data}\n\n"
+
+async def change_events(
+    request: Request, since: Optional[int], entity: Optional[str], limit: int
+) -> AsyncIterator[str]:
+    """
+    `ready` with the starting version, then a `changes` event per page as
+    commits happen. Each read uses a short-lived session, so an idle
+    subscriber holds no connection. `reset` ends the stream when the log no
+    longer reaches back to the client's version, or when that version is
+    ahead of the log (e.g. the database was replaced).
+    """
+    async with database.AsyncSessionLocal() as db:
+        if since is None:
+            since = await async_crud.get_current_version(db)
+    yield sse_event("ready", json.dumps({"version": since}), since)
+
+    while not await request.is_disconnected():
+        # Read before reading the log, so a commit during the read is not missed
+        generation = change_notifier.generation
+        try:
+            async with database.AsyncSessionLocal() as db:
+                page = await async_crud.get_changes(db, since, entity, limit)
+        except ValueError as e:
+            yield sse_event("reset", json.dumps({"detail": str(e)}))
+            return
+        if page is None:
+            yield sse_event("reset", json.dumps({"detail": GONE_DETAIL}))
+            return
+        if page.changes:
+            yield sse_event("changes", page.model_dump_json(), page.version)
+        since = page.version
+        if page.more:
+            continue
+        if not await change_notifier.wait(generation):
+            yield ": keepalive\n\n"  # also re-reads the log, for writes by other processes
+
+@router.get("/stream", summary="Stream patient, doctor and appointment changes as Server-Sent Events")
+async def stream_changes(
+    request: Request,
+    since: Optional[int] = Query(None, ge=0, description=SINCE_DESCRIPTION),
+    entity: Optional[Entity] = Query(None, description=ENTITY_DESCRIPTION),
+    limit: int = Query(500, ge=1, le=1000, description=LIMIT_DESCRIPTION),
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Push version of `GET /changes/`: `text/event-stream` with a `ready`
+    event, then `changes` events holding the same pages, sent as soon as a
+    write commits. Event ids are versions, so a reconnecting `EventSource`
+    continues where it left off. On `reset` the client reloads its lists
+    and opens a new stream without `since`.
+    """
+    if last_event_id:
+        try:
+            since = int(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+    return StreamingResponse(
+        change_events(request, since, entity, limit),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
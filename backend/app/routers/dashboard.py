@@ -1,8 +1,8 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
 from typing import Dict
-from app.db import models, database
+from app.db import database, models, rollups
+from app.services.dashboard_cache import dashboard_cache, etag_matches
 
 # =========================================================
 # Router configuration
@@ -12,17 +12,52 @@ router = APIRouter(
     tags=["Dashboard"]
 )
 
-# ---------------- Database Dependency ----------------
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# ---------------- Dashboard Computation ----------------
+def compute_dashboard_stats(db: Session) -> Dict:
+    # Every figure comes from the incrementally maintained rollup counters
+    # (app/db/rollups.py), so the cost does not grow with the appointment count.
+    stats = rollups.read(
+        db,
+        rollups.TOTALS,
+        rollups.APPOINTMENTS_BY_DOCTOR,
+        rollups.PATIENTS_BY_DOCTOR,
+        rollups.APPOINTMENTS_BY_MONTH,
+    )
+    totals = stats[rollups.TOTALS]
+
+    # ---------------- Per-Doctor Counts ----------------
+    # Doctors without appointments have no counter row and report 0
+    doctors = db.query(models.Doctor.id, models.Doctor.name).all()
+    appointments_per_doctor_dict = {
+        name: stats[rollups.APPOINTMENTS_BY_DOCTOR].get(str(doctor_id), 0) for doctor_id, name in doctors
+    }
+    patients_per_doctor_dict = {
+        name: stats[rollups.PATIENTS_BY_DOCTOR].get(str(doctor_id), 0) for doctor_id, name in doctors
+    }
+
+    # ---------------- Monthly Appointments ----------------
+    monthly_appointments_dict = dict(sorted(stats[rollups.APPOINTMENTS_BY_MONTH].items()))
+
+    # ---------------- Return Dashboard Data ----------------
+    return {
+        "total_patients": totals.get("patients", 0),
+        "total_doctors": totals.get("doctors", 0),
+        "total_appointments": totals.get("appointments", 0),
+        "appointments_per_doctor": appointments_per_doctor_dict,
+        "patients_per_doctor": patients_per_doctor_dict,
+        "monthly_appointments": monthly_appointments_dict
+    }
+
+async def load_dashboard_stats() -> Dict:
+    # Its own session, not the request's: the computation is shared by
+    # coalesced requests and finishes even if the request that started it is cancelled.
+    # The rollup reads are sync code, run on the async session's connection.
+    async with database.AsyncSessionLocal() as db:
+        return await db.run_sync(compute_dashboard_stats)
 
 # ---------------- Dashboard Endpoint ----------------
 @router.get("/", summary="Get EMR Dashboard statistics")
-def get_dashboard_stats(db: Session = Depends(get_db)) -> Dict:
+async def get_dashboard_stats(request: Request, response: Response):
     """
     Returns overall statistics for the EMR system:
     - Total patients
@@ -31,51 +66,19 @@ def get_dashboard_stats(db: Session = Depends(get_db)) -> Dict:
     - Appointments per doctor
     - Patients per doctor
     - Monthly appointments count
-    """
-    # ---------------- Total Counts ----------------
-    total_patients = db.query(func.count(models.Patient.id)).scalar()
-    total_doctors = db.query(func.count(models.Doctor.id)).scalar()
-    total_appointments = db.query(func.count(models.Appointment.id)).scalar()
 
-    # ---------------- Appointments per Doctor ----------------
-    appointments_per_doctor = (
-        db.query(models.Doctor.name, func.count(models.Appointment.id))
-        .join(models.Appointment, models.Doctor.id == models.Appointment.doctor_id, isouter=True)
-        .group_by(models.Doctor.id)
-        .all()
-    )
-    appointments_per_doctor_dict = {name: count for name, count in appointments_per_doctor}
-
-    # ---------------- Patients per Doctor ----------------
-    patients_per_doctor = (
-        db.query(models.Doctor.name, func.count(func.distinct(models.Appointment.patient_id)))
-        .join(models.Appointment, models.Doctor.id == models.Appointment.doctor_id, isouter=True)
-        .group_by(models.Doctor.id)
-        .all()
-    )
-    patients_per_doctor_dict = {name: count for name, count in patients_per_doctor}
-
-    # ---------------- Monthly Appointments ----------------
-    monthly_appointments = (
-        db.query(
-            extract("year", models.Appointment.date).label("year"),
-            extract("month", models.Appointment.date).label("month"),
-            func.count(models.Appointment.id)
-        )
-        .group_by("year", "month")
-        .order_by("year", "month")
-        .all()
-    )
-    monthly_appointments_dict = {
-        f"{int(year)}-{int(month):02d}": count for year, month, count in monthly_appointments
-    }
+    Served from a short-lived cache that crud writes invalidate. Send the
+    returned `ETag` back as `If-None-Match` to get `304 Not Modified` while
+    nothing has changed.
+    """
+    entry = await dashboard_cache.get_or_compute("dashboard", load_dashboard_stats)
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return entry.payload
 
-    # ---------------- Return Dashboard Data ----------------
-    return {
-        "total_patients": total_patients,
-        "total_doctors": total_doctors,
-        "total_appointments": total_appointments,
-        "appointments_per_doctor": appointments_per_doctor_dict,
-        "patients_per_doctor": patients_per_doctor_dict,
-        "monthly_appointments": monthly_appointments_dict
-    }
+# ---------------- Cache Stats Endpoint ----------------
+@router.get("/cache/stats", summary="Dashboard cache hit/miss counters")
+def get_dashboard_cache_stats():
+    return dashboard_cache.snapshot()
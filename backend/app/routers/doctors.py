@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
 
-from app.db import crud, schemas, database
+from app.db import async_crud, bulk, crud, models, schemas
+from app.db.database import get_db
+from app.db.pagination import decode_id_cursor, set_next_cursor
+from app.db.responses import JSONRowsResponse
 
 # =========================================================
 # Router configuration
@@ -12,63 +15,85 @@ router = APIRouter(
     tags=["Doctors"],
 )
 
-# Dependency to get DB session
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # =========================================================
 # CREATE
 # =========================================================
 @router.post("/", response_model=schemas.Doctor, summary="Create a new doctor")
-def create_doctor(
+async def create_doctor(
     doctor: schemas.DoctorCreate, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new doctor record.
     """
-    return crud.create_doctor(db=db, doctor=doctor)
+    return await async_crud.create_doctor(db=db, doctor=doctor)
 
 # =========================================================
 # READ ALL
 # =========================================================
 @router.get("/", response_model=List[schemas.Doctor], summary="List all doctors")
-def read_doctors(
+async def read_doctors(
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, le=500, description="Maximum number of records to return"),
     name: Optional[str] = Query(None, description="Filter doctors by name"),
     specialty: Optional[str] = Query(None, description="Filter doctors by specialty"),
-    db: Session = Depends(get_db)
+    after: Optional[str] = Query(None, description="Keyset cursor; pass empty to start, then the X-Next-Cursor header value"),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Retrieve all doctors with optional pagination and filtering by name or specialty.
+
+    Without `after`, pages use skip/limit. With `after`, pages seek on `id` and the
+    cursor for the following page is returned in the `X-Next-Cursor` header.
+    """
+    keyset = after is not None
+    doctors = await async_crud.get_doctor_rows(
+        db=db, skip=skip, limit=limit, name=name, specialty=specialty,
+        after=decode_id_cursor(after), keyset=keyset,
+    )
+    # Plain rows, sent without re-validation (app/db/responses.py)
+    response = JSONRowsResponse(doctors)
+    if keyset:
+        set_next_cursor(response, doctors, limit, "id")
+    return response
+
+# =========================================================
+# BULK IMPORT / EXPORT
+# =========================================================
+@router.post("/import", response_model=schemas.BulkImportResult, summary="Bulk import doctors from CSV or NDJSON")
+async def import_doctors(
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = Query(None, description="Body format; inferred from Content-Type when omitted"),
+):
+    """
+    Stream doctors in as CSV (with a header row) or NDJSON. Each record is
+    validated like `POST /doctors/`; invalid rows are reported by row number
+    and skipped while the rest are inserted in batches.
+    """
+    return await bulk.import_rows(
+        request, bulk.body_format(request, format), schemas.DoctorCreate, crud.bulk_create_doctors
+    )
+
+@router.get("/export", summary="Export all doctors as CSV or NDJSON")
+def export_doctors(format: Literal["csv", "ndjson"] = Query("csv", description="Output format")):
+    """
+    Stream every doctor ordered by id. The output can be imported again
+    (ids are ignored on import).
     """
-    doctors = crud.get_doctors(db=db, skip=skip, limit=limit)
-    
-    # Filter in memory for optional search
-    if name:
-        doctors = [doc for doc in doctors if name.lower() in doc.name.lower()]
-    if specialty:
-        doctors = [doc for doc in doctors if specialty.lower() in doc.specialty.lower()]
-    
-    return doctors
+    return bulk.stream_export(models.Doctor, schemas.DoctorCreate, format)
 
 # =========================================================
 # READ ONE
 # =========================================================
 @router.get("/{doctor_id}", response_model=schemas.Doctor, summary="Get doctor by ID")
-def read_doctor(
+async def read_doctor(
     doctor_id: int, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Retrieve a single doctor by ID.
     """
-    db_doctor = crud.get_doctor(db=db, doctor_id=doctor_id)
+    db_doctor = await async_crud.get_doctor(db=db, doctor_id=doctor_id)
     if not db_doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
     return db_doctor
@@ -77,15 +102,15 @@ def read_doctor(
 # UPDATE
 # =========================================================
 @router.put("/{doctor_id}", response_model=schemas.Doctor, summary="Update doctor")
-def update_doctor(
+async def update_doctor(
     doctor_id: int, 
     updated_data: schemas.DoctorUpdate, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Update a doctor's information. Only provided fields will be updated.
     """
-    db_doctor = crud.update_doctor(db=db, doctor_id=doctor_id, doctor=updated_data)
+    db_doctor = await async_crud.update_doctor(db=db, doctor_id=doctor_id, doctor=updated_data)
     if not db_doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
     return db_doctor
@@ -94,14 +119,14 @@ def update_doctor(
 # DELETE
 # =========================================================
 @router.delete("/{doctor_id}", summary="Delete doctor")
-def delete_doctor(
+async def delete_doctor(
     doctor_id: int, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Delete a doctor by ID.
     """
-    success = crud.delete_doctor(db=db, doctor_id=doctor_id)
+    success = await async_crud.delete_doctor(db=db, doctor_id=doctor_id)
     if not success:
         raise HTTPException(status_code=404, detail="Doctor not found")
     return {"message": "Doctor deleted successfully"}
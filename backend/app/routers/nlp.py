@@ -1,16 +1,30 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Literal
-import os
-import requests
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Literal, Optional, Tuple
+import asyncio
 import json
-from dotenv import load_dotenv
+import os
+
+from app.db import async_crud, crud, database
+from app.db.database import get_db
+from app.db.pagination import decode_id_cursor, encode_cursor
+from app.services.llm_providers import NoProviderAvailable, llm_router
+from app.services.nlp_cache import make_key, nlp_cache
 
-# ------------------- Load environment -------------------
-load_dotenv()
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-if not GOOGLE_API_KEY:
-    raise RuntimeError("GOOGLE_API_KEY not found in environment variables.")
+# ------------------- LLM Providers -------------------
+# Gemini and/or OpenAI depending on which API keys are set;
+# NLP_LLM_BACKEND=fake answers every prompt locally (offline development and tests).
+# Built on first use; the app's startup calls check_llm() to fail fast instead.
+llm = llm_router
+
+def check_llm() -> None:
+    if not llm.providers:
+        raise RuntimeError("No LLM provider configured: set GOOGLE_API_KEY or OPENAI_API_KEY.")
 
 # ------------------- FastAPI Router -------------------
 router = APIRouter(
@@ -19,20 +33,35 @@ router = APIRouter(
 )
 
 # ------------------- Request Model -------------------
+TaskName = Literal[
+    "summarize", 
+    "keywords", 
+    "insights", 
+    "diagnosis", 
+    "treatment_plan", 
+    "risk_factors", 
+    "red_flags", 
+    "translate", 
+    "sentiment", 
+    "ner"
+]
+
+ProviderName = Literal["gemini", "openai", "fake"]
+
 class NLPRequest(BaseModel):
     text: str
-    task: Literal[
-        "summarize", 
-        "keywords", 
-        "insights", 
-        "diagnosis", 
-        "treatment_plan", 
-        "risk_factors", 
-        "red_flags", 
-        "translate", 
-        "sentiment", 
-        "ner"
-    ]
+    task: TaskName
+    # Pin a provider (and optionally one of its models); default routes to the fastest healthy one
+    provider: Optional[ProviderName] = None
+    model: Optional[str] = None
+
+class NLPMultiRequest(BaseModel):
+    text: str
+    tasks: List[TaskName] = Field(..., min_length=1)
+    # fanout: one concurrent LLM call per task; fused: one JSON prompt for all tasks
+    mode: Literal["fanout", "fused"] = "fanout"
+    provider: Optional[ProviderName] = None
+    model: Optional[str] = None
 
 # ------------------- Response Model -------------------
 class NLPResponse(BaseModel):
@@ -40,77 +69,295 @@ class NLPResponse(BaseModel):
     input_text: str
     result: str
 
+class NLPMultiResponse(BaseModel):
+    input_text: str
+    results: Dict[str, str]
+    cached: List[str]
+
 # ------------------- Storage -------------------
-RESULTS_FILE = "nlp_results.json"
-
-def save_result(result: dict):
-    """Append result to JSON file."""
-    if os.path.exists(RESULTS_FILE):
-        with open(RESULTS_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    else:
-        data = []
-    data.append(result)
-    with open(RESULTS_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
-
-def load_results():
-    """Load saved results."""
-    if not os.path.exists(RESULTS_FILE):
-        return []
-    with open(RESULTS_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+# Results live in the `nlp_results` table; this file is the pre-table store,
+# imported once at startup by `import_legacy_results`. Found next to the app,
+# not in the working directory.
+LEGACY_RESULTS_FILE = os.getenv("NLP_LEGACY_RESULTS_FILE", os.path.join(database.BACKEND_DIR, "nlp_results.json"))
+
+def save_result(db: Session, result: NLPResponse):
+    """Append result to the NLP result store."""
+    crud.create_nlp_result(db, task=result.task, input_text=result.input_text, result=result.result)
+
+def serialize_result(row) -> dict:
+    return {
+        "id": row.id,
+        "task": row.task,
+        "input_text": row.input_text,
+        "result": row.result,
+        "created_at": row.created_at.isoformat(),
+    }
+
+def import_legacy_results():
+    """Move results from the old JSON file into the table (no-op once imported)."""
+    db = database.SessionLocal()
+    try:
+        return crud.import_legacy_nlp_results(db, LEGACY_RESULTS_FILE)
+    finally:
+        db.close()
+
+# ------------------- Prompts -------------------
+# Bump PROMPT_VERSION whenever a template changes so cached results are not reused.
+PROMPT_VERSION = "1"
+
+TASK_INSTRUCTIONS = {
+    "summarize": "Summarize the following medical note concisely",
+    "keywords": "Extract all important medical keywords from this medical note",
+    "insights": "Analyze the following medical note and provide actionable insights or recommendations",
+    "diagnosis": "Based on the following medical note, predict possible diagnoses",
+    "treatment_plan": "Provide a possible treatment plan for the following note",
+    "risk_factors": "Identify all risk factors from this patient's medical note",
+    "red_flags": "Identify any urgent red flags in this note",
+    "translate": "Translate the following medical note into Tamil",
+    "sentiment": "Analyze the sentiment (positive, negative, urgent, neutral) of this note",
+    "ner": "Extract structured medical entities (diseases, symptoms, drugs, measurements) from this note"
+}
+TASK_PROMPTS = {task: instruction + ":\n{text}" for task, instruction in TASK_INSTRUCTIONS.items()}
+
+# Fused results come from a different prompt, so they are cached under their own version
+FUSED_PROMPT_VERSION = f"{PROMPT_VERSION}-fused"
+FUSED_PROMPT = (
+    "Analyze the medical note below. Respond with a single JSON object that has exactly "
+    "these keys, each mapped to a plain-text answer for its instruction:\n{sections}\n\n"
+    "Medical note:\n{text}"
+)
+
+def build_fused_prompt(tasks: List[str], text: str) -> str:
+    sections = "\n".join(f'- "{task}": {TASK_INSTRUCTIONS[task]}' for task in tasks)
+    return FUSED_PROMPT.format(sections=sections, text=text)
 
 # ------------------- Helper Function -------------------
-def call_gemini(prompt: str, model: str = "gemini-1.5-flash") -> str:
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
-    headers = {"Content-Type": "application/json"}
-    payload = {"contents": [{"parts": [{"text": prompt}]}]}
-    params = {"key": GOOGLE_API_KEY}
+def model_label(provider: Optional[str], model: Optional[str]) -> str:
+    """Cache-key component naming who answers: `auto/default` unless pinned."""
+    return f"{provider or 'auto'}/{model or 'default'}"
 
-    response = requests.post(url, headers=headers, json=payload, params=params)
+async def call_llm(prompt: str, provider: Optional[str] = None, model: Optional[str] = None,
+                   json_output: bool = False) -> str:
+    return await llm.generate(prompt, provider=provider, model=model, json_output=json_output)
 
-    if response.status_code != 200:
-        raise RuntimeError(f"Gemini API error: {response.text}")
+# ------------------- Cache / Store Steps -------------------
+# The async endpoint opens a short session per DB step instead of holding a
+# request-scoped one, so no pooled connection is checked out while the
+# upstream LLM call is awaited.
 
-    data = response.json()
-    try:
-        return data["candidates"][0]["content"]["parts"][0]["text"].strip()
-    except (KeyError, IndexError):
-        raise RuntimeError(f"Unexpected Gemini response: {data}")
+def lookup_cached(cache_key: str) -> Optional[str]:
+    with database.SessionLocal() as db:
+        return nlp_cache.get(db, cache_key)
 
-# ------------------- NLP POST Endpoint -------------------
-@router.post("/", response_model=NLPResponse, summary="Process medical text using Gemini AI")
-def process_text(request: NLPRequest):
-    task_prompts = {
-        "summarize": f"Summarize the following medical note concisely:\n{request.text}",
-        "keywords": f"Extract all important medical keywords from this medical note:\n{request.text}",
-        "insights": f"Analyze the following medical note and provide actionable insights or recommendations:\n{request.text}",
-        "diagnosis": f"Based on the following medical note, predict possible diagnoses:\n{request.text}",
-        "treatment_plan": f"Provide a possible treatment plan for the following note:\n{request.text}",
-        "risk_factors": f"Identify all risk factors from this patient's medical note:\n{request.text}",
-        "red_flags": f"Identify any urgent red flags in this note:\n{request.text}",
-        "translate": f"Translate the following medical note into Tamil:\n{request.text}",
-        "sentiment": f"Analyze the sentiment (positive, negative, urgent, neutral) of this note:\n{request.text}",
-        "ner": f"Extract structured medical entities (diseases, symptoms, drugs, measurements) from this note:\n{request.text}"
-    }
+def store_result(result: NLPResponse, cache_key: Optional[str] = None, label: str = model_label(None, None)) -> None:
+    """Save an executed result, and cache it when `cache_key` is given (a miss)."""
+    with database.SessionLocal() as db:
+        if cache_key is not None:
+            nlp_cache.put(db, cache_key, result.task, label, result.result)
+        save_result(db, result)
+
+async def process_job_item(task: str, text: str) -> str:
+    """Batch worker processor: same path as POST /nlp/, including cache and store."""
+    result, _ = await run_task(task, text)
+    return result.result
 
-    prompt = task_prompts.get(request.task)
-    if not prompt:
+async def run_task(task: str, text: str, provider: Optional[str] = None,
+                   model: Optional[str] = None) -> Tuple[NLPResponse, bool]:
+    """Answer one task from the cache or an LLM and store it; returns (result, cache hit)."""
+    # Identical (task, prompt, model, text) calls are answered from the cache
+    label = model_label(provider, model)
+    cache_key = make_key(task, PROMPT_VERSION, label, text)
+    # Blocking DB work runs in the threadpool; only the upstream call is awaited here
+    cached = await run_in_threadpool(lookup_cached, cache_key)
+    result = NLPResponse(
+        task=task,
+        input_text=text,
+        result=cached if cached is not None else await call_llm(TASK_PROMPTS[task].format(text=text), provider, model),
+    )
+    await run_in_threadpool(store_result, result, None if cached is not None else cache_key, label)
+    return result, cached is not None
+
+async def run_fused(tasks: List[str], text: str, provider: Optional[str] = None,
+                    model: Optional[str] = None) -> Dict[str, Tuple[str, bool]]:
+    """
+    Answer every uncached task with one structured-output call. Sections the
+    model leaves out are retried individually so every task gets an answer.
+    """
+    label = model_label(provider, model)
+    keys = {task: make_key(task, FUSED_PROMPT_VERSION, label, text) for task in tasks}
+    outcomes: Dict[str, Tuple[str, bool]] = {}
+    for task in tasks:
+        cached = await run_in_threadpool(lookup_cached, keys[task])
+        if cached is not None:
+            outcomes[task] = (cached, True)
+
+    missing = [task for task in tasks if task not in outcomes]
+    if missing:
+        raw = await call_llm(build_fused_prompt(missing, text), provider, model, json_output=True)
+        try:
+            sections = json.loads(raw)
+        except ValueError:
+            sections = {}
+        if not isinstance(sections, dict):
+            sections = {}
+        for task in missing:
+            value = sections.get(task)
+            if value is None:
+                continue
+            value = value if isinstance(value, str) else json.dumps(value)
+            outcomes[task] = (value, False)
+            await run_in_threadpool(store_result, NLPResponse(task=task, input_text=text, result=value), keys[task], label)
+
+    leftovers = [task for task in tasks if task not in outcomes]
+    for task, (result, hit) in zip(leftovers, await asyncio.gather(*(run_task(t, text, provider, model) for t in leftovers))):
+        outcomes[task] = (result.result, hit)
+    return outcomes
+
+# ------------------- NLP POST Endpoint -------------------
+@router.post("/", response_model=NLPResponse, summary="Process medical text using an LLM")
+async def process_text(request: NLPRequest, response: Response):
+    template = TASK_PROMPTS.get(request.task)
+    if not template:
         raise HTTPException(status_code=400, detail="Invalid task type.")
 
     try:
-        result_text = call_gemini(prompt)
-        result = NLPResponse(task=request.task, input_text=request.text, result=result_text)
-        save_result(result.dict())  # Save executed result
+        result, hit = await run_task(request.task, request.text, request.provider, request.model)
+        response.headers["X-Cache"] = "HIT" if hit else "MISS"
         return result
+    except NoProviderAvailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+# ------------------- NLP Streaming Endpoint -------------------
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_task_events(task: str, text: str, provider: Optional[str] = None,
+                             model: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Relay LLM output as `token` events, then a `done` event with the full
+    result once it has been stored. A cache hit is sent as a single token.
+    Failures become an `error` event, since the status line is already sent.
+    """
+    try:
+        label = model_label(provider, model)
+        cache_key = make_key(task, PROMPT_VERSION, label, text)
+        cached = await run_in_threadpool(lookup_cached, cache_key)
+        if cached is not None:
+            chunks = [cached]
+            yield sse_event("token", {"text": cached})
+        else:
+            chunks = []
+            async for chunk in llm.stream(TASK_PROMPTS[task].format(text=text), provider, model):
+                chunks.append(chunk)
+                yield sse_event("token", {"text": chunk})
+
+        result = NLPResponse(task=task, input_text=text, result="".join(chunks).strip())
+        await run_in_threadpool(store_result, result, None if cached is not None else cache_key, label)
+        yield sse_event("done", dict(result.model_dump(), cached=cached is not None))
+    except Exception as e:
+        yield sse_event("error", {"detail": str(e)})
+
+@router.post("/stream", summary="Process medical text, streaming tokens as Server-Sent Events")
+async def process_text_stream(request: NLPRequest):
+    """
+    Same as `POST /nlp/` but the answer arrives incrementally as
+    `text/event-stream`: `token` events with text chunks, then `done`.
+    """
+    return StreamingResponse(
+        stream_task_events(request.task, request.text, request.provider, request.model),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# ------------------- NLP Multi-Task Endpoint -------------------
+@router.post("/multi", response_model=NLPMultiResponse, summary="Run several NLP tasks on one note")
+async def process_text_multi(request: NLPMultiRequest):
+    """
+    Run every requested task on the same note in one round trip. `fanout`
+    issues the per-task calls concurrently; `fused` asks for all sections in
+    a single JSON response. Each task's result is stored separately.
+    """
+    tasks = list(dict.fromkeys(request.tasks))
+    try:
+        if request.mode == "fused":
+            outcomes = await run_fused(tasks, request.text, request.provider, request.model)
+        else:
+            finished = await asyncio.gather(
+                *(run_task(task, request.text, request.provider, request.model) for task in tasks)
+            )
+            outcomes = {result.task: (result.result, hit) for result, hit in finished}
+    except NoProviderAvailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except RuntimeError as e:
         raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+    return NLPMultiResponse(
+        input_text=request.text,
+        results={task: outcomes[task][0] for task in tasks},
+        cached=[task for task in tasks if outcomes[task][1]],
+    )
+
+# ------------------- Cache Stats Endpoint -------------------
+@router.get("/cache/stats", summary="NLP response cache hit/miss counters")
+def get_cache_stats():
+    return nlp_cache.snapshot()
+
+# ------------------- Provider Stats Endpoint -------------------
+@router.get("/providers", summary="LLM provider health, call counts and latency histograms")
+def get_provider_stats():
+    return llm.snapshot()
+
 # ------------------- NLP GET Endpoint -------------------
-@router.get("/", summary="Fetch all saved NLP results")
-def get_all_results():
-    results = load_results()
-    return {"count": len(results), "results": results}
+EXPORT_BATCH_SIZE = 500
+
+def stream_results_ndjson(task: Optional[str], start: Optional[datetime], end: Optional[datetime]):
+    """
+    Yield matching results as NDJSON, one keyset batch at a time, so memory
+    stays constant however large the history is. Uses its own session because
+    the body is produced after the request dependencies have been torn down.
+    """
+    db = database.SessionLocal()
+    try:
+        after = None
+        while True:
+            rows = crud.get_nlp_results(db, task=task, start=start, end=end, after=after, limit=EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            yield "".join(json.dumps(serialize_result(row)) + "\n" for row in rows)
+            after = rows[-1].id
+            db.expunge_all()
+    finally:
+        db.close()
+
+@router.get("/", summary="Fetch saved NLP results")
+async def get_all_results(
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of results per page"),
+    after: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    task: Optional[str] = Query(None, description="Only results for this task"),
+    start: Optional[datetime] = Query(None, description="Only results created at or after this time"),
+    end: Optional[datetime] = Query(None, description="Only results created before this time"),
+    format: Literal["json", "ndjson"] = Query("json", description="'ndjson' streams every matching result"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Page through saved results oldest first. `format=ndjson` ignores the paging
+    parameters and streams the whole filtered history as newline-delimited JSON.
+    """
+    if format == "ndjson":
+        return StreamingResponse(
+            stream_results_ndjson(task, start, end),
+            media_type="application/x-ndjson",
+        )
+
+    rows = await async_crud.get_nlp_results(
+        db, task=task, start=start, end=end, after=decode_id_cursor(after), limit=limit
+    )
+    results = [serialize_result(row) for row in rows]
+    next_cursor = encode_cursor([rows[-1].id]) if len(rows) == limit else None
+    return {"count": len(results), "results": results, "next_cursor": next_cursor}
@@ -0,0 +1,125 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import BaseModel, Field, model_validator
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import List, Optional
+
+from app.db import async_crud
+from app.db.database import get_db
+from app.db.pagination import decode_id_cursor, encode_cursor
+from app.db.schemas import LocalDateTime
+from app.routers.nlp import TaskName
+
+# =========================================================
+# Router configuration
+# =========================================================
+router = APIRouter(
+    prefix="/nlp/jobs",
+    tags=["NLP Jobs"],
+)
+
+# =========================================================
+# Schemas
+# =========================================================
+class JobItemIn(BaseModel):
+    text: str
+    task: TaskName
+
+class AppointmentQuery(BaseModel):
+    """Selects appointment notes to analyze; appointments without notes are skipped."""
+    patient_id: Optional[int] = None
+    doctor_id: Optional[int] = None
+    start: Optional[LocalDateTime] = None
+    end: Optional[LocalDateTime] = None
+
+class JobCreate(BaseModel):
+    """Either explicit `items`, or an `appointments` query plus the `task` to run on each note."""
+    items: Optional[List[JobItemIn]] = None
+    appointments: Optional[AppointmentQuery] = None
+    task: Optional[TaskName] = None
+
+    @model_validator(mode="after")
+    def check_source(self):
+        if (self.items is None) == (self.appointments is None):
+            raise ValueError("Provide exactly one of 'items' or 'appointments'")
+        if self.appointments is not None and self.task is None:
+            raise ValueError("'task' is required with 'appointments'")
+        return self
+
+class Job(BaseModel):
+    id: int
+    status: str
+    total: int
+    completed: int
+    failed: int
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class JobItem(BaseModel):
+    id: int
+    task: str
+    appointment_id: Optional[int] = None
+    status: str
+    attempts: int
+    result: Optional[str] = None
+    error: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class JobItemPage(BaseModel):
+    items: List[JobItem]
+    next_cursor: Optional[str] = None
+
+# =========================================================
+# SUBMIT
+# =========================================================
+@router.post("/", response_model=Job, status_code=202, summary="Submit a batch NLP job")
+async def create_job(job: JobCreate, request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Enqueue a batch of NLP work. Items are persisted before this returns and
+    processed by the background worker pool; poll the job for progress.
+    """
+    if job.items is not None:
+        items = [{"task": item.task, "text": item.text} for item in job.items]
+    else:
+        q = job.appointments
+        notes = await async_crud.get_appointment_notes(
+            db, patient_id=q.patient_id, doctor_id=q.doctor_id, start=q.start, end=q.end
+        )
+        items = [{"task": job.task, "text": text, "appointment_id": appointment_id} for appointment_id, text in notes]
+
+    db_job = await async_crud.create_nlp_job(db, items)
+    pool = getattr(request.app.state, "nlp_job_pool", None)
+    if pool is not None:
+        pool.notify()
+    return db_job
+
+# =========================================================
+# PROGRESS
+# =========================================================
+@router.get("/{job_id}", response_model=Job, summary="Get batch job progress")
+async def read_job(job_id: int, db: AsyncSession = Depends(get_db)):
+    db_job = await async_crud.get_nlp_job(db, job_id)
+    if not db_job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return db_job
+
+# =========================================================
+# RESULTS
+# =========================================================
+@router.get("/{job_id}/items", response_model=JobItemPage, summary="List a batch job's items and results")
+async def read_job_items(
+    job_id: int,
+    limit: int = Query(100, ge=1, le=500),
+    after: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    db: AsyncSession = Depends(get_db),
+):
+    if not await async_crud.get_nlp_job(db, job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    items = await async_crud.get_nlp_job_items(db, job_id, after=decode_id_cursor(after), limit=limit)
+    next_cursor = encode_cursor([items[-1].id]) if len(items) == limit else None
+    return {"items": items, "next_cursor": next_cursor}
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
 
-from app.db import crud, schemas, database
+from app.db import async_crud, bulk, crud, models, schemas
+from app.db.database import get_db
+from app.db.pagination import decode_id_cursor, set_next_cursor
+from app.db.responses import JSONRowsResponse
 
 # =========================================================
 # Router configuration
@@ -12,58 +15,101 @@ router = APIRouter(
     tags=["Patients"],
 )
 
-# =========================================================
-# Dependency to get DB session
-# =========================================================
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # =========================================================
 # CREATE
 # =========================================================
 @router.post("/", response_model=schemas.Patient, summary="Create a new patient")
-def create_patient(patient: schemas.PatientCreate, db: Session = Depends(get_db)):
+async def create_patient(patient: schemas.PatientCreate, db: AsyncSession = Depends(get_db)):
     """
     Create a new patient record.
     """
-    return crud.create_patient(db=db, patient=patient)
+    return await async_crud.create_patient(db=db, patient=patient)
 
 # =========================================================
 # READ ALL (with optional filters)
 # =========================================================
 @router.get("/", response_model=List[schemas.Patient], summary="List patients")
-def list_patients(
+async def list_patients(
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, le=500, description="Maximum number of records to return"),
     name: Optional[str] = Query(None, description="Filter patients by name"),
     age: Optional[int] = Query(None, description="Filter patients by age"),
-    db: Session = Depends(get_db)
+    after: Optional[str] = Query(None, description="Keyset cursor; pass empty to start, then the X-Next-Cursor header value"),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Retrieve a list of patients with optional pagination and filtering by name or age.
+
+    Without `after`, pages use skip/limit. With `after`, pages seek on `id` and the
+    cursor for the following page is returned in the `X-Next-Cursor` header.
     """
-    patients = crud.get_patients(db=db, skip=skip, limit=limit)
+    keyset = after is not None
+    patients = await async_crud.get_patient_rows(
+        db=db, skip=skip, limit=limit, name=name, age=age,
+        after=decode_id_cursor(after), keyset=keyset,
+    )
+    # Plain rows, sent without re-validation (app/db/responses.py)
+    response = JSONRowsResponse(patients)
+    if keyset:
+        set_next_cursor(response, patients, limit, "id")
+    return response
 
-    if name:
-        patients = [p for p in patients if name.lower() in p.name.lower()]
-    if age is not None:
-        patients = [p for p in patients if p.age == age]
+# =========================================================
+# BULK IMPORT / EXPORT
+# =========================================================
+@router.post("/import", response_model=schemas.BulkImportResult, summary="Bulk import patients from CSV or NDJSON")
+async def import_patients(
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = Query(None, description="Body format; inferred from Content-Type when omitted"),
+):
+    """
+    Stream patients in as CSV (with a header row) or NDJSON. Each record is
+    validated like `POST /patients/`; invalid rows are reported by row number
+    and skipped while the rest are inserted in batches.
+    """
+    return await bulk.import_rows(
+        request, bulk.body_format(request, format), schemas.PatientCreate, crud.bulk_create_patients
+    )
 
-    return patients
+@router.get("/export", summary="Export all patients as CSV or NDJSON")
+def export_patients(format: Literal["csv", "ndjson"] = Query("csv", description="Output format")):
+    """
+    Stream every patient ordered by id. The output can be imported again
+    (ids are ignored on import).
+    """
+    return bulk.stream_export(models.Patient, schemas.PatientCreate, format)
 
 # =========================================================
 # READ ONE
 # =========================================================
 @router.get("/{patient_id}", response_model=schemas.Patient, summary="Get patient by ID")
-def get_patient(patient_id: int, db: Session = Depends(get_db)):
+async def get_patient(patient_id: int, db: AsyncSession = Depends(get_db)):
     """
     Retrieve a single patient by their ID.
     """
-    patient = crud.get_patient(db=db, patient_id=patient_id)
+    patient = await async_crud.get_patient(db=db, patient_id=patient_id)
+    if not patient:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    return patient
+
+# =========================================================
+# TIMELINE
+# =========================================================
+@router.get("/{patient_id}/timeline", response_model=schemas.PatientTimeline, summary="Get a patient's timeline")
+async def get_patient_timeline(
+    patient_id: int,
+    start: Optional[schemas.LocalDateTime] = Query(None, description="Only appointments on or after this time"),
+    end: Optional[schemas.LocalDateTime] = Query(None, description="Only appointments before this time"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Retrieve a patient with their appointments ordered by date, each with its
+    doctor and completed batch NLP results embedded, in a fixed number of
+    queries. `start` and `end` limit the appointments to a date window.
+    """
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(status_code=400, detail="'start' must be before 'end'")
+    patient = await async_crud.get_patient_timeline(db=db, patient_id=patient_id, start=start, end=end)
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     return patient
@@ -72,11 +118,11 @@ def get_patient(patient_id: int, db: Session = Depends(get_db)):
 # UPDATE
 # =========================================================
 @router.put("/{patient_id}", response_model=schemas.Patient, summary="Update patient")
-def update_patient(patient_id: int, updated_data: schemas.PatientUpdate, db: Session = Depends(get_db)):
+async def update_patient(patient_id: int, updated_data: schemas.PatientUpdate, db: AsyncSession = Depends(get_db)):
     """
     Update a patient's information. Only the fields provided will be updated.
     """
-    patient = crud.update_patient(db=db, patient_id=patient_id, patient=updated_data)
+    patient = await async_crud.update_patient(db=db, patient_id=patient_id, patient=updated_data)
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     return patient
@@ -85,11 +131,11 @@ def update_patient(patient_id: int, updated_data: schemas.PatientUpdate, db: Ses
 # DELETE
 # =========================================================
 @router.delete("/{patient_id}", summary="Delete patient")
-def delete_patient(patient_id: int, db: Session = Depends(get_db)):
+async def delete_patient(patient_id: int, db: AsyncSession = Depends(get_db)):
     """
     Delete a patient record by ID.
     """
-    deleted = crud.delete_patient(db=db, patient_id=patient_id)
+    deleted = await async_crud.delete_patient(db=db, patient_id=patient_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Patient not found")
     return {"message": "Patient deleted successfully"}
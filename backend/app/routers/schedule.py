@@ -0,0 +1,64 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from app.db import async_crud, scheduling, schemas
+from app.db.database import get_db
+
+# =========================================================
+# Router configuration
+# =========================================================
+router = APIRouter(
+    prefix="/schedule",
+    tags=["Schedule"],
+)
+
+# =========================================================
+# WORKING HOURS
+# =========================================================
+@router.get("/doctors/{doctor_id}/hours", response_model=List[schemas.WorkingHours], summary="Get a doctor's working hours")
+async def get_working_hours(doctor_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Weekly working intervals of a doctor. An empty list means the clinic
+    default hours apply (SCHEDULE_DEFAULT_HOURS on SCHEDULE_DEFAULT_DAYS).
+    """
+    if not await async_crud.get_doctor(db=db, doctor_id=doctor_id):
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    return await async_crud.get_working_hours(db=db, doctor_id=doctor_id)
+
+@router.put("/doctors/{doctor_id}/hours", response_model=List[schemas.WorkingHours], summary="Set a doctor's working hours")
+async def set_working_hours(doctor_id: int, schedule: schemas.WorkingHoursUpdate, db: AsyncSession = Depends(get_db)):
+    """
+    Replace a doctor's weekly working intervals. A day may have several
+    (e.g. a morning and an afternoon shift) as long as they do not overlap.
+    """
+    hours = await async_crud.set_working_hours(db=db, doctor_id=doctor_id, schedule=schedule)
+    if hours is None:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    return hours
+
+# =========================================================
+# FREE SLOTS
+# =========================================================
+@router.get("/free-slots", response_model=List[schemas.FreeSlot], summary="Find the next free appointment slots")
+async def free_slots(
+    doctor_id: Optional[int] = Query(None, description="Only this doctor"),
+    specialty: Optional[str] = Query(None, description="Only doctors of this specialty"),
+    start: Optional[schemas.LocalDateTime] = Query(None, description="Earliest slot start (default: now)"),
+    duration_minutes: int = Query(
+        schemas.DEFAULT_APPOINTMENT_MINUTES, ge=5, le=schemas.MAX_APPOINTMENT_MINUTES, description="Length of the appointment"
+    ),
+    count: int = Query(10, ge=1, le=100, description="Number of slots to return"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    The earliest free slots within the doctors' working hours, across every
+    doctor matching the filters, earliest first. A slot fits `duration_minutes`
+    without overlapping an existing appointment, so it can be booked as is.
+    """
+    if doctor_id is not None and not await async_crud.get_doctor(db=db, doctor_id=doctor_id):
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    return await scheduling.find_free_slots(
+        db, count, duration_minutes, start or datetime.now(), doctor_id=doctor_id, specialty=specialty
+    )
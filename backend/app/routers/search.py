@@ -0,0 +1,101 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, List, Literal, Optional
+
+from app.db import search
+from app.db.database import get_db
+from app.db.pagination import decode_cursor, encode_cursor
+
+# =========================================================
+# Router configuration
+# =========================================================
+router = APIRouter(
+    prefix="/search",
+    tags=["Search"],
+)
+
+SortOrder = Literal["rank", "recent"]
+SORT_DESCRIPTION = "'rank' (best match first) or 'recent' (newest first, fastest for very common words)"
+
+QUERY_DESCRIPTION = (
+    'Words to find (all must match, stemmed: "pain" also finds "pains"). '
+    'Use "double quotes" for a phrase and a trailing * for a prefix.'
+)
+
+# =========================================================
+# Helpers
+# =========================================================
+def decode_search_cursor(cursor: Optional[str], sort: SortOrder) -> Optional[List[Any]]:
+    """Seek key of a search page: `[rank, id]`, or `[id]` when sorted by recency."""
+    if not cursor:
+        return None
+    values = decode_cursor(cursor)
+    if sort == "recent":
+        valid = len(values) == 1 and isinstance(values[0], int)
+    else:
+        valid = len(values) == 2 and isinstance(values[0], (int, float)) and isinstance(values[1], int)
+    if not valid:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+async def run_search(db: AsyncSession, scope: str, q: str, limit: int, sort: SortOrder, after: Optional[str], **filters):
+    filters = {name: value for name, value in filters.items() if value is not None}
+    try:
+        hits, next_key = await search.search(
+            db, scope, q, limit=limit, sort=sort, after=decode_search_cursor(after, sort), **filters
+        )
+    except search.SearchUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    return {
+        "count": len(hits),
+        "results": hits,
+        "next_cursor": encode_cursor(next_key) if next_key else None,
+    }
+
+# =========================================================
+# APPOINTMENT NOTES
+# =========================================================
+@router.get("/appointments", summary="Search appointment notes")
+async def search_appointments(
+    q: str = Query(..., min_length=1, description=QUERY_DESCRIPTION),
+    patient_id: Optional[int] = Query(None, description="Only this patient's appointments"),
+    doctor_id: Optional[int] = Query(None, description="Only this doctor's appointments"),
+    sort: SortOrder = Query("rank", description=SORT_DESCRIPTION),
+    limit: int = Query(20, ge=1, le=100),
+    after: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Appointments whose notes match `q`, each with a snippet where the
+    matches are wrapped in `<mark>` tags and a relevance `score`.
+    """
+    return await run_search(db, "appointments", q, limit, sort, after, patient_id=patient_id, doctor_id=doctor_id)
+
+# =========================================================
+# PATIENT ALLERGIES
+# =========================================================
+@router.get("/patients", summary="Search patient allergies")
+async def search_patients(
+    q: str = Query(..., min_length=1, description=QUERY_DESCRIPTION),
+    sort: SortOrder = Query("rank", description=SORT_DESCRIPTION),
+    limit: int = Query(20, ge=1, le=100),
+    after: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Patients whose recorded allergies match `q`."""
+    return await run_search(db, "patients", q, limit, sort, after)
+
+# =========================================================
+# NLP RESULTS
+# =========================================================
+@router.get("/nlp-results", summary="Search saved NLP inputs and outputs")
+async def search_nlp_results(
+    q: str = Query(..., min_length=1, description=QUERY_DESCRIPTION),
+    task: Optional[str] = Query(None, description="Only results for this task"),
+    sort: SortOrder = Query("rank", description=SORT_DESCRIPTION),
+    limit: int = Query(20, ge=1, le=100),
+    after: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Saved NLP results whose input note or LLM output matches `q`."""
+    return await run_search(db, "nlp_results", q, limit, sort, after, task=task)
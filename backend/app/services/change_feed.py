@@ -0,0 +1,66 @@
+import asyncio
+import os
+import threading
+from typing import Set, Tuple
+
+# Subscribers re-read the change log at least this often, which also picks up
+# writes made by other processes (more workers, imports from the CLI)
+POLL_SECONDS = float(os.getenv("CHANGE_FEED_POLL_SECONDS", "5"))
+
+
+class ChangeNotifier:
+    """
+    Wakes change feed subscribers (GET /changes/stream) after a commit.
+
+    - `notify()` is called by the crud mutations after they commit, from the
+      event loop (async sessions) or a threadpool thread (sync routes and
+      imports), so waiters are woken through their loop's thread-safe call
+    - a generation counter closes the gap between a subscriber reading the
+      log and starting to wait: `wait(generation)` returns at once when a
+      commit happened in between
+    - notifications carry no data; subscribers read the log themselves, so
+      any number of commits while a subscriber is busy cost one read
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def notify(self) -> None:
+        with self._lock:
+            self._generation += 1
+            waiters = list(self._waiters)
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:  # loop already closed
+                pass
+
+    async def wait(self, generation: int, timeout: float = POLL_SECONDS) -> bool:
+        """Wait for a commit after `generation`; False when `timeout` passed without one."""
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with self._lock:
+            if self._generation != generation:
+                return True
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"generation": self._generation, "subscribers": len(self._waiters)}
+
+
+change_notifier = ChangeNotifier()
@@ -0,0 +1,117 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional
+
+
+class CachedPayload(NamedTuple):
+    payload: dict
+    etag: str
+    expires_at: float
+
+
+def make_etag(payload: dict) -> str:
+    """Strong ETag over the canonical JSON form of a payload."""
+    body = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+    return '"' + hashlib.sha256(body.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches `etag` (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    # Callers re-raise it; when all of them were cancelled, no "never retrieved" warning
+    if not task.cancelled():
+        task.exception()
+
+
+class DashboardCache:
+    """
+    Per-process cache of dashboard payloads.
+
+    - entries live for `ttl_seconds`, which also bounds staleness for
+      time-dependent figures and for writes made by other processes
+    - `invalidate()` is called by the crud mutations after they commit; it
+      bumps a generation counter so every entry is dropped at once, and a
+      computation that overlaps an invalidation is not stored
+    - concurrent misses on one key are coalesced: the first caller starts
+      the computation as a task, and every caller awaits that task; it
+      runs to completion even when the caller that started it goes away
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl = ttl_seconds
+        self.generation = 0
+        self._entries: Dict[str, CachedPayload] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "coalesced": 0,
+            "misses": 0,
+            "invalidations": 0,
+        }
+
+    def _fresh(self, key: str):
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at > time.monotonic():
+            return entry
+        return None
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[dict]]) -> CachedPayload:
+        with self._lock:
+            entry = self._fresh(key)
+            if entry is not None:
+                self.stats["hits"] += 1
+                return entry
+            task = self._inflight.get(key)
+            if task is None:
+                task = asyncio.get_running_loop().create_task(self._compute(key, compute, self.generation))
+                task.add_done_callback(_retrieve_exception)
+                self._inflight[key] = task
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        # shield: a cancelled caller, the one that started the computation
+        # included, must not cancel it for the others
+        return await asyncio.shield(task)
+
+    async def _compute(self, key: str, compute: Callable[[], Awaitable[dict]], generation: int) -> CachedPayload:
+        try:
+            payload = await compute()
+            entry = CachedPayload(payload, make_etag(payload), time.monotonic() + self.ttl)
+            with self._lock:
+                if generation == self.generation:
+                    self._entries[key] = entry
+            return entry
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self.stats["invalidations"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+            stats["generation"] = self.generation
+        lookups = stats["hits"] + stats["coalesced"] + stats["misses"]
+        stats["hit_ratio"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+dashboard_cache = DashboardCache(ttl_seconds=float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "5")))
@@ -0,0 +1,172 @@
+import asyncio
+import importlib.util
+import itertools
+import json
+import os
+import random
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+# HTTP/2 needs the optional `h2` package (`pip install httpx[http2]`)
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class LLMClientError(RuntimeError):
+    """Raised when an upstream LLM call fails after all retries."""
+
+
+class LLMClient:
+    """
+    Shared async HTTP client for LLM APIs.
+
+    Pooled `httpx.AsyncClient`s (HTTP/2 when available) are reused across
+    requests. A semaphore bounds in-flight upstream calls, and 429/5xx or
+    transport errors are retried with full-jitter exponential backoff,
+    honouring `Retry-After` when the upstream sends it.
+
+    httpcore scans every pooled connection on each checkout, which turns
+    quadratic past a few dozen connections, so the pool is split into
+    shards of at most `SHARD_CONNECTIONS` used round-robin.
+    """
+
+    SHARD_CONNECTIONS = 16
+
+    def __init__(
+        self,
+        timeout: float = 30.0,
+        connect_timeout: float = 5.0,
+        max_connections: int = 64,
+        max_concurrency: int = 64,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+    ):
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.shard_count = max(1, -(-max_connections // self.SHARD_CONNECTIONS))
+        per_shard = -(-max_connections // self.shard_count)
+        self.limits = httpx.Limits(max_connections=per_shard, max_keepalive_connections=per_shard)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._clients: List[httpx.AsyncClient] = []
+        self._next = itertools.count()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Next pool shard, created on first use."""
+        if not self._clients:
+            self._clients = [
+                httpx.AsyncClient(http2=HTTP2_AVAILABLE, timeout=self.timeout, limits=self.limits)
+                for _ in range(self.shard_count)
+            ]
+        return self._clients[next(self._next) % len(self._clients)]
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def post_json(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        params: Optional[Dict[str, str]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """POST `payload` and return the decoded JSON body, retrying transient failures."""
+        attempt = 0
+        while True:
+            try:
+                async with self.semaphore:
+                    response = await self.client.post(url, json=payload, params=params, headers=headers)
+            except httpx.TransportError as e:
+                if attempt >= self.max_retries:
+                    raise LLMClientError(f"LLM request failed: {e!r}") from e
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                await asyncio.sleep(self._backoff(attempt, response.headers.get("Retry-After")))
+                attempt += 1
+                continue
+            if response.status_code != 200:
+                raise LLMClientError(f"LLM API error ({response.status_code}): {response.text}")
+            return response.json()
+
+    async def stream_sse(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        params: Optional[Dict[str, str]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        POST `payload` to a Server-Sent Events endpoint and yield each `data:`
+        event decoded as JSON, stopping at an OpenAI-style `[DONE]` sentinel.
+        Retries apply only until the response starts; once events have been
+        yielded a failure is raised to the caller.
+        """
+        attempt = 0
+        started = False
+        while True:
+            async with self.semaphore:
+                try:
+                    async with self.client.stream("POST", url, json=payload, params=params, headers=headers) as response:
+                        if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                            retry_after = response.headers.get("Retry-After")
+                        elif response.status_code != 200:
+                            body = (await response.aread()).decode("utf-8", "replace")
+                            raise LLMClientError(f"LLM API error ({response.status_code}): {body}")
+                        else:
+                            async for line in response.aiter_lines():
+                                if not line.startswith("data:"):
+                                    continue
+                                data = line[5:].strip()
+                                if data == "[DONE]":
+                                    return
+                                started = True
+                                yield json.loads(data)
+                            return
+                except httpx.TransportError as e:
+                    if started or attempt >= self.max_retries:
+                        raise LLMClientError(f"LLM request failed: {e!r}") from e
+                    retry_after = None
+            await asyncio.sleep(self._backoff(attempt, retry_after))
+            attempt += 1
+
+    async def aclose(self) -> None:
+        clients, self._clients = self._clients, []
+        for client in clients:
+            await client.aclose()
+
+
+def client_from_env(prefix: str = "LLM") -> LLMClient:
+    """
+    Build a client from `<prefix>_*` variables, falling back to the shared
+    `LLM_*` ones, e.g. OPENAI_MAX_CONCURRENCY overrides LLM_MAX_CONCURRENCY.
+    """
+    def setting(name: str, default: str) -> str:
+        return os.getenv(f"{prefix}_{name}") or os.getenv(f"LLM_{name}", default)
+
+    return LLMClient(
+        timeout=float(setting("TIMEOUT_SECONDS", "30")),
+        connect_timeout=float(setting("CONNECT_TIMEOUT_SECONDS", "5")),
+        max_connections=int(setting("MAX_CONNECTIONS", "64")),
+        max_concurrency=int(setting("MAX_CONCURRENCY", "64")),
+        max_retries=int(setting("MAX_RETRIES", "3")),
+    )
@@ -0,0 +1,319 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional
+
+from app.services import metrics
+from app.services.metrics import LatencyHistogram
+
+if TYPE_CHECKING:
+    from app.services.llm_client import LLMClient
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class NoProviderAvailable(RuntimeError):
+    """Raised when no configured provider could answer a request."""
+
+
+class LLMProvider:
+    """
+    Base class for an LLM backend.
+
+    Every provider owns its own pooled `LLMClient`, so connection limits,
+    concurrency bounds and retries are per provider. Call outcomes feed the
+    latency histogram and a simple circuit breaker: after `failure_threshold`
+    consecutive failures the provider is skipped for `cooldown_seconds`.
+    Token counts are summed from the usage the upstream reports, when it does.
+    """
+
+    name = "base"
+
+    def __init__(self, default_model: str, client: Optional["LLMClient"] = None,
+                 failure_threshold: int = 3, cooldown_seconds: float = 30.0):
+        self.default_model = default_model
+        self.client = client
+        self.latency = LatencyHistogram(LATENCY_BUCKETS)
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+        self.calls = 0
+        self.failures = 0
+        self.tokens = {"prompt": 0, "completion": 0}
+
+    # ---------------- Health ----------------
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    def record_success(self, seconds: float) -> None:
+        self.calls += 1
+        self.consecutive_failures = 0
+        self.latency.observe(seconds)
+
+    def record_failure(self) -> None:
+        self.calls += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.failure_threshold:
+            self.unhealthy_until = time.monotonic() + self.cooldown_seconds
+
+    def record_usage(self, prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> None:
+        self.tokens["prompt"] += prompt_tokens or 0
+        self.tokens["completion"] += completion_tokens or 0
+
+    # ---------------- Calls ----------------
+    async def generate(self, prompt: str, model: Optional[str] = None, json_output: bool = False) -> str:
+        raise NotImplementedError
+
+    def stream(self, prompt: str, model: Optional[str] = None) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+
+    def snapshot(self) -> dict:
+        return {
+            "default_model": self.default_model,
+            "healthy": self.healthy,
+            "calls": self.calls,
+            "failures": self.failures,
+            "tokens": dict(self.tokens),
+            "latency_seconds": self.latency.snapshot(),
+        }
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    def __init__(self, api_key: str, base_url: str, default_model: str = "gemini-1.5-flash", **kwargs):
+        from app.services.llm_client import client_from_env  # httpx, only for real upstreams
+
+        super().__init__(default_model, client=client_from_env("GEMINI"), **kwargs)
+        self.api_key = api_key
+        self.base_url = base_url
+
+    async def generate(self, prompt: str, model: Optional[str] = None, json_output: bool = False) -> str:
+        url = f"{self.base_url}/models/{model or self.default_model}:generateContent"
+        payload = {"contents": [{"parts": [{"text": prompt}]}]}
+        if json_output:
+            payload["generationConfig"] = {"responseMimeType": "application/json"}
+
+        data = await self.client.post_json(url, payload, params={"key": self.api_key})
+        self._record_usage(data)
+        try:
+            return data["candidates"][0]["content"]["parts"][0]["text"].strip()
+        except (KeyError, IndexError):
+            raise RuntimeError(f"Unexpected Gemini response: {data}")
+
+    async def stream(self, prompt: str, model: Optional[str] = None) -> AsyncIterator[str]:
+        url = f"{self.base_url}/models/{model or self.default_model}:streamGenerateContent"
+        payload = {"contents": [{"parts": [{"text": prompt}]}]}
+        event = None
+
+        async for event in self.client.stream_sse(url, payload, params={"key": self.api_key, "alt": "sse"}):
+            try:
+                parts = event["candidates"][0]["content"]["parts"]
+            except (KeyError, IndexError):
+                continue  # e.g. a final event carrying only finishReason/usage
+            for part in parts:
+                if part.get("text"):
+                    yield part["text"]
+        # Each event carries the running usage; the last one is the total
+        if event is not None:
+            self._record_usage(event)
+
+    def _record_usage(self, data: dict) -> None:
+        usage = data.get("usageMetadata") or {}
+        self.record_usage(usage.get("promptTokenCount"), usage.get("candidatesTokenCount"))
+
+
+class OpenAIProvider(LLMProvider):
+    name = "openai"
+    SYSTEM_PROMPT = "You are a helpful EMR assistant."
+
+    def __init__(self, api_key: str, base_url: str, default_model: str = "gpt-4o-mini", **kwargs):
+        from app.services.llm_client import client_from_env
+
+        super().__init__(default_model, client=client_from_env("OPENAI"), **kwargs)
+        self.headers = {"Authorization": f"Bearer {api_key}"}
+        self.base_url = base_url
+
+    def _payload(self, prompt: str, model: Optional[str], **extra) -> dict:
+        return dict(
+            model=model or self.default_model,
+            messages=[
+                {"role": "system", "content": self.SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            **extra,
+        )
+
+    async def generate(self, prompt: str, model: Optional[str] = None, json_output: bool = False, **options) -> str:
+        """`options` are passed through as request fields, e.g. temperature or max_tokens."""
+        extra = dict(options, response_format={"type": "json_object"}) if json_output else options
+        data = await self.client.post_json(
+            f"{self.base_url}/chat/completions", self._payload(prompt, model, **extra), headers=self.headers
+        )
+        usage = data.get("usage") or {}
+        self.record_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"))
+        try:
+            return data["choices"][0]["message"]["content"].strip()
+        except (KeyError, IndexError):
+            raise RuntimeError(f"Unexpected OpenAI response: {data}")
+
+    async def stream(self, prompt: str, model: Optional[str] = None) -> AsyncIterator[str]:
+        payload = self._payload(prompt, model, stream=True)
+        async for event in self.client.stream_sse(f"{self.base_url}/chat/completions", payload, headers=self.headers):
+            try:
+                text = event["choices"][0]["delta"].get("content")
+            except (KeyError, IndexError):
+                continue
+            if text:
+                yield text
+
+
+class FakeProvider(LLMProvider):
+    """Deterministic local provider for offline development, tests and benchmarks."""
+
+    name = "fake"
+
+    def __init__(self, default_model: str = "fake-1", delay: float = 0.0, **kwargs):
+        super().__init__(default_model, **kwargs)
+        self.delay = delay
+
+    @staticmethod
+    def answer(prompt: str, json_output: bool = False) -> str:
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        if json_output:
+            # Fused prompts list their sections as `- "task": instruction`
+            keys = [line[3:].split('"', 1)[0] for line in prompt.splitlines() if line.startswith('- "')]
+            return json.dumps({key: f"[fake {key} {digest}]" for key in keys})
+        return f"[fake {digest}] {prompt.splitlines()[0]}"
+
+    async def generate(self, prompt: str, model: Optional[str] = None, json_output: bool = False) -> str:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self.answer(prompt, json_output)
+
+    async def stream(self, prompt: str, model: Optional[str] = None) -> AsyncIterator[str]:
+        for word in self.answer(prompt).split(" "):
+            yield word + " "
+
+
+class ProviderRouter:
+    """
+    Routes LLM calls across the configured providers.
+
+    Without an explicit provider, healthy providers are tried fastest first
+    by latency EWMA, and a failure fails over to the next one. Providers with
+    no samples yet sort first, in configured order, so each gets measured. An explicit provider is used alone,
+    since a model name only makes sense for its own provider.
+
+    Without `providers`, they are built from the environment on first use,
+    so creating a router needs neither API keys nor an HTTP stack.
+    """
+
+    def __init__(self, providers: Optional[List[LLMProvider]] = None):
+        self._providers: Optional[Dict[str, LLMProvider]] = None
+        if providers is not None:
+            self._providers = {p.name: p for p in providers}
+
+    @property
+    def providers(self) -> Dict[str, LLMProvider]:
+        if self._providers is None:
+            self._providers = {p.name: p for p in providers_from_env()}
+        return self._providers
+
+    def candidates(self, provider: Optional[str] = None) -> List[LLMProvider]:
+        if provider is not None:
+            if provider not in self.providers:
+                raise NoProviderAvailable(f"LLM provider '{provider}' is not configured")
+            return [self.providers[provider]]
+        ordered = list(self.providers.values())
+        healthy = [p for p in ordered if p.healthy]
+        return sorted(healthy, key=lambda p: p.latency.ewma or 0.0) or ordered
+
+    async def generate(self, prompt: str, provider: Optional[str] = None, model: Optional[str] = None,
+                       json_output: bool = False) -> str:
+        errors = []
+        for candidate in self.candidates(provider):
+            start = time.perf_counter()
+            try:
+                text = await candidate.generate(prompt, model=model, json_output=json_output)
+            except Exception as e:
+                candidate.record_failure()
+                errors.append(f"{candidate.name}: {e}")
+                continue
+            finally:
+                metrics.observe_llm(time.perf_counter() - start)
+            candidate.record_success(time.perf_counter() - start)
+            return text
+        raise NoProviderAvailable("All LLM providers failed: " + "; ".join(errors))
+
+    async def stream(self, prompt: str, provider: Optional[str] = None, model: Optional[str] = None) -> AsyncIterator[str]:
+        """Stream from the first provider that produces output; fail over only before the first chunk."""
+        errors = []
+        for candidate in self.candidates(provider):
+            start = time.perf_counter()
+            started = False
+            try:
+                async for chunk in candidate.stream(prompt, model=model):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                candidate.record_failure()
+                if started:
+                    raise
+                errors.append(f"{candidate.name}: {e}")
+                continue
+            finally:
+                metrics.observe_llm(time.perf_counter() - start)
+            candidate.record_success(time.perf_counter() - start)
+            return
+        raise NoProviderAvailable("All LLM providers failed: " + "; ".join(errors))
+
+    async def aclose(self) -> None:
+        for provider in (self._providers or {}).values():
+            await provider.aclose()
+
+    def snapshot(self) -> dict:
+        return {name: provider.snapshot() for name, provider in self.providers.items()}
+
+
+def providers_from_env() -> List[LLMProvider]:
+    """
+    Providers listed in LLM_PROVIDERS (default "gemini,openai"), skipping any
+    without an API key. NLP_LLM_BACKEND=fake selects only the fake provider.
+    """
+    if os.getenv("NLP_LLM_BACKEND") == "fake":
+        return [FakeProvider()]
+
+    providers: List[LLMProvider] = []
+    for name in os.getenv("LLM_PROVIDERS", "gemini,openai").split(","):
+        name = name.strip()
+        if name == "gemini" and os.getenv("GOOGLE_API_KEY"):
+            providers.append(GeminiProvider(
+                api_key=os.getenv("GOOGLE_API_KEY"),
+                base_url=os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta"),
+                default_model=os.getenv("GEMINI_MODEL", "gemini-1.5-flash"),
+            ))
+        elif name == "openai" and os.getenv("OPENAI_API_KEY"):
+            providers.append(OpenAIProvider(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                base_url=os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"),
+                default_model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+            ))
+        elif name == "fake":
+            providers.append(FakeProvider())
+    return providers
+
+
+# Shared by the NLP endpoints and openai_service; its pooled clients are
+# closed by the app lifespan
+llm_router = ProviderRouter()
@@ -0,0 +1,307 @@
+"""
+Request-level performance metrics, exposed in the Prometheus text format.
+
+- `MetricsMiddleware` times every HTTP request per route template (not per
+  raw path, so ids do not explode the label set) and adds a `Server-Timing`
+  header with the request's total, database and LLM time
+- `instrument_engine` hooks SQLAlchemy's cursor events: query latency, query
+  count and database time per request, and a warning with the SQL (never the
+  parameters, which hold patient data) for queries slower than SLOW_QUERY_MS
+- `ProviderRouter` reports LLM call time per request through `observe_llm`;
+  per-provider latency, failures and tokens come from the providers' own
+  counters, and NLP cache effectiveness from `NLPCache.stats`
+
+Per-request numbers travel in a context variable, which follows the request
+into SQLAlchemy's async greenlets and the threadpool of sync routes.
+Recording is a few counter updates per request and per query.
+
+Configuration (environment):
+METRICS_ENABLED   default 1; 0 turns the middleware and query hooks into no-ops
+SLOW_QUERY_MS     default 200; log queries at least this slow (empty = never)
+SERVER_TIMING     default 1; send the Server-Timing header
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200") or "inf")
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1") == "1"
+
+# Upper bounds of the histogram buckets
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+QUERIES_PER_REQUEST_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Label of requests that matched no route (404s), so scanners cannot grow the label set
+UNMATCHED_ROUTE = "unmatched"
+
+Labels = Tuple[str, ...]
+
+
+class LatencyHistogram:
+    """Cumulative-bucket histogram plus an EWMA (LLM providers route on it)."""
+
+    def __init__(self, buckets: Sequence[float], alpha: float = 0.2):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.alpha = alpha
+        self.ewma: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.sum += seconds
+            self.count += 1
+            self.ewma = seconds if self.ewma is None else self.alpha * seconds + (1 - self.alpha) * self.ewma
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cumulative, running = {}, 0
+            for bound, n in zip(list(self.buckets) + ["+Inf"], self.counts):
+                running += n
+                cumulative[str(bound)] = running
+            return {"count": self.count, "sum": round(self.sum, 6), "ewma": self.ewma, "buckets": cumulative}
+
+
+class RequestStats:
+    """Database and LLM work done on behalf of the current request."""
+
+    __slots__ = ("queries", "db_seconds", "llm_calls", "llm_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.llm_calls = 0
+        self.llm_seconds = 0.0
+
+    def server_timing(self, total_seconds: float) -> str:
+        parts = [
+            f"app;dur={total_seconds * 1000:.1f}",
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries"',
+        ]
+        if self.llm_calls:
+            parts.append(f'llm;dur={self.llm_seconds * 1000:.1f};desc="{self.llm_calls} calls"')
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+class Registry:
+    """Process-wide counters and histograms, keyed by label values."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[Labels, int] = {}  # (method, route, status)
+        self.request_latency: Dict[Labels, LatencyHistogram] = {}  # (method, route)
+        self.request_queries: Dict[Labels, LatencyHistogram] = {}
+        self.request_db_seconds: Dict[Labels, float] = {}
+        self.request_llm_seconds: Dict[Labels, float] = {}
+        self.query_latency = LatencyHistogram(QUERY_BUCKETS)
+        self.slow_queries = 0
+
+    def _histogram(self, table: Dict[Labels, LatencyHistogram], labels: Labels, buckets) -> LatencyHistogram:
+        histogram = table.get(labels)
+        if histogram is None:
+            with self._lock:
+                histogram = table.setdefault(labels, LatencyHistogram(buckets))
+        return histogram
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+        labels = (method, route)
+        self._histogram(self.request_latency, labels, REQUEST_BUCKETS).observe(seconds)
+        self._histogram(self.request_queries, labels, QUERIES_PER_REQUEST_BUCKETS).observe(stats.queries)
+        with self._lock:
+            key = (method, route, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.request_db_seconds[labels] = self.request_db_seconds.get(labels, 0.0) + stats.db_seconds
+            self.request_llm_seconds[labels] = self.request_llm_seconds.get(labels, 0.0) + stats.llm_seconds
+
+    def observe_query(self, seconds: float, statement: str) -> None:
+        self.query_latency.observe(seconds)
+        if seconds * 1000 >= SLOW_QUERY_MS:
+            with self._lock:
+                self.slow_queries += 1
+            logger.warning("Slow query (%.1f ms): %s", seconds * 1000, " ".join(statement.split()))
+
+
+registry = Registry()
+
+
+def observe_llm(seconds: float) -> None:
+    """Add an upstream LLM call to the current request's timing."""
+    stats = _current.get()
+    if stats is not None:
+        stats.llm_calls += 1
+        stats.llm_seconds += seconds
+
+# =========================================================
+# Collection: HTTP middleware and SQLAlchemy hooks
+# =========================================================
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses pass through untouched."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ENABLED:
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if SERVER_TIMING:
+                    timing = stats.server_timing(time.perf_counter() - start)
+                    message = dict(message, headers=[
+                        *message.get("headers", ()),
+                        (b"server-timing", timing.encode("latin-1")),
+                        # Lets browsers read the header on cross-origin requests
+                        (b"timing-allow-origin", b"*"),
+                    ])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            registry.observe_request(scope["method"], route, status, time.perf_counter() - start, stats)
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement `engine` executes (for an async engine, pass its `sync_engine`)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        if not ENABLED:
+            return
+        seconds = time.perf_counter() - context._metrics_start
+        registry.observe_query(seconds, statement)
+        stats = _current.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += seconds
+
+# =========================================================
+# Exposition: Prometheus text format 0.0.4
+# =========================================================
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Writer:
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def family(self, name: str, kind: str, help_text: str) -> None:
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value, names: Iterable[str] = (), values: Iterable[str] = ()) -> None:
+        self.lines.append(f"{name}{_labels(names, values)} {value}")
+
+    def histogram(self, name: str, histogram: LatencyHistogram, names=(), values=()) -> None:
+        snapshot = histogram.snapshot()
+        names, values = tuple(names), tuple(values)
+        for bound, count in snapshot["buckets"].items():
+            self.sample(f"{name}_bucket", count, names + ("le",), values + (bound,))
+        self.sample(f"{name}_sum", snapshot["sum"], names, values)
+        self.sample(f"{name}_count", snapshot["count"], names, values)
+
+
+def render(llm=None, cache=None) -> str:
+    """
+    All metrics as Prometheus text. `llm` is the `ProviderRouter` and `cache`
+    the `NLPCache` whose counters are included.
+    """
+    out = _Writer()
+    with registry._lock:
+        requests = dict(registry.requests)
+        db_seconds = dict(registry.request_db_seconds)
+        llm_seconds = dict(registry.request_llm_seconds)
+        slow_queries = registry.slow_queries
+    route_labels = ("method", "route")
+
+    out.family("http_requests_total", "counter", "HTTP requests by route template and status.")
+    for labels, n in sorted(requests.items()):
+        out.sample("http_requests_total", n, route_labels + ("status",), labels)
+    out.family("http_request_duration_seconds", "histogram", "HTTP request latency until the response completes.")
+    for labels, histogram in sorted(registry.request_latency.items()):
+        out.histogram("http_request_duration_seconds", histogram, route_labels, labels)
+    out.family("http_request_queries", "histogram", "SQL statements executed per HTTP request.")
+    for labels, histogram in sorted(registry.request_queries.items()):
+        out.histogram("http_request_queries", histogram, route_labels, labels)
+    out.family("http_request_db_seconds_total", "counter", "Time spent in SQL statements by HTTP requests.")
+    for labels, seconds in sorted(db_seconds.items()):
+        out.sample("http_request_db_seconds_total", round(seconds, 6), route_labels, labels)
+    out.family("http_request_llm_seconds_total", "counter", "Time spent waiting for LLM calls by HTTP requests.")
+    for labels, seconds in sorted(llm_seconds.items()):
+        out.sample("http_request_llm_seconds_total", round(seconds, 6), route_labels, labels)
+
+    out.family("db_query_duration_seconds", "histogram", "SQL statement latency, requests and background work.")
+    out.histogram("db_query_duration_seconds", registry.query_latency)
+    out.family("db_slow_queries_total", "counter", f"SQL statements slower than {SLOW_QUERY_MS:g} ms.")
+    out.sample("db_slow_queries_total", slow_queries)
+
+    if llm is not None:
+        providers = llm.providers.values()
+        provider_label = ("provider",)
+        out.family("llm_calls_total", "counter", "Upstream LLM calls per provider.")
+        for p in providers:
+            out.sample("llm_calls_total", p.calls, provider_label, (p.name,))
+        out.family("llm_call_failures_total", "counter", "Failed upstream LLM calls per provider.")
+        for p in providers:
+            out.sample("llm_call_failures_total", p.failures, provider_label, (p.name,))
+        out.family("llm_call_duration_seconds", "histogram", "Latency of successful upstream LLM calls.")
+        for p in providers:
+            out.histogram("llm_call_duration_seconds", p.latency, provider_label, (p.name,))
+        out.family("llm_tokens_total", "counter", "Tokens reported by the upstream, by kind.")
+        for p in providers:
+            for kind, n in p.tokens.items():
+                out.sample("llm_tokens_total", n, ("provider", "kind"), (p.name, kind))
+        out.family("llm_provider_healthy", "gauge", "1 unless the provider's circuit breaker is open.")
+        for p in providers:
+            out.sample("llm_provider_healthy", int(p.healthy), provider_label, (p.name,))
+
+    if cache is not None:
+        stats = cache.snapshot()
+        out.family("nlp_cache_lookups_total", "counter", "NLP cache lookups by result.")
+        for result in ("memory_hits", "persistent_hits", "misses"):
+            out.sample("nlp_cache_lookups_total", stats[result], ("result",), (result,))
+        out.family("nlp_cache_stores_total", "counter", "LLM results written to the NLP cache.")
+        out.sample("nlp_cache_stores_total", stats["stores"])
+        out.family("nlp_cache_evictions_total", "counter", "Persistent NLP cache rows evicted.")
+        out.sample("nlp_cache_evictions_total", stats["evictions"])
+        out.family("nlp_cache_memory_items", "gauge", "Entries in the in-process NLP cache tier.")
+        out.sample("nlp_cache_memory_items", stats["memory_items"])
+    return "\n".join(out.lines) + "\n"
@@ -0,0 +1,143 @@
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.db import models
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form of a note for cache keys: NFC, collapsed whitespace, trimmed."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def make_key(task: str, prompt_version: str, model: str, text: str) -> str:
+    """Content address of an NLP call; any change to the inputs changes the key."""
+    material = "\x1f".join([task, prompt_version, model, normalize_text(text)])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class NLPCache:
+    """
+    Two-tier cache for LLM responses.
+
+    - memory: per-process LRU of the most recent `max_items` results; an
+      entry keeps its expiry and is dropped when read after it
+    - persistent: the `nlp_cache` table, with a TTL per entry and a cap of
+      `max_rows`; expired and oldest rows are evicted every `evict_every` writes
+
+    A persistent hit is promoted into the memory tier with the row's expiry.
+    """
+
+    def __init__(self, max_items: int, ttl_seconds: int, max_rows: int, evict_every: int = 64):
+        self.max_items = max_items
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_rows = max_rows
+        self.evict_every = evict_every
+        self._memory: "OrderedDict[str, Tuple[str, datetime]]" = OrderedDict()  # key -> (result, expires_at)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.stats: Dict[str, int] = {
+            "memory_hits": 0,
+            "persistent_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+
+    # ---------------- Memory tier ----------------
+    def _memory_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= datetime.utcnow():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return value
+
+    def _memory_put(self, key: str, value: str, expires_at: datetime) -> None:
+        with self._lock:
+            self._memory[key] = (value, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[name] += n
+
+    # ---------------- Public API ----------------
+    def get(self, db: Session, key: str) -> Optional[str]:
+        value = self._memory_get(key)
+        if value is not None:
+            self._count("memory_hits")
+            return value
+
+        entry = db.get(models.NLPCacheEntry, key)
+        if entry is not None and entry.expires_at > datetime.utcnow():
+            self._memory_put(key, entry.result, entry.expires_at)
+            self._count("persistent_hits")
+            return entry.result
+
+        self._count("misses")
+        return None
+
+    def put(self, db: Session, key: str, task: str, model: str, value: str) -> None:
+        now = datetime.utcnow()
+        expires_at = now + self.ttl
+        self._memory_put(key, value, expires_at)
+        db.merge(models.NLPCacheEntry(
+            key=key, task=task, model=model, result=value,
+            created_at=now, expires_at=expires_at,
+        ))
+        db.commit()
+        self._count("stores")
+
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.evict_every == 0
+        if due:
+            self.evict(db)
+
+    def evict(self, db: Session) -> int:
+        """Drop expired rows, then the oldest rows beyond `max_rows`."""
+        table = models.NLPCacheEntry
+        removed = db.query(table).filter(table.expires_at <= datetime.utcnow()).delete(synchronize_session=False)
+        overflow = db.query(func.count(table.key)).scalar() - self.max_rows
+        if overflow > 0:
+            oldest = db.query(table.key).order_by(table.expires_at).limit(overflow).subquery()
+            removed += db.query(table).filter(table.key.in_(oldest.select())).delete(synchronize_session=False)
+        db.commit()
+        self._count("evictions", removed)
+        return removed
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_items"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["persistent_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+nlp_cache = NLPCache(
+    max_items=int(os.getenv("NLP_CACHE_MAX_ITEMS", "1024")),
+    ttl_seconds=int(os.getenv("NLP_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+    max_rows=int(os.getenv("NLP_CACHE_MAX_ROWS", "100000")),
+)
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.db import crud, database
+
+logger = logging.getLogger(__name__)
+
+# (task, text) -> result text
+Processor = Callable[[str, str], Awaitable[str]]
+
+
+class RateLimiter:
+    """Token bucket shared by all workers: at most `rate` starts per second, bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def _with_session(fn, *args):
+    with database.SessionLocal() as db:
+        return fn(db, *args)
+
+
+class JobWorkerPool:
+    """
+    Background workers draining the persistent `nlp_job_items` queue.
+
+    Each worker claims one item at a time, so concurrency is bounded by the
+    worker count and the start rate by the shared token bucket. A failed item
+    is re-queued with exponential backoff until `max_attempts`, then marked
+    failed. Items left `running` by a crash are re-queued on start.
+    """
+
+    def __init__(
+        self,
+        processor: Processor,
+        workers: int = 4,
+        rate_per_second: float = 5.0,
+        max_attempts: int = 3,
+        retry_base_seconds: float = 2.0,
+        poll_interval: float = 1.0,
+    ):
+        self.processor = processor
+        self.workers = workers
+        self.limiter = RateLimiter(rate_per_second)
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    def notify(self) -> None:
+        """Wake idle workers after new items are enqueued."""
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        requeued = await run_in_threadpool(_with_session, crud.requeue_running_nlp_job_items)
+        if requeued:
+            logger.info("Re-queued %d interrupted NLP job items", requeued)
+        self._tasks = [asyncio.create_task(self._run(i)) for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self, worker_id: int) -> None:
+        while True:
+            try:
+                item = await run_in_threadpool(_with_session, crud.claim_nlp_job_item)
+            except Exception:
+                logger.exception("NLP worker %d failed to claim an item", worker_id)
+                item = None
+            if item is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._process(item)
+
+    async def _process(self, item) -> None:
+        await self.limiter.acquire()
+        try:
+            result = await self.processor(item.task, item.text)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if item.attempts >= self.max_attempts:
+                await run_in_threadpool(_with_session, crud.fail_nlp_job_item, item.id, item.job_id, error)
+            else:
+                delay = self.retry_base_seconds * 2 ** (item.attempts - 1) * random.uniform(0.5, 1.5)
+                available_at = datetime.utcnow() + timedelta(seconds=delay)
+                await run_in_threadpool(_with_session, crud.retry_nlp_job_item, item.id, error, available_at)
+            return
+        await run_in_threadpool(_with_session, crud.complete_nlp_job_item, item.id, item.job_id, result)
+
+
+def pool_from_env(processor: Processor) -> Optional[JobWorkerPool]:
+    """Worker pool configured from the environment; None when NLP_JOB_WORKERS=0."""
+    workers = int(os.getenv("NLP_JOB_WORKERS", "4"))
+    if workers <= 0:
+        return None
+    return JobWorkerPool(
+        processor,
+        workers=workers,
+        rate_per_second=float(os.getenv("NLP_JOB_RATE_PER_SECOND", "5")),
+        max_attempts=int(os.getenv("NLP_JOB_MAX_ATTEMPTS", "3")),
+    )
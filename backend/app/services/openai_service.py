@@ -1,28 +1,12 @@
-import os
-import openai
-from dotenv import load_dotenv
+from typing import Optional
 
-# Load environment variables
-load_dotenv()
+from app.services.llm_providers import OpenAIProvider, llm_router
 
-# Set OpenAI API key
-openai.api_key = os.getenv("OPENAI_API_KEY")
 
-
-def generate_summary(text: str) -> str:
+def get_provider() -> Optional[OpenAIProvider]:
     """
-    Summarize or analyze the given text using OpenAI GPT.
+    The OpenAI provider of the shared provider router, so it uses the same
+    pooled client (closed by the app lifespan). None when OpenAI is not
+    configured (OPENAI_API_KEY, LLM_PROVIDERS).
     """
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini",  # You can change to gpt-4 or gpt-3.5-turbo
-            messages=[
-                {"role": "system", "content": "You are a helpful EMR assistant."},
-                {"role": "user", "content": text}
-            ],
-            temperature=0.5,
-            max_tokens=300
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        return f"Error generating summary: {str(e)}"
+    return llm_router.providers.get("openai")
@@ -0,0 +1,217 @@
+"""
+Static frontend pipeline: fingerprinted, precompressed, cacheable assets.
+
+`StaticAssets.build` reads the frontend directory once, at startup:
+
+- every asset is held in memory with a gzip variant (and a brotli one when
+  the optional `brotli` package is installed), compressed ahead of time at
+  the highest level, so no request pays for compression
+- CSS, JS, images and fonts are also served under a content-hashed name,
+  `/static/patients.1f0c3a9e5b2d.js`, with a year-long immutable
+  `Cache-Control`: a new build changes the name, never the cached content
+- HTML pages get their local `src`/`href` references rewritten to those
+  hashed names and are served with `no-cache`, so a repeat view revalidates
+  the page alone (a 304 when unchanged) and reuses every asset it links to
+  without a request
+- every response carries an ETag per content and encoding and a
+  Last-Modified; If-None-Match and If-Modified-Since get a bodiless 304
+
+Edits to the frontend are picked up on the next process start.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from datetime import timezone
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from fastapi import Response
+
+from app.services.dashboard_cache import etag_matches
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional, gzip is always available
+    brotli = None
+
+# Files served from the frontend directory; build configs, sources and
+# node_modules are not part of the site
+SERVED_SUFFIXES = {
+    ".html", ".css", ".js", ".mjs", ".json", ".map", ".txt", ".svg", ".ico",
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".woff", ".woff2",
+}
+SKIPPED_DIRS = {"node_modules", "src", "dist"}
+# Worth compressing; images and fonts already are
+COMPRESSIBLE_SUFFIXES = {".html", ".css", ".js", ".mjs", ".json", ".map", ".txt", ".svg", ".ico"}
+# Hashed names are used for everything but pages, whose URLs are bookmarked
+PAGE_SUFFIXES = {".html"}
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# src="..." / href="..." attributes of an HTML page
+_REFERENCE = re.compile(r'(\b(?:src|href)=)(["\'])([^"\']+)\2', re.IGNORECASE)
+
+
+class Asset(NamedTuple):
+    path: str  # relative to the frontend directory, with forward slashes
+    hashed_path: Optional[str]
+    media_type: str
+    mtime: float
+    digest: str
+    # Content-Encoding ("identity", "br", "gzip") to body, smaller variants only
+    bodies: Dict[str, bytes]
+
+
+def _hashed_name(path: str, digest: str) -> str:
+    stem, suffix = os.path.splitext(path)
+    return f"{stem}.{digest}{suffix}"
+
+
+def _media_type(path: str) -> str:
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if media_type.startswith("text/") or media_type in ("application/javascript", "application/json"):
+        media_type += "; charset=utf-8"
+    return media_type
+
+
+def _make_asset(path: str, body: bytes, mtime: float) -> Asset:
+    suffix = os.path.splitext(path)[1].lower()
+    digest = hashlib.sha256(body).hexdigest()[:12]
+    bodies = {"identity": body}
+    if suffix in COMPRESSIBLE_SUFFIXES:
+        variants = [("gzip", gzip.compress(body, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.insert(0, ("br", brotli.compress(body, quality=11)))
+        for encoding, compressed in variants:
+            if len(compressed) < len(body):
+                bodies[encoding] = compressed
+    hashed_path = None if suffix in PAGE_SUFFIXES else _hashed_name(path, digest)
+    return Asset(path, hashed_path, _media_type(path), mtime, digest, bodies)
+
+
+def accepted_encodings(accept_encoding: Optional[str]) -> List[str]:
+    """Content codings the client accepts (q > 0), as listed in Accept-Encoding."""
+    accepted = []
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.partition(";")
+        q = params.strip()
+        if q.startswith("q=") and q[2:].strip() in ("0", "0.0", "0.00", "0.000"):
+            continue
+        if coding.strip():
+            accepted.append(coding.strip().lower())
+    return accepted
+
+
+class StaticAssets:
+    """In-memory asset table, looked up by plain or hashed path."""
+
+    def __init__(self, assets: List[Asset], mount_path: str):
+        self.mount_path = mount_path
+        self._routes: Dict[str, Tuple[Asset, bool]] = {}
+        for asset in assets:
+            self._routes[asset.path] = (asset, False)
+            if asset.hashed_path:
+                self._routes[asset.hashed_path] = (asset, True)
+
+    @classmethod
+    def build(cls, directory: str, mount_path: str = "/static") -> "StaticAssets":
+        """Read, fingerprint and compress every served file under `directory`."""
+        files: Dict[str, Tuple[bytes, float]] = {}
+        for root, dirs, names in os.walk(directory):
+            dirs[:] = sorted(d for d in dirs if d not in SKIPPED_DIRS and not d.startswith("."))
+            for name in sorted(names):
+                if name.startswith(".") or os.path.splitext(name)[1].lower() not in SERVED_SUFFIXES:
+                    continue
+                full = os.path.join(root, name)
+                with open(full, "rb") as f:
+                    files[os.path.relpath(full, directory).replace(os.sep, "/")] = (f.read(), os.path.getmtime(full))
+
+        # Assets first: pages embed their hashed names
+        assets = {
+            path: _make_asset(path, body, mtime)
+            for path, (body, mtime) in files.items()
+            if os.path.splitext(path)[1].lower() not in PAGE_SUFFIXES
+        }
+        pages = []
+        for path, (body, mtime) in files.items():
+            if path in assets:
+                continue
+            html, linked = cls._rewrite_references(path, body.decode("utf-8"), assets, mount_path)
+            # A page changes when an asset it links to does
+            mtime = max([mtime] + [asset.mtime for asset in linked])
+            pages.append(_make_asset(path, html.encode("utf-8"), mtime))
+        return cls(list(assets.values()) + pages, mount_path)
+
+    @staticmethod
+    def _rewrite_references(page: str, html: str, assets: Dict[str, Asset], mount_path: str):
+        base = os.path.dirname(page)
+        linked: List[Asset] = []
+
+        def replace(match: "re.Match") -> str:
+            reference = match.group(3)
+            if re.match(r"^(?:[a-z][a-z0-9+.-]*:|//|/|#)", reference, re.IGNORECASE):
+                return match.group(0)  # absolute URL, data: URI or fragment
+            asset = assets.get(os.path.normpath(os.path.join(base, reference.split("?")[0])).replace(os.sep, "/"))
+            if asset is None:
+                return match.group(0)  # another page, or not a served file
+            linked.append(asset)
+            return f"{match.group(1)}{match.group(2)}{mount_path}/{asset.hashed_path}{match.group(2)}"
+
+        return _REFERENCE.sub(replace, html), linked
+
+    def response(self, path: str, headers) -> Optional[Response]:
+        """
+        The response for `path` given the request headers: a 304 when the
+        client's copy is current, else the smallest accepted encoding.
+        None when there is no such asset.
+        """
+        entry = self._routes.get(path)
+        if entry is None:
+            return None
+        asset, immutable = entry
+
+        accepted = accepted_encodings(headers.get("accept-encoding"))
+        encoding = next(
+            (e for e in ("br", "gzip") if e in asset.bodies and (e in accepted or "*" in accepted)),
+            "identity",
+        )
+        etag = f'"{asset.digest}"' if encoding == "identity" else f'"{asset.digest}-{encoding}"'
+        response_headers = {
+            "ETag": etag,
+            "Last-Modified": formatdate(asset.mtime, usegmt=True),
+            "Cache-Control": IMMUTABLE if immutable else REVALIDATE,
+            "Vary": "Accept-Encoding",
+        }
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match is not None:
+            # Any encoding of this content is current
+            current = any(
+                etag_matches(if_none_match, f'"{asset.digest}"' if e == "identity" else f'"{asset.digest}-{e}"')
+                for e in asset.bodies
+            )
+        else:
+            current = self._not_modified_since(headers.get("if-modified-since"), asset.mtime)
+        if current:
+            # A 304 repeats only the validators and caching headers (RFC 9110, 15.4.5)
+            del response_headers["Last-Modified"]
+            return Response(status_code=304, headers=response_headers)
+
+        if encoding != "identity":
+            response_headers["Content-Encoding"] = encoding
+        return Response(asset.bodies[encoding], media_type=asset.media_type, headers=response_headers)
+
+    @staticmethod
+    def _not_modified_since(if_modified_since: Optional[str], mtime: float) -> bool:
+        if not if_modified_since:
+            return False
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return int(mtime) <= since.timestamp()
@@ -0,0 +1,13 @@
+"""Helpers shared by the benchmark scripts."""
+import statistics
+import time
+
+
+def time_ms(fn, repeat: int) -> float:
+    """Median wall time of `fn()` over `repeat` calls, in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
@@ -0,0 +1,177 @@
+"""
+Read endpoints under concurrent load: the async routers vs the previous sync
+path (`def` endpoints with a sync Session, run on Starlette's threadpool).
+
+Usage (from backend/):
+    python -m benchmarks.async_load --concurrency 64 --duration 10
+
+A temp database is seeded once, then each app is served by uvicorn in its
+own process against it:
+
+- sync: `sync_app` below, the list/get endpoints as they were before the
+  async layer (sync `crud.get_*`, one threadpool thread per request)
+- async: `app.main:app`
+
+Closed-loop clients (`--concurrency` of them, in this process) hit each
+endpoint for `--duration` seconds. Reported per endpoint: requests per
+second, p50 and p99 latency, and non-200 responses. On a small machine the
+client shares CPUs with the server, which lowers both absolute figures alike.
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.db import crud, database, schemas
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATIENTS, DOCTORS, APPOINTMENTS = 20_000, 200, 200_000
+
+# =========================================================
+# The sync baseline
+# =========================================================
+sync_app = FastAPI()
+
+
+def get_sync_db():
+    db = database.SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@sync_app.get("/patients/", response_model=List[schemas.Patient])
+def list_patients(skip: int = 0, limit: int = Query(100, le=500), db: Session = Depends(get_sync_db)):
+    return crud.get_patients(db=db, skip=skip, limit=limit)
+
+
+@sync_app.get("/patients/{patient_id}", response_model=schemas.Patient)
+def get_patient(patient_id: int, db: Session = Depends(get_sync_db)):
+    patient = crud.get_patient(db=db, patient_id=patient_id)
+    if not patient:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    return patient
+
+
+@sync_app.get("/appointments/", response_model=List[schemas.Appointment])
+def list_appointments(
+    skip: int = 0, limit: int = Query(100, le=500), patient_id: Optional[int] = None,
+    db: Session = Depends(get_sync_db),
+):
+    return crud.get_appointments(db=db, skip=skip, limit=limit, patient_id=patient_id)
+
+
+@sync_app.get("/appointments/{appointment_id}", response_model=schemas.Appointment)
+def get_appointment(appointment_id: int, db: Session = Depends(get_sync_db)):
+    appointment = crud.get_appointment(db=db, appointment_id=appointment_id)
+    if not appointment:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    return appointment
+
+# =========================================================
+# Load generation
+# =========================================================
+ENDPOINTS = {
+    "GET /patients/?limit=50": lambda rng: f"/patients/?limit=50&skip={rng.randrange(0, PATIENTS - 50)}",
+    "GET /patients/{id}": lambda rng: f"/patients/{rng.randint(1, PATIENTS)}",
+    "GET /appointments/?patient_id": lambda rng: f"/appointments/?patient_id={rng.randint(1, PATIENTS)}",
+    "GET /appointments/{id}": lambda rng: f"/appointments/{rng.randint(1, APPOINTMENTS)}",
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve(target: str, workdir: str) -> tuple:
+    port = _free_port()
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, NLP_JOB_WORKERS="0", NLP_LLM_BACKEND="fake",
+               DATABASE_URL="sqlite:///" + os.path.join(workdir, "emr.db"))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", target, "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        cwd=workdir, env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(200):
+        try:
+            httpx.get(base_url + "/patients/1")
+            break
+        except httpx.TransportError:
+            time.sleep(0.1)
+    return server, base_url
+
+
+async def load(base_url: str, path_for, concurrency: int, duration: float) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker(seed: int) -> None:
+            nonlocal errors
+            rng = random.Random(seed)
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                r = await client.get(path_for(rng))
+                latencies.append(time.perf_counter() - start)
+                errors += r.status_code != 200
+
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / duration,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per endpoint and app")
+    args = parser.parse_args()
+
+    from benchmarks.seed import seed
+
+    workdir = tempfile.mkdtemp(prefix="emr-async-load-")
+    engine = database.make_engine("sqlite:///" + os.path.join(workdir, "emr.db"))
+    database.init_db(bind=engine)
+    seed(engine, patients=PATIENTS, doctors=DOCTORS, appointments=APPOINTMENTS)
+    engine.dispose()
+
+    print(f"concurrency={args.concurrency} duration={args.duration}s per endpoint")
+    results = {}
+    for name, target in (("sync", "benchmarks.async_load:sync_app"), ("async", "app.main:app")):
+        server, base_url = serve(target, workdir)
+        try:
+            for label, path_for in ENDPOINTS.items():
+                results[name, label] = asyncio.run(load(base_url, path_for, args.concurrency, args.duration))
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"  {'endpoint':<32} {'path':<6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for label in ENDPOINTS:
+        for name in ("sync", "async"):
+            r = results[name, label]
+            print(f"  {label:<32} {name:<6} {r['rps']:8.1f} {r['p50_ms']:8.1f} {r['p99_ms']:8.1f} {r['errors']:7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Bulk import throughput: rows per minute through the CSV / NDJSON import
+endpoints, against one `POST` per record.
+
+Usage (from backend/):
+    python -m benchmarks.bulk_import --rows 100000
+
+Runs the app in-process over ASGI against a fresh database in a temp
+directory. Patients and doctors are imported first (CSV), then appointments
+referencing them (NDJSON); 1% of appointment rows point at a missing patient
+to exercise the per-row error path. The single-POST baseline is timed on
+`--baseline-rows` records and extrapolated.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.chdir(tempfile.mkdtemp(prefix="emr-bulk-"))  # keep emr.db and nlp_results.json out of the tree
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.abspath("emr.db")
+os.environ.setdefault("NLP_LLM_BACKEND", "fake")
+os.environ.setdefault("NLP_JOB_WORKERS", "0")
+
+import httpx  # noqa: E402
+
+BASELINE_START = datetime(2030, 6, 1, 9, 0)
+
+
+def patients_csv(n: int, rng: random.Random) -> bytes:
+    lines = ["name,age,gender,allergies"]
+    lines += [f"Patient {i},{rng.randint(1, 95)},{rng.choice(['Male', 'Female'])},{rng.choice(['', 'Latex'])}"
+              for i in range(n)]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def doctors_csv(n: int) -> bytes:
+    lines = ["name,specialty,contact"] + [f"Dr. {i},Cardiology,+91-{i:010d}" for i in range(n)]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def appointments_ndjson(n: int, patients: int, doctors: int, rng: random.Random) -> bytes:
+    rows = []
+    for i in range(n):
+        patient_id = patients + 1 if i % 100 == 0 else rng.randint(1, patients)
+        rows.append(json.dumps({
+            "patient_id": patient_id,
+            "doctor_id": rng.randint(1, doctors),
+            "date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(8, 17):02d}:00:00",
+            "notes": "Routine check-up",
+        }))
+    return ("\n".join(rows) + "\n").encode()
+
+
+async def run(args) -> None:
+    from app.main import app
+
+    rng = random.Random(42)
+    patients, doctors = max(args.rows // 10, 10), max(args.rows // 1000, 10)
+    transport = httpx.ASGITransport(app=app)
+    # The lifespan creates the schema, as under uvicorn
+    async with app.router.lifespan_context(app), \
+            httpx.AsyncClient(transport=transport, base_url="http://app", timeout=None) as client:
+        for label, path, body, content_type, rows in (
+            ("patients", "/patients/import", patients_csv(patients, rng), "text/csv", patients),
+            ("doctors", "/doctors/import", doctors_csv(doctors), "text/csv", doctors),
+            ("appointments", "/appointments/import", appointments_ndjson(args.rows, patients, doctors, rng),
+             "application/x-ndjson", args.rows),
+        ):
+            start = time.perf_counter()
+            r = await client.post(path, content=body, headers={"content-type": content_type})
+            elapsed = time.perf_counter() - start
+            report = r.json()
+            print(f"  bulk {label:<13} {rows:>9,} rows {elapsed:7.2f}s  {rows / elapsed * 60:>12,.0f} rows/min"
+                  f"  (inserted {report['inserted']:,}, failed {report['failed']:,})")
+
+        start = time.perf_counter()
+        for i in range(args.baseline_rows):
+            await client.post("/appointments/", json={
+                "patient_id": rng.randint(1, patients), "doctor_id": rng.randint(1, doctors),
+                # One slot apart, so no request is rejected as a double booking
+                "date": (BASELINE_START + timedelta(minutes=30 * i)).isoformat(),
+            })
+        elapsed = time.perf_counter() - start
+        print(f"  single POST /appointments/ {args.baseline_rows:>5,} rows {elapsed:7.2f}s"
+              f"  {args.baseline_rows / elapsed * 60:>12,.0f} rows/min")
+
+        start = time.perf_counter()
+        size = 0
+        async with client.stream("GET", "/appointments/export?format=csv") as r:
+            async for chunk in r.aiter_bytes():
+                size += len(chunk)
+        print(f"  export appointments csv   {size / 1e6:8.1f} MB in {time.perf_counter() - start:.2f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="appointments to import")
+    parser.add_argument("--baseline-rows", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
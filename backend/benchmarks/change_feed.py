@@ -0,0 +1,167 @@
+"""
+Keeping a list current: refetching it after every write vs the change feed.
+
+Usage (from backend/):
+    python -m benchmarks.change_feed --writes 50
+
+A temp database is seeded and served by uvicorn. One client makes
+`--writes` patient updates while another keeps the patients list current:
+
+- refetch: GET /patients/?limit=<--page> after every write, as the
+  frontend pages did
+- poll deltas: GET /changes/?since=<version>&entity=patient after every
+  write, applying the changed rows to its local copy
+- push: one GET /changes/stream subscription; each write arrives as a
+  `changes` event
+
+Reported per strategy: bytes received per write (body as sent, before
+decompression), client time per refresh, and for push the delay from the
+write's response to the event. Every strategy's local copy must end equal
+to a fresh list; the script exits non-zero if one does not.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import httpx
+
+from app.db import database
+from benchmarks.async_load import serve
+
+PATIENTS = 5_000
+
+
+def body_bytes(response: httpx.Response) -> int:
+    return int(response.headers.get("content-length", len(response.content)))
+
+
+def apply(rows: Dict[int, dict], page: dict) -> None:
+    for change in page["changes"]:
+        if change["op"] == "delete":
+            rows.pop(change["id"], None)
+        else:
+            rows[change["id"]] = change["data"]
+
+
+async def run(base_url: str, args) -> int:
+    list_url = f"/patients/?limit={args.page}"
+    headers = {"accept-encoding": "gzip"}
+    results: Dict[str, dict] = {}
+    truth: Dict[str, Dict[int, dict]] = {}  # the list right after each strategy's run
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        async def current_list() -> Dict[int, dict]:
+            return {r["id"]: r for r in (await client.get(list_url)).json()}
+
+        async def write(n: int) -> float:
+            patient_id = 1 + (n * 37) % args.page  # rows the list shows
+            (await client.put(f"/patients/{patient_id}", json={"age": 20 + n % 70})).raise_for_status()
+            return time.perf_counter()
+
+        # ---------------- refetch ----------------
+        received, times = 0, []
+        for n in range(args.writes):
+            await write(n)
+            start = time.perf_counter()
+            response = await client.get(list_url, headers=headers)
+            times.append(time.perf_counter() - start)
+            received += body_bytes(response)
+        results["refetch"] = {"bytes": received, "times": times, "rows": {r["id"]: r for r in response.json()}}
+        truth["refetch"] = await current_list()
+
+        # ---------------- poll deltas ----------------
+        version = (await client.get("/changes/")).json()["version"]
+        rows = await current_list()
+        received, times = 0, []
+        for n in range(args.writes):
+            await write(n + args.writes)
+            start = time.perf_counter()
+            response = await client.get("/changes/", params={"since": version, "entity": "patient"}, headers=headers)
+            page = response.json()
+            apply(rows, page)
+            version = page["version"]
+            times.append(time.perf_counter() - start)
+            received += body_bytes(response)
+        results["poll deltas"] = {"bytes": received, "times": times, "rows": rows}
+        truth["poll deltas"] = await current_list()
+
+        # ---------------- push ----------------
+        version = (await client.get("/changes/")).json()["version"]
+        rows = await current_list()
+        delays: List[float] = []
+        received = 0
+        async with httpx.AsyncClient(base_url=base_url, timeout=None) as subscriber:
+            async with subscriber.stream("GET", "/changes/stream",
+                                         params={"since": version, "entity": "patient"}) as stream:
+                lines = stream.aiter_lines()
+                async def next_event() -> dict:
+                    nonlocal received
+                    event = {}
+                    async for line in lines:
+                        received += len(line) + 1
+                        if not line:
+                            if "event" in event:
+                                return event
+                            continue
+                        field, _, value = line.partition(": ")
+                        event[field] = value
+                    raise RuntimeError("stream ended")
+
+                assert (await next_event())["event"] == "ready"
+                received = 0
+                for n in range(args.writes):
+                    written = await write(n + 2 * args.writes)
+                    event = await next_event()
+                    while event.get("event") != "changes":
+                        event = await next_event()
+                    delays.append(time.perf_counter() - written)
+                    apply(rows, json.loads(event["data"]))
+        results["push"] = {"bytes": received, "times": delays, "rows": rows}
+        truth["push"] = await current_list()
+
+    print(f"writes={args.writes} list page={args.page} rows")
+    print(f"  {'strategy':<12} {'bytes/write':>12} {'ms/refresh p50':>15} {'p95':>8} {'up to date':>11}")
+    failures = 0
+    for name, r in results.items():
+        times = sorted(r["times"])
+        p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+        current = {k: v for k, v in r["rows"].items() if k in truth[name]} == truth[name]
+        failures += not current
+        print(f"  {name:<12} {r['bytes'] / args.writes:>12,.0f} {statistics.median(times) * 1000:>15.1f}"
+              f" {p95 * 1000:>8.1f} {'yes' if current else 'NO':>11}")
+    print("  (push: ms from the write's response to the event)")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writes", type=int, default=50)
+    parser.add_argument("--page", type=int, default=100, help="list size the client shows (the list default is 100)")
+    args = parser.parse_args()
+
+    from benchmarks.seed import seed
+
+    workdir = tempfile.mkdtemp(prefix="emr-change-feed-")
+    engine = database.make_engine("sqlite:///" + os.path.join(workdir, "emr.db"))
+    database.init_db(bind=engine)
+    seed(engine, patients=PATIENTS, doctors=50, appointments=PATIENTS * 2)
+    engine.dispose()
+
+    server, base_url = serve("app.main:app", workdir)
+    try:
+        failures = asyncio.run(run(base_url, args))
+    finally:
+        server.terminate()
+        server.wait()
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
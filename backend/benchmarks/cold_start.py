@@ -0,0 +1,141 @@
+"""
+Cold start of a worker process: interpreter to first served request.
+
+Usage (from backend/):
+    python -m benchmarks.cold_start --repeat 5
+
+Every sample is a fresh Python process (so nothing is cached in
+`sys.modules`), run in a temp directory with the fake LLM backend. Reported,
+median and worst of `--repeat` samples in milliseconds:
+
+- import app.main: importing the application module, which must do no I/O
+- startup, fresh db: the lifespan startup phase on an empty database
+  (configuration check, schema, indexes, search index, dashboard counters)
+- startup, existing db: the same against a database created by an earlier
+  process, the usual case for a restarted or autoscaled replica
+- process total: interpreter start, import and startup, as seen by the parent
+- uvicorn to /health: spawning `uvicorn app.main:app` until the first
+  GET /health returns 200
+
+The `--importtime` flag instead prints the slowest third-party modules the
+`app` package imports (`python -X importtime`, one process).
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.async_load import BACKEND_DIR, _free_port
+
+# Run in the child: times the import and the lifespan startup separately
+CHILD = """
+import asyncio, json, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def startup():
+    async with app.router.lifespan_context(app):
+        return time.perf_counter()
+
+started = asyncio.run(startup())
+print(json.dumps({"import": imported - start, "startup": started - imported}))
+"""
+
+
+def _env(workdir: str) -> dict:
+    return dict(os.environ, PYTHONPATH=BACKEND_DIR, NLP_JOB_WORKERS="0", NLP_LLM_BACKEND="fake",
+                DATABASE_URL="sqlite:///" + os.path.join(workdir, "emr.db"))
+
+
+def in_process(workdir: str) -> dict:
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", CHILD], cwd=workdir, env=_env(workdir),
+                         capture_output=True, text=True, check=True).stdout
+    timings = json.loads(out.strip().splitlines()[-1])
+    timings["total"] = time.perf_counter() - start
+    return timings
+
+
+def uvicorn_to_health(workdir: str) -> float:
+    port = _free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=_env(workdir),
+    )
+    try:
+        while True:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+            time.sleep(0.01)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def importtime(workdir: str, top: int) -> None:
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"], cwd=workdir,
+                         env=_env(workdir), capture_output=True, text=True, check=True).stderr
+    # Children are printed before their parent, one level deeper (two spaces)
+    lines = [line[len("import time:"):].split("|") for line in err.splitlines()[1:]]
+    entries = [(len(name) - len(name.lstrip()), int(cumulative), name.strip()) for _, cumulative, name in lines]
+    rows = []
+    for i, (depth, cumulative, name) in enumerate(entries):
+        parent = next((n for d, _, n in entries[i + 1:] if d < depth), None)
+        if parent and parent.split(".")[0] == "app" and name.split(".")[0] != "app":
+            rows.append((cumulative, name, parent))
+    print("slowest modules imported by the app package (cumulative ms):")
+    for cumulative, name, parent in sorted(rows, reverse=True)[:top]:
+        print(f"  {cumulative / 1000:>8.1f}  {name:<32} from {parent}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--importtime", action="store_true")
+    parser.add_argument("--top", type=int, default=15, help="imports listed with --importtime")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="emr-cold-")
+    try:
+        if args.importtime:
+            importtime(workdir, args.top)
+            return
+
+        samples = {"import app.main": [], "startup, fresh db": [], "startup, existing db": [],
+                   "process total": [], "uvicorn to /health": []}
+        for _ in range(args.repeat):
+            db_path = os.path.join(workdir, "emr.db")
+            if os.path.exists(db_path):
+                os.remove(db_path)
+            fresh = in_process(workdir)
+            existing = in_process(workdir)
+            samples["import app.main"] += [fresh["import"], existing["import"]]
+            samples["startup, fresh db"].append(fresh["startup"])
+            samples["startup, existing db"].append(existing["startup"])
+            samples["process total"].append(existing["total"])
+            samples["uvicorn to /health"].append(uvicorn_to_health(workdir))
+
+        print(f"repeat={args.repeat} (ms)")
+        print(f"  {'phase':<22} {'median':>8} {'max':>8}")
+        for label, values in samples.items():
+            print(f"  {label:<22} {statistics.median(values) * 1000:>8.0f} {max(values) * 1000:>8.0f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Dashboard latency as the appointment count grows: full-scan queries vs the
+incrementally maintained rollup counters.
+
+Usage (from backend/):
+    python -m benchmarks.dashboard --sizes 10000,100000,1000000
+
+For each size a fresh database is seeded (doctors and patients scale with it)
+and both paths are timed:
+
+- scan: the previous `GET /dashboard/` body, i.e. three COUNTs, two GROUP BY
+  joins over appointments and a year/month grouping
+- rollup: the current `GET /dashboard/` computation (cache bypassed),
+  reading `dashboard_counters`
+
+Doctors are fixed at `--doctors` so the rollup read stays the same size and
+only the appointment count varies. Both paths must return the same payload.
+"""
+import argparse
+
+from sqlalchemy import extract, func
+
+from app.db import models
+from app.routers.dashboard import compute_dashboard_stats
+from benchmarks._util import time_ms
+from benchmarks.seed import seed, session_factory, temp_engine
+
+
+def scan_dashboard(db) -> dict:
+    """The per-request aggregation the dashboard used before the rollups."""
+    Doctor, Appointment = models.Doctor, models.Appointment
+    per_doctor = (
+        db.query(Doctor.name, func.count(Appointment.id))
+        .join(Appointment, Doctor.id == Appointment.doctor_id, isouter=True)
+        .group_by(Doctor.id)
+        .all()
+    )
+    patients_per_doctor = (
+        db.query(Doctor.name, func.count(func.distinct(Appointment.patient_id)))
+        .join(Appointment, Doctor.id == Appointment.doctor_id, isouter=True)
+        .group_by(Doctor.id)
+        .all()
+    )
+    monthly = (
+        db.query(
+            extract("year", Appointment.date).label("year"),
+            extract("month", Appointment.date).label("month"),
+            func.count(Appointment.id),
+        )
+        .group_by("year", "month")
+        .order_by("year", "month")
+        .all()
+    )
+    return {
+        "total_patients": db.query(func.count(models.Patient.id)).scalar(),
+        "total_doctors": db.query(func.count(Doctor.id)).scalar(),
+        "total_appointments": db.query(func.count(Appointment.id)).scalar(),
+        "appointments_per_doctor": dict(per_doctor),
+        "patients_per_doctor": dict(patients_per_doctor),
+        "monthly_appointments": {f"{int(y)}-{int(m):02d}": n for y, m, n in monthly},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma-separated appointment counts")
+    parser.add_argument("--doctors", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'appointments':>12} {'scan (ms)':>10} {'rollup (ms)':>12}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        engine = temp_engine()
+        seed(engine, patients=max(size // 10, 10), doctors=args.doctors, appointments=size)
+        db = session_factory(engine)()
+        try:
+            assert compute_dashboard_stats(db) == scan_dashboard(db), "rollup counters disagree with a full scan"
+            scan = time_ms(lambda: scan_dashboard(db), args.repeat)
+            rollup = time_ms(lambda: compute_dashboard_stats(db), args.repeat)
+            print(f"{size:>12,} {scan:>10.3f} {rollup:>12.3f}")
+        finally:
+            db.close()
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Filtered list latency as the tables grow.
+
+Usage (from backend/):
+    python -m benchmarks.list_filters --sizes 10000 100000 1000000
+
+For each size a fresh SQLite database is seeded and the filtered `crud.get_*`
+calls used by the list endpoints are timed. The indexed appointment filters
+(patient_id, doctor_id) should stay flat as the tables grow.
+Substring filters (`name`, `specialty`) cannot use a B-tree index, but they
+stop scanning as soon as a page is filled.
+"""
+import argparse
+
+from app.db import crud
+from benchmarks._util import time_ms
+from benchmarks.seed import seed, session_factory, temp_engine
+
+
+def run(size: int, repeat: int) -> dict:
+    engine = temp_engine()
+    seed(engine, patients=max(size // 10, 10), doctors=max(size // 1000, 10), appointments=size)
+    db = session_factory(engine)()
+    try:
+        cases = {
+            "appointments?patient_id": lambda: crud.get_appointments(db, limit=100, patient_id=7),
+            "appointments?doctor_id": lambda: crud.get_appointments(db, limit=100, doctor_id=3),
+            "patients?age": lambda: crud.get_patients(db, limit=100, age=42),
+            "patients?name": lambda: crud.get_patients(db, limit=100, name="kumar"),
+            "doctors?specialty": lambda: crud.get_doctors(db, limit=100, specialty="cardio"),
+        }
+        return {label: time_ms(fn, repeat) for label, fn in cases.items()}
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        print(f"\nappointments={size:,}")
+        for label, ms in run(size, args.repeat).items():
+            print(f"  {label:<28} {ms:8.3f} ms (median)")
+
+
+if __name__ == "__main__":
+    main()
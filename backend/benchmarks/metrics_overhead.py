@@ -0,0 +1,88 @@
+"""
+Cost of the request metrics (app/services/metrics.py) on cheap endpoints.
+
+Usage (from backend/):
+    python -m benchmarks.metrics_overhead --requests 2000
+
+Runs the app in-process over ASGI against a seeded database in a temp
+directory and times the same requests with metrics on and off
+(`metrics.ENABLED`), alternating rounds so drift hits both alike. The cheaper
+the endpoint, the larger the share the middleware and query hooks take:
+
+- GET /health: no database work, the worst case
+- GET /patients/{id}: one primary-key query
+- GET /appointments/?limit=100: one list query
+
+Reported: median microseconds per request in each mode and the overhead.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+os.chdir(tempfile.mkdtemp(prefix="emr-metrics-"))  # keep emr.db and nlp_results.json out of the tree
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.abspath("emr.db")
+os.environ.setdefault("NLP_LLM_BACKEND", "fake")
+os.environ.setdefault("NLP_JOB_WORKERS", "0")
+
+import httpx  # noqa: E402
+
+CASES = [
+    ("GET /health", "/health"),
+    ("GET /patients/{id}", "/patients/7"),
+    ("GET /appointments/?limit=100", "/appointments/?limit=100"),
+]
+
+
+def seed_database(patients: int, appointments: int) -> None:
+    from app.db.database import init_db, make_engine
+    from benchmarks.seed import seed
+
+    engine = make_engine(os.environ["DATABASE_URL"])
+    init_db(bind=engine)
+    seed(engine, patients=patients, doctors=max(patients // 100, 10), appointments=appointments)
+    engine.dispose()
+
+
+async def run(args) -> None:
+    from app.main import app
+    from app.services import metrics
+
+    async def timed_round(client: httpx.AsyncClient, path: str, enabled: bool) -> float:
+        metrics.ENABLED = enabled
+        start = time.perf_counter()
+        for _ in range(args.requests // args.rounds):
+            (await client.get(path)).raise_for_status()
+        return (time.perf_counter() - start) * 1e6 / (args.requests // args.rounds)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+        print(f"requests={args.requests} per case and mode, {args.rounds} alternating rounds")
+        print(f"  {'endpoint':<30} {'off us':>8} {'on us':>8} {'overhead':>9}")
+        for label, path in CASES:
+            await timed_round(client, path, True)  # warm up
+            off, on = [], []
+            for _ in range(args.rounds):
+                off.append(await timed_round(client, path, False))
+                on.append(await timed_round(client, path, True))
+            off_us, on_us = statistics.median(off), statistics.median(on)
+            print(f"  {label:<30} {off_us:>8.0f} {on_us:>8.0f} {(on_us - off_us) / off_us:>9.1%}")
+    metrics.ENABLED = True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--patients", type=int, default=1000)
+    parser.add_argument("--appointments", type=int, default=10_000)
+    args = parser.parse_args()
+
+    seed_database(args.patients, args.appointments)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Concurrent NLP throughput: blocking per-call client vs the shared async client.
+
+Usage (from backend/):
+    python -m benchmarks.nlp_load --requests 320 --concurrency 64 --latency 0.5
+
+A local stub server (benchmarks/stub_llm.py), running in a separate process,
+answers every upstream call after `--latency` seconds. Both modes push `--requests` unique notes through
+`POST /nlp/` in-process via ASGI:
+
+- blocking: `call_llm` swapped for the original Gemini call, a
+  session-less `requests.post` run on Starlette's threadpool
+- async: the current `call_llm` through the provider router and the
+  Gemini provider's pooled client
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.chdir(tempfile.mkdtemp(prefix="emr-nlp-load-"))  # keep emr.db and nlp_results.json out of the tree
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.abspath("emr.db")
+os.environ.setdefault("NLP_JOB_WORKERS", "0")
+
+import httpx  # noqa: E402
+from fastapi.concurrency import run_in_threadpool  # noqa: E402
+
+from benchmarks.stub_llm import start_in_subprocess  # noqa: E402
+
+
+def blocking_call_factory(base_url: str):
+    import requests
+
+    def call(prompt: str, model: str = "gemini-1.5-flash") -> str:
+        url = f"{base_url}/models/{model}:generateContent"
+        payload = {"contents": [{"parts": [{"text": prompt}]}]}
+        response = requests.post(url, json=payload, params={"key": "stub"})
+        return response.json()["candidates"][0]["content"]["parts"][0]["text"]
+
+    async def async_wrapper(prompt: str, provider=None, model=None, json_output=False) -> str:
+        return await run_in_threadpool(call, prompt, model or "gemini-1.5-flash")
+
+    return async_wrapper
+
+
+async def drive(app, total: int, concurrency: int, tag: str) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=None) as client:
+        async def one(i: int) -> None:
+            async with semaphore:
+                r = await client.post("/nlp/", json={"task": "summarize", "text": f"{tag} note {i}"})
+                assert r.status_code == 200, r.text
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        return time.perf_counter() - start
+
+
+async def main_async(args) -> None:
+    stub, base_url = start_in_subprocess(latency=args.latency)
+    os.environ["GEMINI_BASE_URL"] = base_url
+    os.environ.setdefault("GOOGLE_API_KEY", "stub")
+    os.environ["LLM_PROVIDERS"] = "gemini"
+    os.environ.setdefault("LLM_MAX_CONCURRENCY", str(args.concurrency))
+    os.environ.setdefault("LLM_MAX_CONNECTIONS", str(args.concurrency))
+
+    from app.main import app
+    from app.routers import nlp
+
+    async_call = nlp.call_llm
+    # The lifespan creates the schema and closes the provider clients, as under uvicorn
+    async with app.router.lifespan_context(app):
+        for mode in ("blocking", "async"):
+            nlp.call_llm = blocking_call_factory(base_url) if mode == "blocking" else async_call
+            elapsed = await drive(app, args.requests, args.concurrency, tag=f"{mode}-{time.time()}")
+            print(f"  {mode:<9} {args.requests / elapsed:8.1f} req/s  ({elapsed:.2f}s for {args.requests})")
+
+    nlp.call_llm = async_call
+    stub.terminate()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=320)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+    print(f"requests={args.requests} concurrency={args.concurrency} upstream latency={args.latency}s")
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Time to first byte: POST /nlp/ vs POST /nlp/stream.
+
+Usage (from backend/):
+    python -m benchmarks.nlp_stream --latency 2.0 --runs 5
+
+Serves the app with uvicorn against the local stub LLM (benchmarks/stub_llm.py),
+both in separate processes, and reports time to first body byte and to the
+complete response for each endpoint. The stub spreads `--latency` over its
+streamed chunks, so the streaming endpoint should deliver its first token
+after roughly latency / chunks.
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.stub_llm import start_in_subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _measure(client: httpx.Client, path: str, text: str) -> tuple:
+    start = time.perf_counter()
+    first = None
+    with client.stream("POST", path, json={"task": "treatment_plan", "text": text}) as response:
+        response.raise_for_status()
+        for _ in response.iter_raw():
+            if first is None:
+                first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=2.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    stub, base_url = start_in_subprocess(latency=args.latency)
+    port = _free_port()
+    workdir = tempfile.mkdtemp(prefix="emr-nlp-stream-")
+    env = dict(os.environ, GEMINI_BASE_URL=base_url, GOOGLE_API_KEY=os.getenv("GOOGLE_API_KEY", "stub"),
+               LLM_PROVIDERS="gemini", PYTHONPATH=BACKEND_DIR, NLP_JOB_WORKERS="0",
+               DATABASE_URL="sqlite:///" + os.path.join(workdir, "emr.db"))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+            for _ in range(100):
+                try:
+                    client.get("/health")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.1)
+            print(f"upstream latency={args.latency}s runs={args.runs}")
+            for path in ("/nlp/", "/nlp/stream"):
+                samples = [_measure(client, path, f"{path} note {time.time()} {i}") for i in range(args.runs)]
+                ttfb = statistics.median(s[0] for s in samples) * 1000
+                total = statistics.median(s[1] for s in samples) * 1000
+                print(f"  {path:<12} first byte {ttfb:8.1f} ms   complete {total:8.1f} ms (median)")
+    finally:
+        server.terminate()
+        server.wait()
+        stub.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+OFFSET vs keyset pagination on the appointments table.
+
+Usage (from backend/):
+    python -m benchmarks.pagination --rows 1000000 --limit 100
+
+Times page 1 and page `--deep-page` (default 10,000) in both modes. With
+OFFSET, SQLite walks and discards every earlier row, so the deep page gets
+slower with depth; the keyset page seeks on the `(date, id)` index and costs
+the same as page 1.
+"""
+import argparse
+
+from app.db import crud, models
+from benchmarks._util import time_ms
+from benchmarks.seed import seed, session_factory, temp_engine
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--deep-page", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    deep_skip = (args.deep_page - 1) * args.limit
+    if deep_skip >= args.rows:
+        parser.error("--rows must exceed (deep_page - 1) * limit")
+
+    engine = temp_engine()
+    seed(engine, patients=max(args.rows // 10, 10), doctors=max(args.rows // 1000, 10), appointments=args.rows)
+    db = session_factory(engine)()
+    try:
+        # Cursor for the deep page: the (date, id) key of the row just before it
+        before = (
+            db.query(models.Appointment.date, models.Appointment.id)
+            .order_by(models.Appointment.date, models.Appointment.id)
+            .offset(deep_skip - 1)
+            .first()
+        )
+        cases = {
+            "offset page 1": lambda: crud.get_appointments(db, skip=0, limit=args.limit),
+            f"offset page {args.deep_page:,}": lambda: crud.get_appointments(db, skip=deep_skip, limit=args.limit),
+            "keyset page 1": lambda: crud.get_appointments(db, limit=args.limit, keyset=True),
+            f"keyset page {args.deep_page:,}": lambda: crud.get_appointments(db, limit=args.limit, after=tuple(before)),
+        }
+        print(f"appointments={args.rows:,} limit={args.limit}")
+        for label, fn in cases.items():
+            print(f"  {label:<22} {time_ms(fn, args.repeat):8.3f} ms (median)")
+    finally:
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
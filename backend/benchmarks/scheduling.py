@@ -0,0 +1,119 @@
+"""
+Double-booking checks and free-slot search against a busy schedule.
+
+Usage (from backend/):
+    python -m benchmarks.scheduling --doctors 500 --history 1000000
+
+A fresh database is seeded with `--history` past appointments (see
+benchmarks/seed.py), then every doctor gets a dense upcoming fortnight:
+each slot of the default working hours is booked with probability
+`--occupancy`. Timed, median of `--repeat`:
+
+- overlap check: `scheduling.find_conflict` for a random doctor and time,
+  the query behind every appointment create and reschedule
+- free slots: `scheduling.find_free_slots` (`GET /schedule/free-slots`) for
+  one doctor, one specialty and all doctors
+
+The target is well under 50 ms for a search across hundreds of doctors.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.db import models, scheduling
+from app.db.database import make_async_engine
+from benchmarks.seed import SPECIALTIES, seed, session_factory, temp_engine
+
+DAYS = 14
+
+
+def book_upcoming(engine, doctors: int, start: datetime, occupancy: float, rng: random.Random) -> int:
+    """Book each 30-minute default-hours slot of the next DAYS days with probability `occupancy`."""
+    open_at, close_at = (datetime.strptime(part, "%H:%M").time() for part in scheduling.DEFAULT_HOURS.split("-"))
+    workdays = {int(day) for day in scheduling.DEFAULT_DAYS.split(",")}
+    rows = []
+    for doctor_id in range(1, doctors + 1):
+        for n in range(DAYS):
+            day = start.date() + timedelta(days=n)
+            if day.weekday() not in workdays:
+                continue
+            slot, closes = datetime.combine(day, open_at), datetime.combine(day, close_at)
+            while slot < closes:
+                if rng.random() < occupancy:
+                    rows.append({"patient_id": rng.randint(1, 1000), "doctor_id": doctor_id, "date": slot,
+                                 "duration_minutes": 30, "notes": "Follow-up."})
+                slot += timedelta(minutes=30)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Appointment.__table__).returning(models.Appointment.id), rows)
+    return len(rows)
+
+
+def _median_ms(samples) -> float:
+    return statistics.median(samples) * 1000
+
+
+async def time_free_slots(Session, cases, start: datetime, repeat: int) -> None:
+    async with Session() as db:
+        for label, kwargs in cases:
+            samples, slots = [], []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                slots = await scheduling.find_free_slots(db, not_before=start, **kwargs)
+                samples.append(time.perf_counter() - t0)
+            last = slots[-1]["start"].strftime("%a %H:%M") if slots else "-"
+            print(f"  {label:<34} {len(slots):>6} {last:>10} {_median_ms(samples):9.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--doctors", type=int, default=500)
+    parser.add_argument("--history", type=int, default=1_000_000, help="past appointments to seed")
+    parser.add_argument("--occupancy", type=float, default=0.9)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    engine = temp_engine()
+    seed(engine, patients=max(args.history // 10, 1000), doctors=args.doctors, appointments=args.history)
+    # Next Monday 08:00, so the fortnight starts on a working day
+    today = datetime.now().replace(hour=8, minute=0, second=0, microsecond=0)
+    start = today + timedelta(days=7 - today.weekday())
+    booked = book_upcoming(engine, args.doctors, start, args.occupancy, rng)
+    print(f"doctors={args.doctors} history={args.history:,} upcoming booked={booked:,} "
+          f"occupancy={args.occupancy:.0%} (medians of {args.repeat})")
+
+    with session_factory(engine)() as db:
+        samples = []
+        for _ in range(args.repeat * 10):
+            doctor_id = rng.randint(1, args.doctors)
+            when = start + timedelta(days=rng.randrange(DAYS), minutes=30 * rng.randrange(20))
+            t0 = time.perf_counter()
+            scheduling.find_conflict(db, doctor_id, when, 30)
+            samples.append(time.perf_counter() - t0)
+        print(f"  overlap check: {_median_ms(samples):.3f} ms")
+
+    cases = [
+        ("one doctor, next 10", {"count": 10, "minutes": 30, "doctor_id": 1}),
+        ("one doctor, next 10 x 60 min", {"count": 10, "minutes": 60, "doctor_id": 1}),
+        ("one doctor, next 10 x 90 min", {"count": 10, "minutes": 90, "doctor_id": 1}),
+        (f"specialty ({SPECIALTIES[0]}), next 10", {"count": 10, "minutes": 30, "specialty": SPECIALTIES[0]}),
+        (f"all {args.doctors} doctors, next 10", {"count": 10, "minutes": 30}),
+        (f"all {args.doctors} doctors, next 100", {"count": 100, "minutes": 30}),
+        (f"all {args.doctors} doctors, 10 x 90 min", {"count": 10, "minutes": 90}),
+    ]
+    async_engine = make_async_engine(str(engine.url))
+    Session = async_sessionmaker(async_engine, expire_on_commit=False)
+    print(f"  {'free slots':<34} {'found':>6} {'last':>10} {'ms':>9}")
+    asyncio.run(time_free_slots(Session, cases, start, args.repeat))
+    asyncio.run(async_engine.dispose())
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
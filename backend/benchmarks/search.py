@@ -0,0 +1,101 @@
+"""
+Full-text search latency over appointment notes as the table grows.
+
+Usage (from backend/):
+    python -m benchmarks.search --sizes 100000,1000000
+
+For each size a fresh database is seeded (the FTS5 index is filled by its
+triggers during the seed), then a few notes are rewritten to mention a rare
+term, which also exercises the update trigger. Timed, median of `--repeat`:
+
+- like scan: the previous option, `notes LIKE '%...%'` newest first; for
+  the rare term it has to read every note
+- the search query behind `GET /search/appointments` (app/db/search.py) for
+  a rare term, a common term, a phrase and a prefix, ranked by bm25 and
+  newest first, plus the second page via the cursor
+
+Common terms match a large share of the notes (see FINDINGS in
+benchmarks/seed.py); bm25 ranking has to score every match, while
+`sort=recent` stops after one page.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.db import search
+from app.db.database import make_async_engine
+from benchmarks._util import time_ms
+from benchmarks.seed import seed, temp_engine
+
+RARE_TERM = "pheochromocytoma"
+RARE_NOTES = 50
+
+QUERIES = [
+    ("rare term", RARE_TERM, "rank"),
+    ("common term", "cardiology", "rank"),
+    ("common term", "cardiology", "recent"),
+    ("two terms", "chest pain", "rank"),
+    ("phrase", '"sinus rhythm"', "rank"),
+    ("prefix", "amlo*", "rank"),
+]
+
+
+async def _time_search(Session, q: str, sort: str, repeat: int) -> tuple:
+    samples, second_page = [], []
+    async with Session() as db:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            hits, after = await search.search(db, "appointments", q, limit=20, sort=sort)
+            samples.append(time.perf_counter() - start)
+            if after is not None:
+                start = time.perf_counter()
+                await search.search(db, "appointments", q, limit=20, sort=sort, after=after)
+                second_page.append(time.perf_counter() - start)
+        matches = (await db.execute(
+            text("SELECT count(*) FROM appointments_fts WHERE appointments_fts MATCH :q"),
+            {"q": search.match_expression(q)},
+        )).scalar()
+    median = lambda xs: statistics.median(xs) * 1000 if xs else float("nan")
+    return matches, median(samples), median(second_page)
+
+
+def _time_like(engine, pattern: str, repeat: int) -> float:
+    query = text("SELECT id FROM appointments WHERE notes LIKE :p ORDER BY date DESC LIMIT 20")
+    with engine.connect() as conn:
+        return time_ms(lambda: conn.execute(query, {"p": f"%{pattern}%"}).all(), repeat)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100000,1000000", help="comma-separated appointment counts")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        engine = temp_engine()
+        start = time.perf_counter()
+        seed(engine, patients=max(size // 10, 10), doctors=max(size // 1000, 10), appointments=size)
+        seeded = time.perf_counter() - start
+        with engine.begin() as conn:
+            conn.execute(text(
+                f"UPDATE appointments SET notes = notes || ' Suspected {RARE_TERM}.' WHERE id % :step = 0"
+            ), {"step": size // RARE_NOTES})
+
+        async_engine = make_async_engine(str(engine.url))
+        Session = async_sessionmaker(async_engine, expire_on_commit=False)
+        print(f"\n{size:,} appointments (seeded with FTS triggers in {seeded:.1f}s)")
+        print(f"  {'query':<14} {'q':<22} {'sort':<7} {'matches':>9} {'page 1 ms':>10} {'page 2 ms':>10}")
+        print(f"  {'like scan':<14} {RARE_TERM:<22} {'recent':<7} {RARE_NOTES:>9,} {_time_like(engine, RARE_TERM, args.repeat):10.2f}")
+        for label, q, sort in QUERIES:
+            matches, first, second = asyncio.run(_time_search(Session, q, sort, args.repeat))
+            print(f"  {label:<14} {q:<22} {sort:<7} {matches:>9,} {first:10.2f} {second:10.2f}")
+        asyncio.run(async_engine.dispose())
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Per-row cost of list responses: ORM entities validated against the
+response_model vs plain column rows in a `JSONRowsResponse`.
+
+Usage (from backend/):
+    python -m benchmarks.serialization --limit 500
+
+For a `--limit` page of each entity, timed separately (median of
+`--repeat`, in microseconds per row):
+
+- before: `select(Model)` hydrated into ORM objects (identity map cleared
+  each time, as in a fresh request session), then what FastAPI does with a
+  `response_model`: validate from attributes and dump to JSON bytes
+- after: the schema's columns as plain rows (`async_crud.get_*_rows`),
+  rendered by `JSONRowsResponse` with orjson, and with the stdlib `json`
+  fallback
+
+Both paths must produce the same bytes; the script exits non-zero if not.
+"""
+import argparse
+import sys
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.db import crud, models, responses, schemas
+from app.db.responses import JSONRowsResponse, schema_columns
+from benchmarks._util import time_ms
+from benchmarks.seed import seed, session_factory, temp_engine
+
+ENTITIES = [
+    ("patients", models.Patient, schemas.Patient, crud.select_patients),
+    ("doctors", models.Doctor, schemas.Doctor, crud.select_doctors),
+    ("appointments", models.Appointment, schemas.Appointment, crud.select_appointments),
+]
+
+
+def _per_row_us(fn, rows: int, repeat: int) -> float:
+    return time_ms(fn, repeat) * 1000 / rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=500, help="rows per page, the list endpoints' maximum")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = temp_engine()
+    seed(engine, patients=max(args.limit, 1000), doctors=max(args.limit, 100), appointments=max(args.limit, 10_000))
+    orjson = responses.orjson
+    mismatches = 0
+    print(f"limit={args.limit} (us per row, median of {args.repeat})")
+    print(f"  {'entity':<13} {'path':<15} {'fetch':>8} {'serialize':>10} {'total':>8}")
+    with session_factory(engine)() as db:
+        for label, model, schema, select_page in ENTITIES:
+            adapter = TypeAdapter(List[schema])
+            query = select_page(limit=args.limit)
+            row_query = query.with_only_columns(*schema_columns(model, schema))
+
+            def fetch_entities():
+                db.expunge_all()
+                return db.scalars(query).all()
+
+            entities = fetch_entities()
+            rows = db.execute(row_query).all()
+            n = len(rows)
+            before = adapter.dump_json(adapter.validate_python(entities, from_attributes=True))
+
+            paths = [(
+                "orm + model",
+                _per_row_us(fetch_entities, n, args.repeat),
+                _per_row_us(lambda: adapter.dump_json(adapter.validate_python(entities, from_attributes=True)),
+                            n, args.repeat),
+            )]
+            row_fetch = _per_row_us(lambda: db.execute(row_query).all(), n, args.repeat)
+            for name, serializer in (("rows + orjson", orjson), ("rows + json", None)):
+                if name == "rows + orjson" and orjson is None:
+                    continue
+                responses.orjson = serializer
+                after = JSONRowsResponse(rows).body
+                if after != before:
+                    mismatches += 1
+                    print(f"  {label}: {name} output differs from the response_model output")
+                paths.append((name, row_fetch, _per_row_us(lambda: JSONRowsResponse(rows), n, args.repeat)))
+            responses.orjson = orjson
+
+            for name, fetch, serialize in paths:
+                print(f"  {label:<13} {name:<15} {fetch:>8.2f} {serialize:>10.2f} {fetch + serialize:>8.2f}")
+    engine.dispose()
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
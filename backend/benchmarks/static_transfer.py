@@ -0,0 +1,154 @@
+"""
+Bytes transferred per page view of the frontend, and per large API response.
+
+Usage (from backend/):
+    python -m benchmarks.static_transfer
+
+For every page in frontend/, a browser-like client (Accept-Encoding:
+gzip, deflate, br) loads the page and the local scripts and stylesheets it
+links to, twice:
+
+- first view: empty cache, every file is downloaded
+- repeat view: the client revalidates what it may not reuse, sending the
+  ETag back as If-None-Match; files marked `immutable` within their max-age
+  are reused without a request
+
+Transfers are counted as status line, headers and body. "before" is the
+previous setup, `StaticFiles` plus `FileResponse` (no compression, no
+Cache-Control, so a browser has to revalidate every file); "after" is the
+app's static pipeline (app/services/static_assets.py).
+
+Also reported: GET /patients/?limit=500 with and without gzip, the API
+responses `GZipMiddleware` compresses.
+"""
+import argparse
+import asyncio
+import os
+import re
+import tempfile
+from urllib.parse import urljoin
+
+os.chdir(tempfile.mkdtemp(prefix="emr-static-"))  # keep emr.db and nlp_results.json out of the tree
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.abspath("emr.db")
+os.environ.setdefault("NLP_LLM_BACKEND", "fake")
+os.environ.setdefault("NLP_JOB_WORKERS", "0")
+
+import httpx  # noqa: E402
+
+BROWSER_HEADERS = {"accept-encoding": "gzip, deflate, br"}
+# Local scripts and stylesheets (absolute URLs point at CDNs)
+_LINKED = re.compile(r'<(?:script[^>]*\bsrc|link[^>]*\bhref)="((?!https?:|//)[^"]+)"', re.IGNORECASE)
+
+
+def wire_bytes(response: httpx.Response) -> int:
+    """Bytes on the wire for an HTTP/1.1 response (httpx hands back the body decompressed)."""
+    status_line = len(f"HTTP/1.1 {response.status_code} {response.reason_phrase}\r\n")
+    headers = sum(len(name) + len(value) + 4 for name, value in response.headers.raw)
+    return status_line + headers + 2 + int(response.headers.get("content-length", len(response.content)))
+
+
+def old_app(frontend_path: str):
+    """The frontend as served before, behind the same CORS and metrics middleware."""
+    from fastapi import FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import FileResponse
+    from fastapi.staticfiles import StaticFiles
+
+    from app.services import metrics
+
+    app = FastAPI()
+    app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"],
+                       allow_headers=["*"])
+    app.add_middleware(metrics.MetricsMiddleware)
+    app.mount("/static", StaticFiles(directory=frontend_path), name="static")
+
+    @app.get("/")
+    def serve_dashboard():
+        return FileResponse(os.path.join(frontend_path, "index.html"))
+
+    return app
+
+
+async def page_view(client: httpx.AsyncClient, url: str, cache: dict) -> tuple:
+    """Load `url` and what it links to through `cache`; returns (requests, bytes)."""
+    requests = transferred = 0
+
+    async def fetch(resource: str) -> str:
+        nonlocal requests, transferred
+        cached = cache.get(resource)
+        if cached is not None and "immutable" in cached.headers.get("cache-control", ""):
+            return cached.text
+        headers = dict(BROWSER_HEADERS)
+        if cached is not None and "etag" in cached.headers:
+            headers["if-none-match"] = cached.headers["etag"]
+        response = await client.get(resource, headers=headers)
+        requests += 1
+        transferred += wire_bytes(response)
+        if response.status_code == 304:
+            return cached.text
+        response.raise_for_status()
+        cache[resource] = response
+        return response.text
+
+    html = await fetch(url)
+    for linked in _LINKED.findall(html):
+        await fetch(urljoin(url, linked))
+    return requests, transferred
+
+
+async def measure(app, pages) -> dict:
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app), httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+        for url in pages:
+            cache: dict = {}
+            results[url] = (await page_view(client, url, cache), await page_view(client, url, cache))
+    return results
+
+
+async def api_sizes(app, patients: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app), httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+        for n in range(patients):
+            (await client.post("/patients/", json={"name": f"Patient {n}", "age": 20 + n % 60, "gender": "F",
+                                                  "contact": f"555-{n:04d}"})).raise_for_status()
+        return {
+            encoding: wire_bytes(await client.get("/patients/?limit=500", headers={"accept-encoding": encoding}))
+            for encoding in ("identity", "gzip")
+        }
+
+
+async def run(args) -> None:
+    from app.main import app, frontend_path
+
+    pages = ["/"] + sorted(f"/static/{name}" for name in os.listdir(frontend_path) if name.endswith(".html"))
+    before = await measure(old_app(frontend_path), pages)
+    after = await measure(app, pages)
+
+    print(f"  {'page':<28} {'view':<7} {'before req':>10} {'bytes':>8} {'after req':>10} {'bytes':>8} {'saved':>7}")
+    totals = {"first": [0, 0], "repeat": [0, 0]}
+    for url in pages:
+        for i, view in enumerate(("first", "repeat")):
+            (old_requests, old_bytes), (new_requests, new_bytes) = before[url][i], after[url][i]
+            totals[view][0] += old_bytes
+            totals[view][1] += new_bytes
+            print(f"  {url:<28} {view:<7} {old_requests:>10} {old_bytes:>8,} {new_requests:>10} {new_bytes:>8,}"
+                  f" {1 - new_bytes / old_bytes:>7.0%}")
+    for view, (old_bytes, new_bytes) in totals.items():
+        print(f"  {'all pages':<28} {view:<7} {'':>10} {old_bytes:>8,} {'':>10} {new_bytes:>8,}"
+              f" {1 - new_bytes / old_bytes:>7.0%}")
+
+    sizes = await api_sizes(app, args.patients)
+    print(f"GET /patients/?limit=500 ({args.patients} patients): {sizes['identity']:,} bytes, "
+          f"{sizes['gzip']:,} with gzip ({1 - sizes['gzip'] / sizes['identity']:.0%} saved)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Minimal local stand-in for the Gemini `generateContent` and
+`streamGenerateContent?alt=sse` APIs.
+
+Runs on asyncio streams with HTTP/1.1 keep-alive and a fixed artificial
+latency per call, so load tests exercise real sockets without network access
+or API quota. Streaming calls spread the same latency over `chunks` SSE
+events sent with chunked transfer encoding.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+
+REPLY = {"candidates": [{"content": {"parts": [{"text": "stub analysis"}]}}]}
+
+
+def _chunk(data: bytes) -> bytes:
+    return f"{len(data):x}\r\n".encode() + data + b"\r\n"
+
+
+class StubLLMServer:
+    def __init__(self, latency: float = 0.2, host: str = "127.0.0.1", port: int = 0, chunks: int = 20):
+        self.latency = latency
+        self.chunks = chunks
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self._server = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1beta"
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.decode("latin-1").split("\r\n")[1:]:
+                    name, _, value = line.partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value)
+                if length:
+                    await reader.readexactly(length)
+                self.requests += 1
+                if b":streamGenerateContent" in head.split(b"\r\n", 1)[0]:
+                    await self._stream(writer)
+                    continue
+                await asyncio.sleep(self.latency)
+                body = json.dumps(REPLY).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(body)}\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _stream(self, writer: asyncio.StreamWriter) -> None:
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+        for i in range(self.chunks):
+            await asyncio.sleep(self.latency / self.chunks)
+            event = {"candidates": [{"content": {"parts": [{"text": f"token{i} "}]}}]}
+            writer.write(_chunk(f"data: {json.dumps(event)}\r\n\r\n".encode()))
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def start(self) -> "StubLLMServer":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, backlog=1024)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+
+def _serve_forever(latency: float, port: int, ready) -> None:
+    async def run():
+        stub = await StubLLMServer(latency=latency, port=port).start()
+        ready.put(stub.port)
+        await asyncio.Event().wait()
+
+    asyncio.run(run())
+
+
+def start_in_subprocess(latency: float = 0.2, port: int = 0):
+    """
+    Run the stub in its own process, so its event loop does not compete with
+    the process under test. Returns `(process, base_url)`; terminate the
+    process when done.
+    """
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve_forever, args=(latency, port, ready), daemon=True)
+    process.start()
+    return process, f"http://127.0.0.1:{ready.get(timeout=10)}/v1beta"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fake Gemini API locally.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+    print(f"stub LLM on http://127.0.0.1:{args.port}/v1beta (latency {args.latency}s)")
+    _serve_forever(args.latency, args.port, multiprocessing.Queue())
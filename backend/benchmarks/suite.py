@@ -0,0 +1,333 @@
+"""
+Reproducible load test of the whole API, with a JSON baseline to compare
+against.
+
+Usage (from backend/):
+    python -m benchmarks.suite --scale 100k --output baseline.json
+    # ...change something...
+    python -m benchmarks.suite --scale 100k --compare baseline.json
+
+The database (`emr.db` in `--workdir`, a fresh temp directory by default) is
+seeded deterministically at the chosen scale, named after its appointment
+count:
+
+    10k    1,000 patients,    50 doctors,     10,000 appointments
+    100k   10,000 patients,   200 doctors,    100,000 appointments
+    1m     100,000 patients,  1,000 doctors,  1,000,000 appointments
+
+A `--workdir` that already holds an `emr.db` is reused as is, so a large
+scale is seeded once. Then every scenario below (reads, writes and NLP with
+the fake LLM, across the patients, doctors, appointments, schedule, search,
+dashboard and nlp routers) is driven by `--concurrency` closed-loop clients
+for `--duration` seconds, after `--warmup` seconds untimed:
+
+- `--transport asgi`: the app in this process through httpx's ASGI
+  transport. This measures the app alone, without sockets or HTTP parsing
+- `--transport uvicorn`: the app served by uvicorn in a child process over
+  TCP, as in production (client and server share the machine's CPUs)
+
+Reported per scenario: throughput (requests/s), p50/p95/p99 latency in ms
+and unexpected statuses. `--output` writes them to a JSON file. `--compare`
+reads such a file and flags every scenario whose p95 latency rose, or whose
+throughput fell, by more than `--tolerance` (default 20%). It then exits
+non-zero, so a CI job can fail on a performance regression. Compare runs of
+the same scale, transport and concurrency, on the same machine.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCALES = {
+    "10k": {"patients": 1_000, "doctors": 50, "appointments": 10_000},
+    "100k": {"patients": 10_000, "doctors": 200, "appointments": 100_000},
+    "1m": {"patients": 100_000, "doctors": 1_000, "appointments": 1_000_000},
+}
+
+# =========================================================
+# Scenarios
+# =========================================================
+class Call(NamedTuple):
+    method: str
+    path: str
+    body: Optional[dict] = None
+
+
+class Scenario(NamedTuple):
+    name: str
+    router: str
+    make: Callable[[random.Random, dict], Call]  # (rng, scale) -> request
+    status: int = 200
+
+
+# New appointments are spread one slot apart after the latest existing one
+# (set in main), so writes never double-book a doctor, even in a reused database
+_booking = itertools.count()
+booking_start = datetime(2040, 1, 1, 9, 0)
+
+
+def _booking_call(rng: random.Random, scale: dict) -> Call:
+    when = booking_start + timedelta(minutes=30 * next(_booking))
+    return Call("POST", "/appointments/", {
+        "patient_id": rng.randint(1, scale["patients"]), "doctor_id": rng.randint(1, scale["doctors"]),
+        "date": when.isoformat(), "notes": "Load test booking.",
+    })
+
+
+_nlp_texts = itertools.count()
+
+SCENARIOS: List[Scenario] = [
+    Scenario("patients: list page", "patients",
+             lambda rng, s: Call("GET", f"/patients/?limit=100&skip={rng.randrange(max(s['patients'] - 100, 1))}")),
+    Scenario("patients: keyset first page", "patients", lambda rng, s: Call("GET", "/patients/?limit=100&after=")),
+    Scenario("patients: get", "patients", lambda rng, s: Call("GET", f"/patients/{rng.randint(1, s['patients'])}")),
+    Scenario("patients: timeline", "patients",
+             lambda rng, s: Call("GET", f"/patients/{rng.randint(1, s['patients'])}/timeline")),
+    Scenario("patients: create", "patients", lambda rng, s: Call("POST", "/patients/", {
+        "name": f"Load Test {rng.randrange(10 ** 6)}", "age": rng.randint(1, 99), "gender": "Other",
+    })),
+    Scenario("doctors: list by specialty", "doctors", lambda rng, s: Call("GET", "/doctors/?specialty=cardio")),
+    Scenario("doctors: get", "doctors", lambda rng, s: Call("GET", f"/doctors/{rng.randint(1, s['doctors'])}")),
+    Scenario("appointments: list by patient", "appointments",
+             lambda rng, s: Call("GET", f"/appointments/?patient_id={rng.randint(1, s['patients'])}")),
+    Scenario("appointments: keyset page", "appointments",
+             lambda rng, s: Call("GET", "/appointments/?limit=100&after=")),
+    Scenario("appointments: get", "appointments",
+             lambda rng, s: Call("GET", f"/appointments/{rng.randint(1, s['appointments'])}")),
+    Scenario("appointments: create", "appointments", _booking_call),
+    Scenario("schedule: free slots, one doctor", "schedule",
+             lambda rng, s: Call("GET", f"/schedule/free-slots?doctor_id={rng.randint(1, s['doctors'])}")),
+    Scenario("search: appointment notes", "search",
+             lambda rng, s: Call("GET", f"/search/appointments?q={rng.choice(['metformin', 'chest pain', 'rash'])}")),
+    Scenario("dashboard: stats", "dashboard", lambda rng, s: Call("GET", "/dashboard/")),
+    Scenario("nlp: cached", "nlp", lambda rng, s: Call("POST", "/nlp/", {
+        "task": "summarize", "text": "Follow-up for hypertension, BP stable.",
+    })),
+    Scenario("nlp: uncached (fake LLM)", "nlp", lambda rng, s: Call("POST", "/nlp/", {
+        "task": "summarize", "text": f"Persistent cough for {next(_nlp_texts)} days.",
+    })),
+]
+
+# =========================================================
+# Load generation
+# =========================================================
+def _percentile(quantiles: List[float], p: int) -> float:
+    return quantiles[p - 1] * 1000
+
+
+async def drive(client, scenario: Scenario, scale: dict, concurrency: int, duration: float, warmup: float) -> dict:
+    """Closed-loop load: each client sends its next request when the last one answers."""
+    latencies: List[float] = []
+    errors = 0
+    start = time.perf_counter()
+    measure_from, deadline = start + warmup, start + warmup + duration
+
+    async def worker(seed: int) -> None:
+        nonlocal errors
+        rng = random.Random(seed)
+        while True:
+            sent = time.perf_counter()
+            if sent >= deadline:
+                return
+            call = scenario.make(rng, scale)
+            r = await client.request(call.method, call.path, json=call.body)
+            if sent >= measure_from:
+                latencies.append(time.perf_counter() - sent)
+                errors += r.status_code != scenario.status
+
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    if len(latencies) < 2:
+        return {"requests": len(latencies), "errors": errors, "rps": len(latencies) / duration,
+                "p50_ms": None, "p95_ms": None, "p99_ms": None}
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / duration, 1),
+        "p50_ms": round(_percentile(quantiles, 50), 2),
+        "p95_ms": round(_percentile(quantiles, 95), 2),
+        "p99_ms": round(_percentile(quantiles, 99), 2),
+    }
+
+
+async def run_scenarios(client, scenarios: List[Scenario], args) -> Dict[str, dict]:
+    results = {}
+    for scenario in scenarios:
+        results[scenario.name] = result = await drive(
+            client, scenario, SCALES[args.scale], args.concurrency, args.duration, args.warmup
+        )
+        print(_format_row(scenario.name, result), flush=True)
+    return results
+
+
+async def run_asgi(scenarios: List[Scenario], args) -> Dict[str, dict]:
+    import httpx
+    from app.main import app
+
+    # The app's lifespan (batch workers, connection pools) runs as under uvicorn
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=60) as client:
+            return await run_scenarios(client, scenarios, args)
+
+
+def run_uvicorn(scenarios: List[Scenario], args) -> Dict[str, dict]:
+    import httpx
+    from benchmarks.async_load import serve
+
+    server, base_url = serve("app.main:app", args.workdir)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async def run() -> Dict[str, dict]:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            return await run_scenarios(client, scenarios, args)
+
+    try:
+        return asyncio.run(run())
+    finally:
+        server.terminate()
+        server.wait()
+
+# =========================================================
+# Baselines
+# =========================================================
+def _format_row(name: str, r: dict) -> str:
+    def ms(value):
+        return f"{value:>8.2f}" if value is not None else f"{'-':>8}"
+    return f"  {name:<36} {r['rps']:>8.1f} {ms(r['p50_ms'])} {ms(r['p95_ms'])} {ms(r['p99_ms'])} {r['errors']:>7}"
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> int:
+    """Print scenario-by-scenario changes against `baseline`; returns the number of regressions."""
+    settings = ("scale", "transport", "concurrency")
+    mismatched = [key for key in settings if baseline["meta"].get(key) != current["meta"].get(key)]
+    if mismatched:
+        print(f"warning: baseline differs in {', '.join(mismatched)}; the comparison is not like for like")
+
+    regressions = 0
+    print(f"\ncompared to {baseline['meta'].get('commit') or 'baseline'} (tolerance {tolerance:.0%})")
+    print(f"  {'scenario':<36} {'req/s':>16} {'p95 ms':>18}")
+    for name, now in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None or not before["rps"] or before["p95_ms"] is None or now["p95_ms"] is None:
+            print(f"  {name:<36} {'(no baseline)':>16}")
+            continue
+        rps_change = now["rps"] / before["rps"] - 1
+        p95_change = now["p95_ms"] / before["p95_ms"] - 1
+        regressed = rps_change < -tolerance or p95_change > tolerance
+        regressions += regressed
+        print(
+            f"  {name:<36} {now['rps']:>8.1f} {rps_change:>+7.0%} {now['p95_ms']:>9.2f} {p95_change:>+7.0%}"
+            + ("  <-- REGRESSION" if regressed else "")
+        )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="10k")
+    parser.add_argument("--transport", choices=("asgi", "uvicorn"), default="asgi")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0, help="measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=1.0, help="unmeasured seconds before each scenario")
+    parser.add_argument("--routers", help="comma-separated routers to run (default: all)")
+    parser.add_argument("--workdir", help="directory holding emr.db; reused when it already exists")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag regressions against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95/throughput change (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    scenarios = SCENARIOS
+    if args.routers:
+        wanted = {name.strip() for name in args.routers.split(",")}
+        scenarios = [s for s in SCENARIOS if s.router in wanted]
+        if not scenarios:
+            parser.error(f"no scenarios for routers {sorted(wanted)}")
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    if args.output:
+        args.output = os.path.abspath(args.output)
+    # Configure the app before it is imported: its engines read the environment
+    args.workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="emr-suite-"))
+    os.makedirs(args.workdir, exist_ok=True)
+    os.chdir(args.workdir)  # nlp_results.json and friends land here, not in the tree
+    db_path = os.path.join(args.workdir, "emr.db")
+    os.environ["DATABASE_URL"] = "sqlite:///" + db_path
+    os.environ["NLP_LLM_BACKEND"] = "fake"
+    os.environ.setdefault("NLP_JOB_WORKERS", "0")
+
+    from sqlalchemy import func, select
+
+    from app.db import models
+    from app.db.database import init_db, make_engine
+    from benchmarks.seed import seed
+
+    global booking_start
+    scale = SCALES[args.scale]
+    engine = make_engine(os.environ["DATABASE_URL"])
+    if not os.path.exists(db_path):
+        print(f"seeding {args.scale} into {db_path} ...", flush=True)
+        init_db(bind=engine)
+        seed(engine, **scale)
+    with engine.connect() as conn:
+        latest = conn.scalar(select(func.max(models.Appointment.date)))
+    booking_start = (latest + timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
+    engine.dispose()
+
+    print(
+        f"scale={args.scale} transport={args.transport} concurrency={args.concurrency} "
+        f"duration={args.duration:g}s warmup={args.warmup:g}s"
+    )
+    print(f"  {'scenario':<36} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}", flush=True)
+    if args.transport == "asgi":
+        results = asyncio.run(run_asgi(scenarios, args))
+    else:
+        results = run_uvicorn(scenarios, args)
+
+    report = {
+        "meta": {
+            "scale": args.scale,
+            "transport": args.transport,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "machine": f"{platform.machine()} x{os.cpu_count()}",
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    if baseline is not None and compare(baseline, report, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Building a patient chart: the N+1 request flow against
+`GET /patients/{id}/timeline`.
+
+Usage (from backend/):
+    python -m benchmarks.timeline --patients 2000 --appointments 50000
+
+Runs the app in-process over ASGI against a seeded database in a temp
+directory; every third appointment also gets a completed batch NLP result.
+For `--charts` random patients, three ways of assembling the chart are
+timed:
+
+- n+1 scan: what the frontend does today. `GET /patients/{id}`, every page
+  of `GET /appointments/` filtered client-side, then `GET /doctors/{id}` per
+  appointment (and still no NLP results)
+- n+1 filtered: the same with `?patient_id=` doing the filtering
+- timeline: one `GET /patients/{id}/timeline`
+
+Reported per chart (median): HTTP requests, SQL statements and wall time.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+os.chdir(tempfile.mkdtemp(prefix="emr-timeline-"))  # keep emr.db and nlp_results.json out of the tree
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.abspath("emr.db")
+os.environ.setdefault("NLP_LLM_BACKEND", "fake")
+os.environ.setdefault("NLP_JOB_WORKERS", "0")
+
+import httpx  # noqa: E402
+from sqlalchemy import event, text  # noqa: E402
+
+PAGE = 500
+
+
+def seed_database(patients: int, appointments: int) -> None:
+    from app.db import models
+    from app.db.database import init_db, make_engine
+    from benchmarks.seed import seed
+
+    engine = make_engine(os.environ["DATABASE_URL"])
+    init_db(bind=engine)
+    seed(engine, patients=patients, doctors=max(patients // 100, 10), appointments=appointments)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO nlp_jobs (id, status, total, completed, failed, created_at, updated_at) "
+            "VALUES (1, 'completed', 0, 0, 0, datetime('now'), datetime('now'))"
+        ))
+        conn.execute(text(
+            "INSERT INTO nlp_job_items (job_id, task, text, appointment_id, status, attempts, result, "
+            "available_at, updated_at) "
+            "SELECT 1, 'summarize', notes, id, :done, 1, 'Stable; review in 3 months.', date, date "
+            "FROM appointments WHERE id % 3 = 0"
+        ), {"done": models.ITEM_DONE})
+    engine.dispose()
+
+
+async def n_plus_one(client: httpx.AsyncClient, patient_id: int, filtered: bool) -> int:
+    requests = 1
+    patient = (await client.get(f"/patients/{patient_id}")).json()
+    if filtered:
+        r = await client.get("/appointments/", params={"patient_id": patient_id, "limit": PAGE})
+        requests += 1
+        appointments = r.json()
+    else:
+        appointments, after = [], ""
+        while after is not None:
+            r = await client.get("/appointments/", params={"limit": PAGE, "after": after})
+            requests += 1
+            appointments += [a for a in r.json() if a["patient_id"] == patient_id]
+            after = r.headers.get("X-Next-Cursor")
+    appointments.sort(key=lambda a: (a["date"], a["id"]))
+    for appointment in appointments:
+        appointment["doctor"] = (await client.get(f"/doctors/{appointment['doctor_id']}")).json()
+        requests += 1
+    patient["appointments"] = appointments
+    return requests
+
+
+async def timeline(client: httpx.AsyncClient, patient_id: int) -> int:
+    r = await client.get(f"/patients/{patient_id}/timeline")
+    r.raise_for_status()
+    return 1
+
+
+async def run(args) -> None:
+    from app.db import database
+    from app.main import app
+
+    counter = {"n": 0}
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        counter["n"] += 1
+
+    event.listen(database.async_engine.sync_engine, "before_cursor_execute", count)
+
+    flows = {
+        "n+1 scan": lambda client, pid: n_plus_one(client, pid, filtered=False),
+        "n+1 filtered": lambda client, pid: n_plus_one(client, pid, filtered=True),
+        "timeline": timeline,
+    }
+    rng = random.Random(7)
+    charts = [rng.randint(1, args.patients) for _ in range(args.charts)]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+        print(f"patients={args.patients:,} appointments={args.appointments:,} charts={args.charts}")
+        print(f"  {'flow':<14} {'requests':>9} {'statements':>11} {'ms':>9}")
+        for label, flow in flows.items():
+            requests, statements, times = [], [], []
+            for patient_id in charts:
+                counter["n"] = 0
+                start = time.perf_counter()
+                requests.append(await flow(client, patient_id))
+                times.append((time.perf_counter() - start) * 1000)
+                statements.append(counter["n"])
+            print(
+                f"  {label:<14} {statistics.median(requests):>9.0f} {statistics.median(statements):>11.0f} "
+                f"{statistics.median(times):>9.2f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=2000)
+    parser.add_argument("--appointments", type=int, default=50_000)
+    parser.add_argument("--charts", type=int, default=20, help="patients whose chart is built in each flow")
+    args = parser.parse_args()
+
+    seed_database(args.patients, args.appointments)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Test setup. The environment is configured before `app` is imported: a
+throwaway database, the fake LLM backend and no batch job workers, so the
+suite needs no API keys and leaves emr.db and nlp_results.json alone.
+
+Run from backend/:
+    python -m pytest
+"""
+import os
+import tempfile
+
+import pytest
+
+WORKDIR = tempfile.mkdtemp(prefix="emr-tests-")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(WORKDIR, "emr.db")
+os.environ["NLP_LEGACY_RESULTS_FILE"] = os.path.join(WORKDIR, "nlp_results.json")
+os.environ["NLP_LLM_BACKEND"] = "fake"
+os.environ["NLP_JOB_WORKERS"] = "0"  # jobs are driven by the tests, not background workers
+
+
+@pytest.fixture(scope="session")
+def client():
+    """The app under its lifespan (schema, rollups, static assets), as under uvicorn."""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def make_patient(client):
+    def make(**fields) -> dict:
+        body = {"name": "Asha Rao", "age": 41, "gender": "Female", "allergies": "Latex", **fields}
+        response = client.post("/patients/", json=body)
+        assert response.status_code == 200, response.text
+        return response.json()
+    return make
+
+
+@pytest.fixture
+def make_doctor(client):
+    def make(**fields) -> dict:
+        body = {"name": "Dr. Iyer", "specialty": "Cardiology", "contact": "+91-9000000001", **fields}
+        response = client.post("/doctors/", json=body)
+        assert response.status_code == 200, response.text
+        return response.json()
+    return make
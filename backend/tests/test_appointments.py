@@ -0,0 +1,61 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.db import crud
+
+
+def _utc(local: datetime) -> str:
+    """A naive local time as the same instant in UTC, e.g. `2024-09-02T04:30:00Z`."""
+    return local.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+@pytest.mark.parametrize("field", ["patient_id", "doctor_id"])
+def test_create_with_id_zero_is_not_found(client, make_patient, make_doctor, field):
+    # 0 is an id like any other: it must be looked up, not skipped into an FK error
+    body = {"patient_id": make_patient()["id"], "doctor_id": make_doctor()["id"], "date": "2024-07-01T10:00:00"}
+    body[field] = 0
+    response = client.post("/appointments/", json=body)
+    assert response.status_code == 404
+
+
+def test_timezone_aware_dates_are_stored_as_local_time(client, make_patient, make_doctor):
+    patient, doctor = make_patient(), make_doctor()
+    booking = {"patient_id": patient["id"], "doctor_id": doctor["id"]}
+    first = client.post("/appointments/", json=dict(booking, date="2024-09-02T10:00:00"))
+    assert first.status_code == 200
+
+    # The same instant with an offset is a double booking, not a naive/aware comparison error
+    clash = client.post("/appointments/", json=dict(booking, date=_utc(datetime(2024, 9, 2, 10, 15))))
+    assert clash.status_code == 409
+
+    later = client.post("/appointments/", json=dict(booking, date=_utc(datetime(2024, 9, 2, 11, 0))))
+    assert later.status_code == 200
+    assert later.json()["date"] == "2024-09-02T11:00:00"
+
+    moved = client.put(f"/appointments/{later.json()['id']}", json={"date": _utc(datetime(2024, 9, 2, 10, 10))})
+    assert moved.status_code == 409
+
+
+def test_free_slots_accept_a_timezone_aware_start(client, make_doctor):
+    doctor = make_doctor()
+    response = client.get("/schedule/free-slots", params={
+        "doctor_id": doctor["id"], "start": _utc(datetime(2024, 9, 2, 9, 0)), "count": 1,
+    })
+    assert response.status_code == 200
+    assert response.json()[0]["start"] == "2024-09-02T09:00:00"
+
+
+def test_postgresql_locks_the_doctor_before_the_conflict_check():
+    executed = []
+    session = SimpleNamespace(
+        get_bind=lambda: SimpleNamespace(dialect=postgresql.dialect()),
+        execute=lambda statement, *args: executed.append(statement) or [],
+    )
+    crud._check_schedule(session, 7, datetime(2024, 9, 2, 10), 30)
+    lock, check = (statement.compile(dialect=postgresql.dialect()) for statement in executed)
+    assert "pg_advisory_xact_lock" in str(lock)
+    assert 7 in lock.params.values()
+    assert str(check).startswith("SELECT appointments.id")
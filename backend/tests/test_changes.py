@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.db import changes, database
+
+
+def test_deltas_since_a_version(client, make_patient):
+    version = client.get("/changes/").json()["version"]
+    patient = make_patient(name="Meena K")
+    client.put(f"/patients/{patient['id']}", json={"age": 52})
+    removed = make_patient()
+    client.delete(f"/patients/{removed['id']}")
+
+    page = client.get("/changes/", params={"since": version, "entity": "patient"}).json()
+    assert page["more"] is False
+    by_id = {change["id"]: change for change in page["changes"]}
+    assert by_id[patient["id"]]["op"] == "upsert"
+    assert by_id[patient["id"]]["data"]["age"] == 52
+    assert by_id[removed["id"]]["op"] == "delete"
+    assert by_id[removed["id"]]["data"] is None
+    assert client.get("/changes/", params={"since": page["version"]}).json()["changes"] == []
+
+
+def test_since_ahead_of_the_log_is_a_bad_request(client, make_patient):
+    make_patient()
+    newest = client.get("/changes/").json()["version"]
+    response = client.get("/changes/", params={"since": newest + 1})
+    assert response.status_code == 400
+
+
+def test_stream_resets_a_client_ahead_of_the_log(client):
+    newest = client.get("/changes/").json()["version"]
+    with client.stream("GET", "/changes/stream", params={"since": newest + 1}) as response:
+        events = [line.removeprefix("event: ") for line in response.iter_lines() if line.startswith("event: ")]
+    assert events == ["ready", "reset"]
+
+
+def test_since_older_than_the_retained_log_is_gone(client, make_patient):
+    for _ in range(3):
+        make_patient()
+    with database.SessionLocal() as db:
+        changes.prune(db, keep=1)
+    newest = client.get("/changes/").json()["version"]
+    assert client.get("/changes/", params={"since": newest - 1}).status_code == 200
+    assert client.get("/changes/", params={"since": newest - 2}).status_code == 410
+
+
+def test_postgresql_serializes_version_allocation():
+    executed = []
+    session = SimpleNamespace(
+        get_bind=lambda: SimpleNamespace(dialect=postgresql.dialect()),
+        execute=lambda statement, *args: executed.append(statement),
+    )
+    changes.record(session, [(changes.PATIENT, 1, changes.UPSERT)])
+    lock, insert = (str(statement.compile(dialect=postgresql.dialect())) for statement in executed)
+    assert "pg_advisory_xact_lock" in lock
+    assert insert.startswith("INSERT INTO change_log")
@@ -0,0 +1,43 @@
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.testclient import TestClient
+
+from app.main import GZipExceptEventStreams
+
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+def test_large_json_responses_are_compressed(client, make_patient):
+    for _ in range(20):
+        make_patient(allergies="Latex, penicillin, sulfa drugs")
+    response = client.get("/patients/", params={"limit": 500}, headers=GZIP)
+    assert response.headers.get("content-encoding") == "gzip"
+
+
+def test_change_stream_is_not_compressed(client):
+    # A `since` ahead of the log ends the stream after `ready` and `reset`
+    newest = client.get("/changes/").json()["version"]
+    with client.stream("GET", "/changes/stream", params={"since": newest + 1}, headers=GZIP) as response:
+        body = response.read()
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "content-encoding" not in response.headers
+    assert b"event: reset" in body
+
+
+def test_nlp_stream_is_not_compressed(client):
+    text = "Patient reports chest pain on exertion, relieved by rest. " * 40
+    with client.stream("POST", "/nlp/stream", json={"task": "summarize", "text": text}, headers=GZIP) as response:
+        body = response.read()
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "content-encoding" not in response.headers
+    assert b"event: done" in body
+
+
+def test_event_stream_paths_bypass_gzip_whatever_the_content_type():
+    # Older Starlette compresses text/event-stream; the exclusion must not rely on it
+    inner = Starlette()
+    for path in ("/changes/stream", "/other"):
+        inner.add_route(path, lambda request: PlainTextResponse("data: x\n\n" * 500))
+    client = TestClient(GZipExceptEventStreams(inner, minimum_size=100))
+    assert "content-encoding" not in client.get("/changes/stream", headers=GZIP).headers
+    assert client.get("/other", headers=GZIP).headers["content-encoding"] == "gzip"
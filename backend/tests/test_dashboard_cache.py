@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from app.services.dashboard_cache import DashboardCache
+
+
+def test_cancelled_first_caller_does_not_cancel_coalesced_waiters():
+    async def scenario():
+        cache = DashboardCache(ttl_seconds=60)
+        release = asyncio.Event()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return {"total_patients": 1}
+
+        leader = asyncio.create_task(cache.get_or_compute("dashboard", compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_compute("dashboard", compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        entry = await waiter
+        assert entry.payload == {"total_patients": 1}
+        assert calls == 1
+        assert cache.snapshot()["entries"] == 1  # the finished computation was cached
+
+    asyncio.run(scenario())
+
+
+def test_failed_computation_reaches_every_caller():
+    async def scenario():
+        cache = DashboardCache(ttl_seconds=60)
+
+        async def compute():
+            await asyncio.sleep(0)
+            raise RuntimeError("database down")
+
+        results = await asyncio.gather(
+            cache.get_or_compute("dashboard", compute),
+            cache.get_or_compute("dashboard", compute),
+            return_exceptions=True,
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert cache.snapshot()["coalesced"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_dashboard_endpoint(client):
+    first = client.get("/dashboard/")
+    assert first.status_code == 200
+    assert "total_patients" in first.json()
+    assert client.get("/dashboard/", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
@@ -0,0 +1,22 @@
+import pytest
+
+
+@pytest.mark.parametrize("term", ["%", "_", "o_b"])
+def test_patient_name_filter_is_a_literal_substring(client, make_patient, term):
+    make_patient(name="Asha Rao")
+    make_patient(name="Zoe 100% O_Brien")
+    names = [p["name"] for p in client.get("/patients/", params={"name": term, "limit": 500}).json()]
+    assert "Zoe 100% O_Brien" in names
+    assert all(term.lower() in name.lower() for name in names)
+
+
+@pytest.mark.parametrize("field,value,term", [
+    ("name", "Dr. 50%", "%"),
+    ("specialty", "Cardio_Thoracic", "_"),
+])
+def test_doctor_filters_are_literal_substrings(client, make_doctor, field, value, term):
+    make_doctor()
+    make_doctor(**{field: value})
+    rows = client.get("/doctors/", params={field: term, "limit": 500}).json()
+    assert rows
+    assert all(term in row[field] for row in rows)
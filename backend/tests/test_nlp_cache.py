@@ -0,0 +1,22 @@
+from app.db import database
+from app.services.nlp_cache import NLPCache, make_key
+
+
+def test_memory_tier_drops_expired_entries(client):
+    cache = NLPCache(max_items=8, ttl_seconds=0, max_rows=100)
+    key = make_key("summary", "v1", "test-model", "expires at once")
+    with database.SessionLocal() as db:
+        cache.put(db, key, "summary", "test-model", "result")
+        assert cache.get(db, key) is None
+    stats = cache.snapshot()
+    assert stats["memory_hits"] == 0
+    assert stats["memory_items"] == 0
+
+
+def test_memory_tier_serves_live_entries(client):
+    cache = NLPCache(max_items=8, ttl_seconds=3600, max_rows=100)
+    key = make_key("summary", "v1", "test-model", "still fresh")
+    with database.SessionLocal() as db:
+        cache.put(db, key, "summary", "test-model", "result")
+        assert cache.get(db, key) == "result"
+    assert cache.snapshot()["memory_hits"] == 1
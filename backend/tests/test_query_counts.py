@@ -0,0 +1,97 @@
+"""
+SQL statements issued per write endpoint (and per eager-loaded read),
+checked against a budget.
+
+Every statement the app sends to the database (SQLAlchemy
+`before_cursor_execute`, so an executemany counts once) is counted per
+request. A case over its budget fails, catching a regression to
+load-then-modify write paths or to per-row lazy loads in the patient
+timeline.
+
+Budgets include the dashboard rollup upserts (app/db/rollups.py) that
+every create, update and delete of a counted field performs in the same transaction,
+the double-booking check (app/db/scheduling.py) of appointment writes, and
+the change log INSERT (app/db/changes.py) of every successful write.
+"""
+import pytest
+from sqlalchemy import event
+
+from app.db import database
+
+PATIENT = {"name": "Asha Rao", "age": 41, "gender": "Female", "allergies": "Latex"}
+DOCTOR = {"name": "Dr. Iyer", "specialty": "Cardiology", "contact": "+91-9000000001"}
+MISSING = 10**9
+
+# (label, method, path, body, expected status, statement budget), run in this
+# order: patient/doctor 1 are edited; patient/doctor 2 are deleted with their appointments
+CASES = [
+    ("create patient", "POST", "/patients/", PATIENT, 200, 3),
+    ("update patient name", "PUT", "/patients/{patient1}", {"name": "Asha R."}, 200, 2),
+    ("update patient gender", "PUT", "/patients/{patient1}", {"gender": "Other"}, 200, 4),
+    ("update missing patient", "PUT", f"/patients/{MISSING}", {"name": "x"}, 404, 1),
+    ("create doctor", "POST", "/doctors/", DOCTOR, 200, 3),
+    ("update doctor contact", "PUT", "/doctors/{doctor1}", {"contact": "+91-9000000002"}, 200, 2),
+    ("create appointment", "POST", "/appointments/",
+     {"patient_id": "{patient1}", "doctor_id": "{doctor1}", "date": "2024-05-01T10:00:00"}, 200, 6),
+    ("create appointment (bad patient)", "POST", "/appointments/",
+     {"patient_id": MISSING, "doctor_id": "{doctor1}", "date": "2024-05-01T10:00:00"}, 404, 1),
+    ("patient timeline", "GET", "/patients/{patient2}/timeline", None, 200, 3),
+    ("update appointment notes", "PUT", "/appointments/{appointment}", {"notes": "Follow-up"}, 200, 2),
+    ("update appointment date", "PUT", "/appointments/{appointment}", {"date": "2024-06-01T10:00:00"}, 200, 5),
+    ("delete appointment", "DELETE", "/appointments/{appointment}", None, 200, 5),
+    ("delete missing appointment", "DELETE", "/appointments/{appointment}", None, 404, 1),
+    ("delete patient (with appointments)", "DELETE", "/patients/{patient2}", None, 200, 7),
+    ("delete doctor (with appointments)", "DELETE", "/doctors/{doctor2}", None, 200, 9),
+]
+
+
+def _fill(value, ids: dict):
+    """`value` with "{name}" placeholders replaced by the fixture ids."""
+    if isinstance(value, dict):
+        return {k: _fill(v, ids) for k, v in value.items()}
+    if isinstance(value, str) and value.startswith("{") and value.endswith("}"):
+        return ids[value[1:-1]]
+    return value.format(**ids) if isinstance(value, str) else value
+
+
+@pytest.fixture(scope="module")
+def statement_counts(client) -> dict:
+    """Run CASES in order; `label -> (status, statements)`."""
+    ids = {}
+    for n in (1, 2):
+        ids[f"patient{n}"] = client.post("/patients/", json=PATIENT).json()["id"]
+        ids[f"doctor{n}"] = client.post("/doctors/", json=DOCTOR).json()["id"]
+    for hour, (patient, doctor) in enumerate(
+        (("patient2", "doctor1"), ("patient2", "doctor2"), ("patient1", "doctor2"), ("patient2", "doctor2")), start=10
+    ):
+        created = client.post("/appointments/", json={
+            "patient_id": ids[patient], "doctor_id": ids[doctor], "date": f"2024-05-02T{hour}:00:00",
+        }).json()
+        ids.setdefault("appointment", created["id"])
+
+    counter = {"n": 0}
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        counter["n"] += 1
+
+    # Routers use the async engine; bulk import and startup the sync one
+    engines = (database.engine, database.async_engine.sync_engine)
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", count)
+    try:
+        counts = {}
+        for label, method, path, body, _, _ in CASES:
+            counter["n"] = 0
+            response = client.request(method, _fill(path, ids), json=_fill(body, ids))
+            counts[label] = (response.status_code, counter["n"])
+        return counts
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", count)
+
+
+@pytest.mark.parametrize("label,status,budget", [(c[0], c[4], c[5]) for c in CASES], ids=[c[0] for c in CASES])
+def test_statement_budget(statement_counts, label, status, budget):
+    got_status, used = statement_counts[label]
+    assert got_status == status
+    assert used <= budget, f"{label}: {used} statements, budget {budget}"
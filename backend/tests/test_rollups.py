@@ -0,0 +1,60 @@
+import json
+
+from sqlalchemy import select
+
+from app.db import database, models, rollups
+
+
+def _counters(db) -> dict:
+    # Counters that dropped to zero may be kept or deleted; both read as 0
+    Counter = models.DashboardCounter
+    return {(c.metric, c.key): c.value for c in db.scalars(select(Counter)) if c.value}
+
+
+def _ndjson(rows) -> str:
+    return "".join(json.dumps(row) + "\n" for row in rows)
+
+
+def test_incremental_counters_match_a_rebuild(client, make_patient, make_doctor):
+    def ok(response):
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    asha, ravi = make_patient(gender="Female"), make_patient(name="Ravi", gender="Male")
+    iyer, das = make_doctor(), make_doctor(name="Dr. Das", specialty="Dermatology")
+
+    def book(patient, doctor, date):
+        return ok(client.post("/appointments/", json={
+            "patient_id": patient["id"], "doctor_id": doctor["id"], "date": date,
+        }))
+
+    first = book(asha, iyer, "2025-01-06T09:00:00")
+    second = book(asha, iyer, "2025-01-07T09:00:00")
+    third = book(ravi, das, "2025-02-03T10:00:00")
+    book(ravi, iyer, "2025-02-04T11:00:00")
+
+    # Field updates that rename counter keys
+    ok(client.put(f"/patients/{ravi['id']}", json={"gender": "Other"}))
+    ok(client.put(f"/doctors/{das['id']}", json={"specialty": "Dermatology & Venereology"}))
+    # Moves across day, month, doctor and patient
+    ok(client.put(f"/appointments/{first['id']}", json={"date": "2025-03-03T09:00:00"}))
+    ok(client.put(f"/appointments/{second['id']}", json={"doctor_id": das["id"], "patient_id": ravi["id"]}))
+    ok(client.put(f"/appointments/{third['id']}", json={"doctor_id": iyer["id"], "date": "2025-02-05T10:00:00"}))
+    # Deletes, including cascades
+    ok(client.delete(f"/appointments/{first['id']}"))
+    ok(client.delete(f"/patients/{asha['id']}"))
+    ok(client.delete(f"/doctors/{das['id']}"))
+    # Bulk imports
+    imported = make_patient(name="Bulk", gender="Female")
+    patients = ok(client.post("/patients/import?format=ndjson", content=_ndjson([
+        {"name": "Kavya", "age": 30, "gender": "Female"},
+    ])))
+    appointments = ok(client.post("/appointments/import?format=ndjson", content=_ndjson([
+        {"patient_id": imported["id"], "doctor_id": iyer["id"], "date": f"2025-04-0{day}T09:00:00"} for day in (1, 2)
+    ])))
+    assert (patients["inserted"], appointments["inserted"]) == (1, 2)
+
+    with database.SessionLocal() as db:
+        incremental = _counters(db)
+        rollups.rebuild(db)
+        assert _counters(db) == incremental
@@ -0,0 +1,76 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db import scheduling
+
+SPECIALTY = "Free-slot search"
+MONDAY = datetime(2024, 9, 2)
+HOURS = [  # doctor 0 works the clinic default hours
+    [],
+    [
+        {"weekday": 0, "start_time": "09:00", "end_time": "12:00"},
+        {"weekday": 0, "start_time": "13:00", "end_time": "15:30"},
+        {"weekday": 2, "start_time": "10:00", "end_time": "18:00"},
+    ],
+    [{"weekday": 5, "start_time": "08:00", "end_time": "13:00"}],
+]
+
+
+@pytest.fixture(scope="module")
+def schedule(client) -> dict:
+    """Doctors of SPECIALTY with random bookings, some outside their hours: `doctor_id -> (hours, busy)`."""
+    rng = random.Random(7)
+    patient = client.post("/patients/", json={"name": "Slot Seeker", "age": 30, "gender": "Other"}).json()
+    doctors = {}
+    for hours in HOURS:
+        doctor = client.post("/doctors/", json={"name": "Dr. Slot", "specialty": SPECIALTY, "contact": "-"}).json()
+        assert client.put(f"/schedule/doctors/{doctor['id']}/hours", json={"hours": hours}).status_code == 200
+        busy = []
+        for _ in range(60):
+            start = MONDAY + timedelta(days=rng.randrange(12), minutes=15 * rng.randrange(28, 80))
+            minutes = rng.choice([15, 30, 45, 60, 90])
+            response = client.post("/appointments/", json={
+                "patient_id": patient["id"], "doctor_id": doctor["id"],
+                "date": start.isoformat(), "duration_minutes": minutes,
+            })
+            if response.status_code == 200:
+                busy.append((start, start + timedelta(minutes=minutes)))
+        weekly = {}
+        for h in hours:
+            weekly.setdefault(h["weekday"], []).append(
+                (datetime.strptime(h["start_time"], "%H:%M").time(), datetime.strptime(h["end_time"], "%H:%M").time())
+            )
+        doctors[doctor["id"]] = (weekly or scheduling._default_hours(), busy)
+    return doctors
+
+
+def _brute_force(schedule: dict, not_before: datetime, minutes: int, count: int) -> list:
+    """Every grid slot of every working interval, checked against every booking."""
+    length, step = timedelta(minutes=minutes), timedelta(minutes=scheduling.SLOT_MINUTES)
+    horizon, slots = not_before + timedelta(days=scheduling.HORIZON_DAYS), []
+    for doctor_id, (hours, busy) in schedule.items():
+        for n in range(scheduling.HORIZON_DAYS + 1):
+            day = (not_before + timedelta(days=n)).date()
+            for open_at, close_at in hours.get(day.weekday(), ()):
+                slot, closes = datetime.combine(day, open_at), datetime.combine(day, close_at)
+                while slot + length <= closes:
+                    if not_before <= slot < horizon and all(end <= slot or start >= slot + length for start, end in busy):
+                        slots.append((slot, doctor_id))
+                    slot += step
+    return sorted(slots)[:count]
+
+
+@pytest.mark.parametrize("minutes", [30, 60, 90, 150])
+@pytest.mark.parametrize("not_before", [MONDAY + timedelta(hours=8), MONDAY + timedelta(hours=10, minutes=10)])
+def test_free_slots_match_brute_force(client, schedule, minutes, not_before):
+    for params, doctors in [({"specialty": SPECIALTY}, schedule)] + [
+        ({"doctor_id": doctor_id}, {doctor_id: schedule[doctor_id]}) for doctor_id in schedule
+    ]:
+        response = client.get("/schedule/free-slots", params={
+            **params, "start": not_before.isoformat(), "duration_minutes": minutes, "count": 25,
+        })
+        assert response.status_code == 200
+        got = [(datetime.fromisoformat(s["start"]), s["doctor_id"]) for s in response.json()]
+        assert got == _brute_force(doctors, not_before, minutes, 25), params
@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in a fresh interpreter: database and network connections fail the import
+CHILD = """
+import socket, sqlite3, sqlite3.dbapi2
+
+def forbidden(*args, **kwargs):
+    raise AssertionError("I/O while importing app.main")
+
+socket.socket.connect = forbidden
+sqlite3.connect = sqlite3.dbapi2.connect = forbidden  # pysqlite and aiosqlite call the dbapi2 one
+
+import app.main
+"""
+
+
+def test_import_needs_no_configuration_and_does_no_io(tmp_path):
+    database = tmp_path / "missing" / "emr.db"
+    env = {k: v for k, v in os.environ.items() if not k.startswith(("NLP_", "DATABASE_URL"))}
+    # Empty rather than unset, so a developer's .env cannot fill them in
+    env.update(PYTHONPATH=BACKEND_DIR, GOOGLE_API_KEY="", OPENAI_API_KEY="", DATABASE_URL=f"sqlite:///{database}")
+
+    result = subprocess.run([sys.executable, "-c", CHILD], cwd=tmp_path, env=env, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert not database.parent.exists()
+    assert list(tmp_path.iterdir()) == []
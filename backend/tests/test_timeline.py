@@ -0,0 +1,39 @@
+from app.db import crud, database, models
+
+
+def _run_queued_items(result: str) -> None:
+    """Drain the job queue the way a worker does: claim, then complete."""
+    with database.SessionLocal() as db:
+        while (item := crud.claim_nlp_job_item(db)) is not None:
+            crud.complete_nlp_job_item(db, item.id, item.job_id, result)
+
+
+def test_timeline_includes_completed_job_items(client, make_patient, make_doctor):
+    patient, doctor = make_patient(), make_doctor()
+    appointment = client.post("/appointments/", json={
+        "patient_id": patient["id"], "doctor_id": doctor["id"],
+        "date": "2024-08-01T10:00:00", "notes": "BP 150/95, started amlodipine",
+    }).json()
+    job = client.post("/nlp/jobs/", json={"appointments": {"patient_id": patient["id"]}, "task": "summarize"})
+    assert job.status_code == 202, job.text
+
+    _run_queued_items("Hypertension, on amlodipine.")
+    items = client.get(f"/nlp/jobs/{job.json()['id']}/items").json()["items"]
+    assert [item["status"] for item in items] == [models.ITEM_DONE]
+
+    timeline = client.get(f"/patients/{patient['id']}/timeline").json()
+    [entry] = timeline["appointments"]
+    assert entry["id"] == appointment["id"]
+    assert [r["result"] for r in entry["nlp_results"]] == ["Hypertension, on amlodipine."]
+
+
+def test_timeline_leaves_out_unfinished_job_items(client, make_patient, make_doctor):
+    patient, doctor = make_patient(), make_doctor()
+    client.post("/appointments/", json={
+        "patient_id": patient["id"], "doctor_id": doctor["id"],
+        "date": "2024-08-02T10:00:00", "notes": "Follow-up in 2 weeks",
+    })
+    client.post("/nlp/jobs/", json={"appointments": {"patient_id": patient["id"]}, "task": "summarize"})
+
+    [entry] = client.get(f"/patients/{patient['id']}/timeline").json()["appointments"]
+    assert entry["nlp_results"] == []
@@ -45,26 +45,23 @@ async function createAppointment(patient_id, doctor_id, date, notes = "") {
     }
 }
 
-// ----------- LIST Appointments -----------
-async function listAppointments() {
-    try {
-        const res = await fetch(APPOINTMENTS_URL);
-        const data = await res.json();
-        appointmentsList.innerHTML = "";
-        if (!data || data.length === 0) {
-            appointmentsList.textContent = "No appointments found.";
-            return;
-        }
-        data.forEach(a => {
-            const li = document.createElement('li');
-            li.innerHTML = `[${a.id}] Patient ${a.patient_id} with Dr. ${a.doctor_id} on ${new Date(a.date).toLocaleString()} 
-                <button onclick="deleteAppointment(${a.id})">Delete</button>`;
-            appointmentsList.appendChild(li);
-        });
-    } catch (err) {
+// ----------- LIST Appointments (kept current by the change feed, see changes.js) -----------
+function renderAppointments(data) {
+    appointmentsList.innerHTML = "";
+    if (data === null) {
         appointmentsList.textContent = "Error fetching appointments.";
-        console.error(err);
+        return;
     }
+    if (data.length === 0) {
+        appointmentsList.textContent = "No appointments found.";
+        return;
+    }
+    data.forEach(a => {
+        const li = document.createElement('li');
+        li.innerHTML = `[${a.id}] Patient ${a.patient_id} with Dr. ${a.doctor_id} on ${new Date(a.date).toLocaleString()} 
+            <button onclick="deleteAppointment(${a.id})">Delete</button>`;
+        appointmentsList.appendChild(li);
+    });
 }
 
 // ----------- DELETE Appointment -----------
@@ -73,7 +70,6 @@ async function deleteAppointment(id) {
         const res = await fetch(`${APPOINTMENTS_URL}${id}/`, { method: 'DELETE' });
         if (res.ok) {
             console.log(`Deleted Appointment ${id}`);
-            listAppointments();
         } else {
             console.error('Failed to delete appointment');
         }
@@ -92,11 +88,11 @@ appointmentForm.addEventListener('submit', async e => {
 
     await createAppointment(patient_id, doctor_id, date, notes);
     appointmentForm.reset();
-    listAppointments();
 });
 
-// ----------- REFRESH BUTTON -----------
-fetchAppointmentsBtn.addEventListener('click', listAppointments);
+// Initial load; creates and deletes arrive as deltas
+populateDropdowns();
+const appointments = liveList('appointment', APPOINTMENTS_URL, renderAppointments);
 
-// Initial load
-populateDropdowns().then(listAppointments);
+// ----------- REFRESH BUTTON -----------
+fetchAppointmentsBtn.addEventListener('click', appointments.reload);
@@ -0,0 +1,40 @@
+const CHANGES_URL = 'http://127.0.0.1:8000/changes/';
+
+// ----------- LIVE LIST (backend change feed) -----------
+// Loads a list once, then applies the patient/doctor/appointment deltas the
+// backend pushes (GET /changes/stream) instead of refetching the whole list
+// after every action. `render` receives the rows in list order.
+function liveList(entity, listUrl, render) {
+    const rows = new Map();
+    let source = null;
+
+    async function reload() {
+        if (source) source.close();
+        try {
+            // Version first: changes made while the list loads are replayed, not lost
+            const { version } = await fetch(CHANGES_URL).then(res => res.json());
+            const data = await fetch(listUrl).then(res => res.json());
+            rows.clear();
+            data.forEach(row => rows.set(row.id, row));
+            render([...rows.values()]);
+
+            // On a dropped connection, EventSource reconnects from the last event id
+            source = new EventSource(`${CHANGES_URL}stream?entity=${entity}&since=${version}`);
+            source.addEventListener('changes', e => {
+                JSON.parse(e.data).changes.forEach(change => {
+                    if (change.op === 'delete') rows.delete(change.id);
+                    else rows.set(change.id, change.data);
+                });
+                render([...rows.values()]);
+            });
+            // Fell too far behind the change log: start over from a fresh list
+            source.addEventListener('reset', reload);
+        } catch (err) {
+            render(null);
+            console.error(`Error loading ${entity} list:`, err);
+        }
+    }
+
+    reload();
+    return { rows, reload };
+}
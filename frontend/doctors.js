@@ -31,28 +31,24 @@ async function createDoctor(name, specialty, contact) {
     }
 }
 
-// ----------- LIST All Doctors -----------
-async function listDoctors() {
-    try {
-        const res = await fetch(DOCTORS_URL);
-        const data = await res.json();
-        doctorsList.innerHTML = "";
-        if (!data || data.length === 0) {
-            doctorsList.textContent = "No doctors found.";
-            return;
-        }
-        data.forEach(d => {
-            const li = document.createElement('li');
-            li.innerHTML = `[${d.id}] Dr. ${d.name} - ${d.specialty} (${d.contact}) 
-                <button onclick="deleteDoctor(${d.id})">Delete</button>
-                <button onclick="editDoctor(${d.id})">Edit</button>`;
-            doctorsList.appendChild(li);
-        });
-        return data;
-    } catch (err) {
+// ----------- LIST All Doctors (kept current by the change feed, see changes.js) -----------
+function renderDoctors(data) {
+    doctorsList.innerHTML = "";
+    if (data === null) {
         doctorsList.textContent = "Error fetching doctors.";
-        console.error(err);
+        return;
+    }
+    if (data.length === 0) {
+        doctorsList.textContent = "No doctors found.";
+        return;
     }
+    data.forEach(d => {
+        const li = document.createElement('li');
+        li.innerHTML = `[${d.id}] Dr. ${d.name} - ${d.specialty} (${d.contact}) 
+            <button onclick="deleteDoctor(${d.id})">Delete</button>
+            <button onclick="editDoctor(${d.id})">Edit</button>`;
+        doctorsList.appendChild(li);
+    });
 }
 
 // ----------- DELETE Doctor -----------
@@ -61,7 +57,6 @@ async function deleteDoctor(id) {
         const res = await fetch(`${DOCTORS_URL}${id}/`, { method: 'DELETE' });
         if (res.ok) {
             console.log(`Deleted Doctor ${id}`);
-            listDoctors();
         } else {
             console.error('Failed to delete doctor');
             alert("Failed to delete doctor.");
@@ -91,7 +86,6 @@ async function updateDoctor(id, updates) {
         }
         const data = await res.json();
         console.log(`Updated Doctor ${id}:`, data);
-        listDoctors();
         return data;
     } catch (err) {
         console.error(`Error updating doctor ${id}:`, err);
@@ -108,11 +102,10 @@ doctorForm.addEventListener('submit', async e => {
 
     await createDoctor(name, specialty, contact);
     doctorForm.reset();
-    listDoctors();
 });
 
-// ----------- REFRESH BUTTON -----------
-fetchDoctorsBtn.addEventListener('click', listDoctors);
+// Initial load; creates, updates and deletes arrive as deltas
+const doctors = liveList('doctor', DOCTORS_URL, renderDoctors);
 
-// Initial load
-listDoctors();
+// ----------- REFRESH BUTTON -----------
+fetchDoctorsBtn.addEventListener('click', doctors.reload);
@@ -2,23 +2,36 @@ const BASE_URL = 'http://127.0.0.1:8000/nlp/';
 const fetchResultsBtn = document.getElementById('fetchResultsBtn');
 const resultsList = document.getElementById('resultsList');
 
+function appendResult(item, index) {
+    const li = document.createElement('li');
+    li.innerHTML = `<strong>${index + 1}. [${item.task || "N/A"}]</strong> ${item.input_text || ""} → ${item.result || ""}`;
+    resultsList.appendChild(li);
+}
+
+// Streams the NDJSON export and renders each result as soon as its line arrives
 fetchResultsBtn.addEventListener('click', async () => {
     resultsList.innerHTML = "Fetching...";
     try {
-        const res = await fetch(BASE_URL);
+        const res = await fetch(`${BASE_URL}?format=ndjson`);
         if(!res.ok) throw new Error('Failed to fetch NLP results');
-        const data = await res.json();
         resultsList.innerHTML = "";
-        const results = data.results || data;
-        if(!results.length) {
+
+        const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = "";
+        let count = 0;
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += value;
+            const lines = buffer.split("\n");
+            buffer = lines.pop();
+            lines.filter(line => line.trim()).forEach(line => appendResult(JSON.parse(line), count++));
+        }
+        if (buffer.trim()) appendResult(JSON.parse(buffer), count++);
+
+        if(!count) {
             resultsList.textContent = "No NLP results found.";
-            return;
         }
-        results.forEach((item, index) => {
-            const li = document.createElement('li');
-            li.innerHTML = `<strong>${index + 1}. [${item.task || "N/A"}]</strong> ${item.input_text || ""} → ${item.result || ""}`;
-            resultsList.appendChild(li);
-        });
     } catch(err) {
         resultsList.textContent = "Error fetching NLP results.";
         console.error(err);
@@ -19,28 +19,24 @@ async function createPatient(name, age, gender, allergies = "") {
     }
 }
 
-// ----------- LIST All Patients -----------
-async function listPatients() {
-    try {
-        const res = await fetch(PATIENTS_URL);
-        const data = await res.json();
-        patientsList.innerHTML = "";
-        if (!data || data.length === 0) {
-            patientsList.textContent = "No patients found.";
-            return;
-        }
-        data.forEach(p => {
-            const li = document.createElement('li');
-            li.innerHTML = `[${p.id}] ${p.name} - ${p.age}y (${p.gender}) 
-                <button onclick="deletePatient(${p.id})">Delete</button>
-                <button onclick="editPatient(${p.id})">Edit</button>`;
-            patientsList.appendChild(li);
-        });
-        return data;
-    } catch (err) {
+// ----------- LIST All Patients (kept current by the change feed, see changes.js) -----------
+function renderPatients(data) {
+    patientsList.innerHTML = "";
+    if (data === null) {
         patientsList.textContent = "Error fetching patients.";
-        console.error(err);
+        return;
+    }
+    if (data.length === 0) {
+        patientsList.textContent = "No patients found.";
+        return;
     }
+    data.forEach(p => {
+        const li = document.createElement('li');
+        li.innerHTML = `[${p.id}] ${p.name} - ${p.age}y (${p.gender}) 
+            <button onclick="deletePatient(${p.id})">Delete</button>
+            <button onclick="editPatient(${p.id})">Edit</button>`;
+        patientsList.appendChild(li);
+    });
 }
 
 // ----------- DELETE Patient -----------
@@ -49,7 +45,6 @@ async function deletePatient(id) {
         const res = await fetch(`${PATIENTS_URL}${id}/`, { method: 'DELETE' });
         if (res.ok) {
             console.log(`Deleted Patient ${id}`);
-            listPatients(); // Refresh list
         } else {
             console.error('Failed to delete patient');
         }
@@ -68,7 +63,6 @@ async function updatePatient(id, updates) {
         });
         const data = await res.json();
         console.log(`Updated Patient ${id}:`, data);
-        listPatients(); // Refresh list
         return data;
     } catch (err) {
         console.error(`Error updating patient ${id}:`, err);
@@ -85,8 +79,7 @@ patientForm.addEventListener('submit', async e => {
 
     await createPatient(name, age, gender, allergies);
     patientForm.reset();
-    listPatients();
 });
 
-// Initial load
-listPatients();
+// Initial load; creates, updates and deletes arrive as deltas
+const patients = liveList('patient', PATIENTS_URL, renderPatients);